@@ -2,7 +2,8 @@
 Agent Core Module
 """
 
-from .agent import FoodNutritionAgent, Message
+from .agent import FoodNutritionAgent, Message, create_http_client
+from .usage import TokenUsage
 from .tools import WebSearchTool, NutritionCalculator, AVAILABLE_TOOLS
 from .exceptions import (
     AgentException,
@@ -16,6 +17,8 @@ from .exceptions import (
 __all__ = [
     "FoodNutritionAgent",
     "Message",
+    "create_http_client",
+    "TokenUsage",
     "WebSearchTool",
     "NutritionCalculator",
     "AVAILABLE_TOOLS",
@@ -2,27 +2,98 @@
 Core AI Agent implementation with multi-provider LLM support.
 """
 
+import asyncio
 import json
 import re
+import sys
+import time
 import httpx
-from typing import AsyncGenerator, Optional
+from typing import TYPE_CHECKING, AsyncGenerator, Optional, Sequence
 from dataclasses import dataclass, field
 
-from config import LLMConfig, LLMProvider, get_system_prompt, SEARCH_CONFIG
+from config import (
+    LLMConfig, LLMProvider,
+    SEARCH_CONFIG, NUTRITION_CONFIG, AGENT_CONFIG, RESPONSE_CACHE_CONFIG, SEMANTIC_CACHE_CONFIG,
+)
 from .exceptions import LLMException, ToolException, ParseException
-from .tools import WebSearchTool, NutritionCalculator, AVAILABLE_TOOLS
+from .cache import TieredCache, build_cache
+from .context import ConversationContext, estimate_tokens
+from .tools import WebSearchTool, NutritionCalculator
+from . import bundle
+from .usage import TokenUsage, parse_usage
+from .ratelimit import get_rate_limiter
+from .resilience import RetryPolicy, RETRYABLE_STATUS, get_circuit_breaker, parse_retry_after
+from .router import ProviderRouter
+from .request_template import EncodedDict, EncodedHistory, EncodedList, RequestTemplate, get_request_template, loads
+from .telemetry import span
+from .response_cache import ResponseCache, build_response_cache
+from .semantic_cache import SemanticCache
+from .streaming import iter_sse_events, StreamParser, OpenAIStreamParser, ClaudeStreamParser
 
+if TYPE_CHECKING:
+    from skills import SkillRouter
+    from .session_log import SessionLog
 
-@dataclass
+
+@dataclass(slots=True)
 class Message:
-    """Represents a chat message"""
+    """
+    Represents a chat message.
+    
+    Slotted, with the role interned, since long sessions keep many of
+    them. Plain user/assistant messages cache their wire format and its
+    encoded JSON on first use (see `wire()`).
+    """
     role: str  # "system", "user", "assistant", "tool"
     content: str
-    tool_calls: list = field(default_factory=list)
+    tool_calls: Sequence["ToolCall"] = ()  # No per-message empty list
     tool_call_id: Optional[str] = None
+    token_count: int = field(default=0, compare=False)  # Approximate, set on creation
+    _wire: Optional[EncodedDict] = field(default=None, init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        self.role = sys.intern(self.role)
+        if not self.token_count:
+            self.token_count = estimate_tokens(self.content)
+    
+    def wire(self) -> EncodedDict:
+        """
+        `{"role", "content"}` dict of a plain message (the same for every
+        provider) with its JSON pre-encoded. Cached, so it is shared by all
+        requests and must not be modified.
+        """
+        if self._wire is None:
+            self._wire = EncodedDict(role=self.role, content=self.content)
+        return self._wire
+
+
+def create_http_client(config: LLMConfig) -> httpx.AsyncClient:
+    """
+    Create a pooled HTTP client for LLM calls.
+    
+    Connections are kept alive and reused across requests, so only the first
+    call pays for DNS lookup, TCP connect and TLS handshake. HTTP/2 is used
+    when enabled in config and the `h2` package is installed.
+    """
+    http2 = config.http2
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            http2 = False
+    
+    return httpx.AsyncClient(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=config.max_connections,
+            max_keepalive_connections=config.max_keepalive_connections,
+            keepalive_expiry=config.keepalive_expiry,
+        ),
+        timeout=httpx.Timeout(config.timeout, connect=config.connect_timeout),
+    )
 
 
-@dataclass 
+@dataclass(slots=True)
 class ToolCall:
     """Represents a tool call request"""
     id: str
@@ -30,6 +101,19 @@ class ToolCall:
     arguments: dict
 
 
+class TurnMessages(list):
+    """
+    Messages of one turn: the history window, whose wire format is
+    pre-encoded in `encoded`, followed by the turn's tool rounds.
+    """
+    
+    __slots__ = ("encoded",)
+    
+    def __init__(self, messages: list[Message], encoded: EncodedList):
+        super().__init__(messages)
+        self.encoded = encoded
+
+
 class FoodNutritionAgent:
     """
     AI Agent specialized in food and nutrition analysis.
@@ -39,121 +123,297 @@ class FoodNutritionAgent:
     - Web search capability
     - Nutrition calculation and lookup
     - Conversational interface
+    
+    The agent owns one pooled HTTP client for all LLM calls. Use it as an
+    async context manager or call `aclose()` when done:
+    
+        async with FoodNutritionAgent(config) as agent:
+            await agent.chat("Calories trong phở bò")
     """
     
-    def __init__(self, config: LLMConfig):
+    def __init__(
+        self,
+        config: LLMConfig,
+        http_client: Optional[httpx.AsyncClient] = None,
+        search_tool: Optional[WebSearchTool] = None,
+        nutrition_tool: Optional[NutritionCalculator] = None,
+        response_cache: Optional[ResponseCache] = None,
+        semantic_cache: Optional[SemanticCache] = None,
+        router: Optional[ProviderRouter] = None,
+        skill_router: Optional["SkillRouter"] = None,
+    ):
         self.config = config
         self.conversation_history: list[Message] = []
         
-        # Initialize tools
-        self.search_tool = WebSearchTool(
-            api_key=SEARCH_CONFIG.get("serper_api_key"),
-            max_results=SEARCH_CONFIG.get("max_results", 5)
+        # Shared HTTP client (created lazily if not provided)
+        self._http_client = http_client
+        self._owns_client = http_client is None
+        
+        # Per-provider rate limit and circuit breaker shared by all agents
+        self.rate_limiter = get_rate_limiter(config)
+        self.circuit_breaker = get_circuit_breaker(config)
+        self.retry_policy = RetryPolicy.from_config(config)
+        
+        # Optional failover/hedging across providers (LLM_FALLBACK_PROVIDERS)
+        self.router = router if router is not None else ProviderRouter.from_config(config)
+        self.last_provider = config.provider.value
+        
+        # Initialize tools (may be shared between agents, e.g. in server mode)
+        self.search_tool = search_tool or self.create_search_tool()
+        self.nutrition_tool = nutrition_tool or self.create_nutrition_tool()
+        
+        # Optional local answers for simple questions (may be shared)
+        self.skill_router = skill_router if skill_router is not None else self.create_skill_router(self.nutrition_tool)
+        self.last_skill: Optional[str] = None
+        
+        # Optional cache of deterministic LLM responses (may be shared)
+        self.response_cache = response_cache or self.create_response_cache()
+        self.last_cache_hit = False
+        
+        # Optional cache of answers to similar first questions (may be shared)
+        self.semantic_cache = semantic_cache if semantic_cache is not None else self.create_semantic_cache()
+        
+        # Bounded context window with background summarization
+        self.context = ConversationContext(
+            max_tokens=AGENT_CONFIG.get("context_max_tokens", 6000),
+            recent_turns=AGENT_CONFIG.get("context_recent_turns", 10),
         )
-        self.nutrition_tool = NutritionCalculator()
+        self._encoded_history = EncodedHistory()  # Window JSON, extended as history grows
+        self.summary_max_tokens = AGENT_CONFIG.get("summary_max_tokens", 400)
+        
+        # Optional on-disk history (server sessions, see attach_session_log)
+        self.session_log: Optional["SessionLog"] = None
+        self.session_id: Optional[str] = None
+        self._logged_count = 0  # Leading history messages already in the log
+        self._logged_at: Optional[float] = None  # Log version this history matches
+        
+        # Token usage reported by the provider (incl. prompt-cache hits)
+        self.last_usage = TokenUsage()  # Last response
+        self.turn_usage = TokenUsage()  # All responses of the last chat turn
+        self.last_tool_iterations = 0  # Tool rounds of the last chat turn
+        self._semantic_hit: Optional[bool] = None  # None if the last turn skipped the semantic cache
+        self.total_usage = TokenUsage()  # Whole session
+        self.summary_usage = TokenUsage()  # Background summaries, kept out of the turn numbers
+        
+        # Tool execution limits (per turn)
+        self.max_tool_concurrency = max(1, AGENT_CONFIG.get("max_tool_concurrency", 4))
+        self.tool_timeout = AGENT_CONFIG.get("tool_timeout", 30.0)
         
         # Load system prompt
-        self.system_prompt = get_system_prompt()
+        self.system_prompt = bundle.system_prompt()
         
-    def _get_headers(self) -> dict:
-        """Get API headers based on provider"""
-        headers = {"Content-Type": "application/json"}
+    @classmethod
+    def create_search_tool(cls) -> WebSearchTool:
+        """Create a WebSearchTool from SEARCH_CONFIG"""
+        return WebSearchTool(
+            api_key=SEARCH_CONFIG.get("serper_api_key"),
+            max_results=SEARCH_CONFIG.get("max_results", 5),
+            cache=cls._create_search_cache(),
+            url=SEARCH_CONFIG.get("serper_url"),
+        )
+    
+    @staticmethod
+    def create_nutrition_tool() -> NutritionCalculator:
+        """Create a NutritionCalculator from NUTRITION_CONFIG"""
+        return NutritionCalculator(
+            database_path=NUTRITION_CONFIG.get("database_path"),
+            fuzzy_threshold=NUTRITION_CONFIG.get("fuzzy_threshold"),
+        )
+    
+    @staticmethod
+    def create_skill_router(nutrition_tool: Optional[NutritionCalculator] = None) -> Optional["SkillRouter"]:
+        """Create a SkillRouter for the local fast path, or None if disabled"""
+        if not AGENT_CONFIG.get("skill_fast_path", True):
+            return None
+        from skills import SkillRouter  # The skills package builds on agent_core
+        return SkillRouter(calculator=nutrition_tool, min_score=AGENT_CONFIG.get("skill_min_score", 0.5))
+    
+    @staticmethod
+    def create_response_cache() -> Optional[ResponseCache]:
+        """Create the LLM response cache from RESPONSE_CACHE_CONFIG, or None if disabled"""
+        if not RESPONSE_CACHE_CONFIG.get("enabled", False):
+            return None
         
-        if self.config.provider == LLMProvider.CLAUDE:
-            headers["x-api-key"] = self.config.api_key
-            headers["anthropic-version"] = "2023-06-01"
-        else:
-            headers["Authorization"] = f"Bearer {self.config.api_key}"
-            
-        return headers
+        return build_response_cache(
+            max_entries=RESPONSE_CACHE_CONFIG.get("max_entries", 1024),
+            ttl=RESPONSE_CACHE_CONFIG.get("ttl", 86400.0),
+            path=RESPONSE_CACHE_CONFIG.get("path"),
+            disk_max_entries=RESPONSE_CACHE_CONFIG.get("disk_max_entries", 100_000),
+            force=RESPONSE_CACHE_CONFIG.get("force", False),
+        )
+    
+    @staticmethod
+    def create_semantic_cache() -> Optional[SemanticCache]:
+        """Create the semantic question cache from SEMANTIC_CACHE_CONFIG, or None if disabled"""
+        if not SEMANTIC_CACHE_CONFIG.get("enabled", False):
+            return None
+        
+        return SemanticCache(
+            threshold=SEMANTIC_CACHE_CONFIG.get("threshold", 0.92),
+            max_entries=SEMANTIC_CACHE_CONFIG.get("max_entries", 2048),
+            ttl=SEMANTIC_CACHE_CONFIG.get("ttl", 86400.0),
+        )
     
-    def _build_messages_from_history(self) -> list[dict]:
-        """Build messages array for API call from conversation history.
+    @staticmethod
+    def _create_search_cache() -> Optional[TieredCache]:
+        """Create the search result cache from SEARCH_CONFIG"""
+        if not SEARCH_CONFIG.get("cache_enabled", True):
+            return None
         
-        Only includes user and assistant messages (no tool interactions)
-        to maintain compatibility across different LLM providers.
+        return build_cache(
+            max_entries=SEARCH_CONFIG.get("cache_max_entries", 1024),
+            ttl=SEARCH_CONFIG.get("cache_ttl", 86400.0),
+            path=SEARCH_CONFIG.get("cache_path"),
+            disk_max_entries=SEARCH_CONFIG.get("cache_disk_max_entries", 100_000),
+        )
+    
+    async def __aenter__(self) -> "FoodNutritionAgent":
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.aclose()
+    
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        """Get the pooled HTTP client, creating it on first use"""
+        if self._http_client is None or self._http_client.is_closed:
+            self._http_client = create_http_client(self.config)
+            self._owns_client = True
+        return self._http_client
+    
+    async def aclose(self):
+        """Close the HTTP client if it is owned by this agent"""
+        self.context.reset()
+        if self._owns_client and self._http_client is not None:
+            await self._http_client.aclose()
+        self._http_client = None
+    
+    def _request_template(self, config: Optional[LLMConfig] = None) -> RequestTemplate:
+        """Precompiled URL, headers, system block and tools for a provider config"""
+        return get_request_template(config or self.config, self.system_prompt)
+    
+    def _build_messages_from_history(self) -> TurnMessages:
+        """Build the base messages for this turn from conversation history.
+        
+        History only holds user and assistant messages (tool interactions
+        of a turn are never saved). Only the recent window selected by
+        `self.context` is sent; older turns are represented by the rolling
+        summary. The window's JSON is kept pre-encoded and only extended
+        with the messages added since the last turn.
         """
-        messages = []
-        
-        for msg in self.conversation_history:
-            # Only include user and assistant messages (skip tool-related)
-            if msg.role in ("user", "assistant") and not msg.tool_calls:
-                messages.append({
-                    "role": msg.role,
-                    "content": msg.content,
-                })
-        
-        return messages
-    
-    def _build_tools_spec(self) -> list[dict]:
-        """Build tools specification for API call"""
-        tools = []
-        
-        for tool_info in AVAILABLE_TOOLS.values():
-            if self.config.provider == LLMProvider.CLAUDE:
-                tools.append({
-                    "name": tool_info["name"],
-                    "description": tool_info["description"],
-                    "input_schema": tool_info["parameters"],
-                })
-            else:
-                # OpenAI/Deepseek format
-                tools.append({
-                    "type": "function",
-                    "function": {
-                        "name": tool_info["name"],
-                        "description": tool_info["description"],
-                        "parameters": tool_info["parameters"],
+        history = self.conversation_history
+        start = self.context.window_start(history)
+        return TurnMessages(history[start:], self._encoded_history.window(history, start))
+    
+    def _format_messages(self, messages: list[Message], config: Optional[LLMConfig] = None) -> list[dict]:
+        """
+        Convert messages to the provider's wire format.
+        
+        Tool interactions use each provider's native protocol:
+        - OpenAI/Deepseek: assistant `tool_calls` + `tool` role messages
+        - Claude: assistant `tool_use` blocks + user `tool_result` blocks
+        """
+        config = config or self.config
+        formatted = []
+        
+        if config.provider == LLMProvider.CLAUDE:
+            for msg in messages:
+                if msg.role == "tool":
+                    block = {
+                        "type": "tool_result",
+                        "tool_use_id": msg.tool_call_id,
+                        "content": msg.content,
                     }
-                })
-        
-        return tools
-    
-    def _build_request_body(self, messages: list[dict], include_tools: bool = True) -> dict:
-        """Build request body based on provider"""
-        tools = self._build_tools_spec() if include_tools else []
-        
-        if self.config.provider == LLMProvider.CLAUDE:
-            body = {
-                "model": self.config.model,
-                "max_tokens": self.config.max_tokens,
-                "temperature": self.config.temperature,
-                "system": self.system_prompt,
-                "messages": messages,
-            }
-            if tools:
-                body["tools"] = tools
-            return body
+                    # Consecutive tool results share one user message
+                    previous = formatted[-1] if formatted else None
+                    if previous and previous["role"] == "user" and isinstance(previous["content"], list):
+                        previous["content"].append(block)
+                    else:
+                        formatted.append({"role": "user", "content": [block]})
+                elif msg.tool_calls:
+                    blocks = [{"type": "text", "text": msg.content}] if msg.content else []
+                    blocks += [
+                        {"type": "tool_use", "id": tc.id, "name": tc.name, "input": tc.arguments}
+                        for tc in msg.tool_calls
+                    ]
+                    formatted.append({"role": "assistant", "content": blocks})
+                else:
+                    formatted.append(msg.wire())
         else:
-            # OpenAI/Deepseek format
-            full_messages = [
-                {"role": "system", "content": self.system_prompt}
-            ] + messages
-            
-            body = {
-                "model": self.config.model,
-                "max_tokens": self.config.max_tokens,
-                "temperature": self.config.temperature,
-                "messages": full_messages,
-            }
-            if tools:
-                body["tools"] = tools
-                body["tool_choice"] = "auto"
-            return body
-    
-    def _get_api_url(self) -> str:
-        """Get API endpoint URL"""
-        if self.config.provider == LLMProvider.CLAUDE:
-            return f"{self.config.base_url}/messages"
+            for msg in messages:
+                if msg.role == "tool":
+                    formatted.append({
+                        "role": "tool",
+                        "tool_call_id": msg.tool_call_id,
+                        "content": msg.content,
+                    })
+                elif msg.tool_calls:
+                    formatted.append({
+                        "role": "assistant",
+                        "content": msg.content or None,
+                        "tool_calls": [
+                            {
+                                "id": tc.id,
+                                "type": "function",
+                                "function": {
+                                    "name": tc.name,
+                                    "arguments": json.dumps(tc.arguments, ensure_ascii=False),
+                                },
+                            }
+                            for tc in msg.tool_calls
+                        ],
+                    })
+                else:
+                    formatted.append(msg.wire())
+        
+        return formatted
+    
+    def _format_summary(self, summary: str) -> str:
+        """Wrap the conversation summary for the system context"""
+        return f"## Tóm tắt hội thoại trước đó\n\n{summary}"
+    
+    def _build_request_body(
+        self,
+        messages: list[Message],
+        include_tools: bool = True,
+        stream: bool = False,
+        summary: str = "",
+        force_answer: bool = False,
+        config: Optional[LLMConfig] = None,
+    ) -> dict:
+        """
+        Build request body based on provider.
+        
+        Only the messages are formatted per call (for turn messages, only
+        the tool rounds after the pre-encoded history window); the rest
+        comes from the config's precompiled request template (see
+        request_template.py).
+        With `force_answer`, tools stay declared (required when the messages
+        contain tool calls) but the model is told not to call them again.
+        """
+        template = self._request_template(config)
+        encoded = messages.encoded if type(messages) is TurnMessages else None
+        if encoded is None:
+            formatted = self._format_messages(messages, config)
+        elif len(messages) > encoded.count:
+            formatted = encoded.extended(self._format_messages(messages[encoded.count:], config))
         else:
-            return f"{self.config.base_url}/chat/completions"
+            formatted = encoded
+        return template.build(
+            formatted,
+            summary=self._format_summary(summary) if summary else None,
+            include_tools=include_tools,
+            force_answer=force_answer,
+            stream=stream,
+        )
     
-    def _parse_response(self, data: dict) -> tuple[str, list[ToolCall]]:
+    def _parse_response(self, data: dict, config: Optional[LLMConfig] = None) -> tuple[str, list[ToolCall]]:
         """Parse API response and extract content and tool calls"""
+        config = config or self.config
         tool_calls = []
         content = ""
         
-        if self.config.provider == LLMProvider.CLAUDE:
+        if config.provider == LLMProvider.CLAUDE:
             # Claude format
             for block in data.get("content", []):
                 if block["type"] == "text":
@@ -187,6 +447,13 @@ class FoodNutritionAgent:
     
     async def _execute_tool(self, tool_call: ToolCall) -> str:
         """Execute a tool and return result"""
+        with span("tool.execute", tool=tool_call.name) as tool_span:
+            result = await self._run_tool(tool_call)
+            if result.startswith("Tool error:"):
+                tool_span.record_error(result)
+            return result
+    
+    async def _run_tool(self, tool_call: ToolCall) -> str:
         try:
             if tool_call.name == "web_search":
                 query = tool_call.arguments.get("query", "")
@@ -203,51 +470,464 @@ class FoodNutritionAgent:
                 else:
                     return f"Không tìm thấy thông tin dinh dưỡng cho '{food_name}' trong cơ sở dữ liệu. Hãy sử dụng web_search để tìm kiếm thêm thông tin."
             
+            elif tool_call.name == "meal_nutrition":
+                items = [
+                    (item.get("food_name", ""), item.get("portion_grams", 100))
+                    for item in tool_call.arguments.get("items", [])
+                    if isinstance(item, dict)
+                ]
+                
+                meal = self.nutrition_tool.compute_meal(items)
+                return self.nutrition_tool.format_meal(meal)
+            
             else:
                 return f"Unknown tool: {tool_call.name}"
                 
         except Exception as e:
             return f"Tool error: {str(e)}"
     
-    async def _call_llm(self, messages: list[dict], include_tools: bool = True) -> tuple[str, list[ToolCall]]:
-        """Make API call to LLM"""
-        url = self._get_api_url()
-        headers = self._get_headers()
-        body = self._build_request_body(messages, include_tools=include_tools)
+    async def _execute_tools(self, tool_calls: list[ToolCall]) -> list[str]:
+        """
+        Execute tool calls concurrently and return results in request order.
+        
+        At most `max_tool_concurrency` tools run at once and each one is
+        bounded by `tool_timeout`. A failing or slow tool produces an error
+        string for its slot without cancelling the others.
+        """
+        semaphore = asyncio.Semaphore(self.max_tool_concurrency)
+        
+        async def run(tool_call: ToolCall) -> str:
+            async with semaphore:
+                try:
+                    return await asyncio.wait_for(self._execute_tool(tool_call), timeout=self.tool_timeout)
+                except asyncio.TimeoutError:
+                    return f"Tool error: {tool_call.name} timed out after {self.tool_timeout:g}s"
+        
+        results = await asyncio.gather(
+            *(run(tc) for tc in tool_calls),
+            return_exceptions=True,
+        )
+        
+        return [
+            f"Tool error: {str(result)}" if isinstance(result, BaseException) else result
+            for result in results
+        ]
+    
+    async def _call_llm(
+        self,
+        messages: list[Message],
+        include_tools: bool = True,
+        summary: str = "",
+        force_answer: bool = False,
+    ) -> tuple[str, list[ToolCall]]:
+        """Make API call to LLM (with failover/hedging when several providers are routed)"""
+        body = self._build_request_body(
+            messages,
+            include_tools=include_tools,
+            summary=summary,
+            force_answer=force_answer,
+        )
+        
+        with span("llm.call", provider=self.config.provider.value, model=self.config.model, stream=False) as call_span:
+            content, tool_calls = await self._call_llm_cached(
+                body, messages, include_tools, summary, force_answer, call_span,
+            )
+            self._annotate_llm_span(call_span, len(tool_calls))
+            return content, tool_calls
+    
+    async def _call_llm_cached(
+        self,
+        body: dict,
+        messages: list[Message],
+        include_tools: bool,
+        summary: str,
+        force_answer: bool,
+        call_span,
+    ) -> tuple[str, list[ToolCall]]:
+        """Answer from the response cache, or call the (routed) provider"""
+        cache_key = self._response_cache_key(body)
+        if cache_key is not None:
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                self._record_usage(None, cache_hit=True)
+                return cached.content, [ToolCall(**tc) for tc in cached.tool_calls]
         
+        async def attempt(config: LLMConfig, last: bool) -> tuple[LLMConfig, dict]:
+            request_body = body if config is self.config else self._build_request_body(
+                messages,
+                include_tools=include_tools,
+                summary=summary,
+                force_answer=force_answer,
+                config=config,
+            )
+            return config, await self._send_json(config, request_body, call_span, last=last)
+        
+        config, data = await self._route(attempt)
+        self._record_usage(data.get("usage"), provider=config.provider.value)
+        content, tool_calls = self._parse_response(data, config)
+        
+        if cache_key is not None:
+            self.response_cache.set(
+                cache_key,
+                content,
+                [{"id": tc.id, "name": tc.name, "arguments": tc.arguments} for tc in tool_calls],
+                data.get("usage"),
+            )
+        return content, tool_calls
+    
+    def _annotate_llm_span(self, call_span, tool_calls: int):
+        """Attach provider, token counts and cache hit of the latest response"""
+        if not call_span.recording:
+            return
+        usage = self.last_usage
+        call_span.set("provider", self.last_provider)
+        if self.response_cache is not None:
+            call_span.set("cache_hit", self.last_cache_hit)
+        call_span.set("prompt_tokens", usage.prompt_tokens)
+        call_span.set("completion_tokens", usage.completion_tokens)
+        call_span.set("cached_tokens", usage.cached_tokens)
+        call_span.set("cache_write_tokens", usage.cache_write_tokens)
+        call_span.set("tool_calls", tool_calls)
+    
+    async def _route(self, attempt, hedge: bool = True):
+        """Run `attempt(config, last)` on the configured provider, or through the router"""
+        if self.router is None:
+            return await attempt(self.config, True)
+        return await self.router.call(attempt, hedge=hedge)
+    
+    async def _send(
+        self,
+        config: LLMConfig,
+        body: dict,
+        stream: bool = False,
+        last: bool = True,
+    ) -> httpx.Response:
+        """
+        Send an LLM request through the rate limiter, retries and circuit breaker.
+        
+        429, 5xx and network errors are retried with jittered exponential
+        backoff (or the provider's Retry-After) until `max_retries` or the
+        `retry_max_total` time budget is used up; when another provider
+        can take over (`last=False`) only `failover_retries` are made.
+        Returns a 200 response whose body is still open and must be
+        closed by the caller.
+        """
+        provider = config.provider.value
+        template = self._request_template(config)
+        headers = template.stream_headers if stream else template.headers
+        content = template.encode(body)
+        
+        if config is self.config:
+            limiter, breaker, policy = self.rate_limiter, self.circuit_breaker, self.retry_policy
+        else:
+            limiter, breaker, policy = get_rate_limiter(config), get_circuit_breaker(config), RetryPolicy.from_config(config)
+        max_retries = policy.max_retries
+        if not last and self.router is not None:
+            max_retries = min(max_retries, self.router.failover_retries)
+        
+        deadline = time.monotonic() + policy.max_total
+        attempt = 0
+        
+        while True:
+            probe = breaker.check()
+            retry_after = None
+            try:
+                await limiter.acquire()
+                with span("llm.http", provider=provider, attempt=attempt, stream=stream) as http_span:
+                    try:
+                        request = self.http_client.build_request("POST", template.url, headers=headers, content=content)
+                        http_span.set("request_bytes", len(content))
+                        start = time.perf_counter()
+                        response = await self.http_client.send(request, stream=True)
+                    except httpx.RequestError as e:
+                        error = LLMException(f"Request failed: {str(e)}", provider=provider)
+                        http_span.record_error(str(error))
+                        breaker.record_failure()
+                    else:
+                        http_span.set("status_code", response.status_code)
+                        # Any answer below 500 means the provider is up; 429 slows
+                        # down through the rate limiter instead of the breaker
+                        if response.status_code < 500:
+                            breaker.record_success()
+                        else:
+                            breaker.record_failure()
+                        
+                        if response.status_code == 200:
+                            if self.router is not None:
+                                self.router.record_first_byte(provider, time.perf_counter() - start)
+                            limiter.on_success()
+                            return response
+                        
+                        error_text = (await response.aread()).decode("utf-8", errors="replace")
+                        await response.aclose()
+                        error = LLMException(
+                            f"API error: {response.status_code} - {error_text}",
+                            provider=provider,
+                            status_code=response.status_code,
+                        )
+                        http_span.record_error(f"HTTP {response.status_code}")
+                        if response.status_code not in RETRYABLE_STATUS:
+                            raise error
+                        
+                        retry_after = parse_retry_after(response.headers)
+                        if response.status_code == 429:
+                            limiter.throttle(retry_after)
+            finally:
+                if probe:
+                    # Outcome recorded above, unless the probe was cancelled
+                    breaker.release()
+            
+            delay = policy.backoff(attempt, retry_after)
+            if attempt >= max_retries or time.monotonic() + delay > deadline:
+                raise error
+            attempt += 1
+            await asyncio.sleep(delay)
+    
+    async def _send_json(self, config: LLMConfig, body: dict, call_span, last: bool = True) -> dict:
+        """Send a non-streaming request and decode its JSON response"""
+        response = await self._send(config, body, last=last)
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    url,
-                    headers=headers,
-                    json=body,
-                    timeout=60.0,
-                )
-                
-                if response.status_code != 200:
-                    error_text = response.text
-                    raise LLMException(
-                        f"API error: {response.status_code} - {error_text}",
-                        provider=self.config.provider.value,
-                        status_code=response.status_code,
-                    )
-                
-                data = response.json()
-                return self._parse_response(data)
-                
+            await response.aread()
+            call_span.set("response_bytes", response.num_bytes_downloaded)
+            return loads(response.content)
+        except json.JSONDecodeError:
+            raise LLMException(
+                f"Invalid JSON response: {response.text[:200]}",
+                provider=config.provider.value,
+            )
         except httpx.RequestError as e:
+            raise LLMException(f"Request failed: {str(e)}", provider=config.provider.value)
+        finally:
+            await response.aclose()
+    
+    def _record_usage(self, usage: Optional[dict], cache_hit: bool = False, provider: Optional[str] = None):
+        """Store token usage of the latest response (none for local cache hits)"""
+        self.last_cache_hit = cache_hit
+        self.last_provider = provider or self.config.provider.value
+        self.last_usage = parse_usage(self.last_provider, usage)
+        self.total_usage += self.last_usage
+    
+    def _response_cache_key(self, body: dict) -> Optional[str]:
+        """Cache key for a request body, or None if it must not be cached"""
+        if self.response_cache is None or not self.response_cache.is_cacheable(body):
+            return None
+        encoded = self._request_template().encode(ResponseCache.cache_payload(body))
+        return ResponseCache.make_key(self.config.provider.value, encoded)
+    
+    def _new_stream_parser(self, config: Optional[LLMConfig] = None) -> StreamParser:
+        """Create a stream parser for the configured provider"""
+        config = config or self.config
+        if config.provider == LLMProvider.CLAUDE:
+            return ClaudeStreamParser(config.provider.value)
+        return OpenAIStreamParser(config.provider.value)
+    
+    async def _stream_llm(
+        self,
+        messages: list[Message],
+        parser: StreamParser,
+        include_tools: bool = True,
+        summary: str = "",
+        force_answer: bool = False,
+    ) -> AsyncGenerator[str, None]:
+        """
+        Make a streaming API call to LLM.
+        
+        Yields text deltas as they arrive. Once the generator is exhausted,
+        `parser.content` holds the full text and `parser.tool_calls` the
+        reassembled tool calls.
+        """
+        body = self._build_request_body(
+            messages,
+            include_tools=include_tools,
+            stream=True,
+            summary=summary,
+            force_answer=force_answer,
+        )
+        
+        with span("llm.call", provider=self.config.provider.value, model=self.config.model, stream=True) as call_span:
+            start = time.perf_counter()
+            first_delta = True
+            async for delta in self._stream_llm_cached(
+                body, messages, parser, include_tools, summary, force_answer, call_span,
+            ):
+                if first_delta and call_span.recording:
+                    call_span.set("time_to_first_token", round(time.perf_counter() - start, 6))
+                first_delta = False
+                yield delta
+            self._annotate_llm_span(call_span, len(parser.tool_calls))
+    
+    async def _stream_llm_cached(
+        self,
+        body: dict,
+        messages: list[Message],
+        parser: StreamParser,
+        include_tools: bool,
+        summary: str,
+        force_answer: bool,
+        call_span,
+    ) -> AsyncGenerator[str, None]:
+        """Replay a cached response, or stream from the (routed) provider"""
+        cache_key = self._response_cache_key(body)
+        if cache_key is not None:
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                parser.replay(cached.content, cached.tool_calls)
+                self._record_usage(None, cache_hit=True)
+                if cached.content:
+                    yield cached.content
+                return
+        
+        async def attempt(config: LLMConfig, last: bool) -> tuple[LLMConfig, httpx.Response]:
+            request_body = body if config is self.config else self._build_request_body(
+                messages,
+                include_tools=include_tools,
+                stream=True,
+                summary=summary,
+                force_answer=force_answer,
+                config=config,
+            )
+            return config, await self._send(config, request_body, stream=True, last=last)
+        
+        # Fail over only until the first byte; a started stream is not hedged
+        config, response = await self._route(attempt, hedge=False)
+        stream_parser = parser if parser.provider == config.provider.value else self._new_stream_parser(config)
+        
+        try:
+            async for event, data in iter_sse_events(response.aiter_lines()):
+                if stream_parser.done:
+                    # Read to the end of the body so the connection returns to the pool
+                    continue
+                delta = stream_parser.feed(event, data)
+                if delta:
+                    yield delta
+            
+            if stream_parser is not parser:
+                parser.replay(stream_parser.content, stream_parser.tool_calls, stream_parser.usage)
+            call_span.set("response_bytes", response.num_bytes_downloaded)
+            self._record_usage(parser.usage, provider=config.provider.value)
+            
+            if cache_key is not None and stream_parser.done:
+                self.response_cache.set(cache_key, parser.content, parser.tool_calls, parser.usage)
+                    
+        except httpx.RequestError as e:
+            # Failures after data started flowing are not retried
             raise LLMException(
                 f"Request failed: {str(e)}",
-                provider=self.config.provider.value,
+                provider=config.provider.value,
             )
+        finally:
+            await response.aclose()
+    
+    def _append_tool_round(
+        self,
+        working_messages: list[Message],
+        content: str,
+        tool_calls: list[ToolCall],
+        results: list[str],
+    ):
+        """Record one tool round (assistant tool calls + their results) in the turn state"""
+        working_messages.append(Message(
+            role="assistant",
+            content=content,
+            tool_calls=tool_calls,
+        ))
+        for tc, result in zip(tool_calls, results):
+            working_messages.append(Message(
+                role="tool",
+                content=result,
+                tool_call_id=tc.id,
+            ))
+    
+    def _semantic_lookup(self, user_message: str) -> Optional[str]:
+        """
+        Answer a first question from the semantic cache.
+        
+        Only questions without prior conversation are looked up, since
+        follow-ups depend on context. A hit is saved to history like a
+        normal turn.
+        """
+        self._semantic_hit = None
+        if self.semantic_cache is None or self.conversation_history or self.context.summary:
+            return None
+        
+        match = self.semantic_cache.get(user_message)
+        self._semantic_hit = match is not None
+        if match is None:
+            return None
+        
+        self.conversation_history.append(Message(role="user", content=user_message))
+        self.conversation_history.append(Message(role="assistant", content=match.answer))
+        self.last_cache_hit = True
+        self.last_usage = TokenUsage()
+        self.turn_usage = TokenUsage()
+        self.last_tool_iterations = 0
+        return match.answer
+    
+    async def _skill_lookup(self, user_message: str, use_tools: bool) -> Optional[str]:
+        """
+        Answer a simple, deterministic question with a local skill.
+        
+        Skills stand in for tool calls, so they are skipped when tools are
+        off. The exchange is added to the history like an LLM answer.
+        """
+        self.last_skill = None
+        if self.skill_router is None or not use_tools:
+            return None
+        
+        answer = await self.skill_router.answer(user_message)
+        if answer is None:
+            return None
+        
+        self.conversation_history.append(Message(role="user", content=user_message))
+        self.conversation_history.append(Message(role="assistant", content=answer.text))
+        self.last_skill = answer.skill
+        self._semantic_hit = None
+        self.last_cache_hit = False
+        self.last_usage = TokenUsage()
+        self.turn_usage = TokenUsage()
+        self.last_tool_iterations = 0
+        return answer.text
+    
+    def _semantic_store(self, history_checkpoint: int, user_message: str, content: str):
+        """Cache the answer of a first question"""
+        if self.semantic_cache is not None and history_checkpoint == 0 and content:
+            self.semantic_cache.set(user_message, content)
     
     async def chat(self, user_message: str, use_tools: bool = True) -> str:
         """
         Process a user message and return the agent's response.
         
-        Tool interactions are handled within a single turn and NOT saved to history
-        to avoid API compatibility issues with some providers.
+        Tool interactions are handled within a single turn and NOT saved to history;
+        only the final answer is kept.
         """
+        with span("agent.turn", stream=False) as turn_span:
+            content = await self._chat(user_message, use_tools)
+            self._annotate_turn_span(turn_span)
+            self.save_history()
+            return content
+    
+    def _annotate_turn_span(self, turn_span):
+        """Attach tool iterations, turn token usage, semantic cache hit and local skill"""
+        if not turn_span.recording:
+            return
+        turn_span.set("tool_iterations", self.last_tool_iterations)
+        turn_span.set("prompt_tokens", self.turn_usage.prompt_tokens)
+        turn_span.set("completion_tokens", self.turn_usage.completion_tokens)
+        turn_span.set("cached_tokens", self.turn_usage.cached_tokens)
+        if self._semantic_hit is not None:
+            turn_span.set("semantic_cache_hit", self._semantic_hit)
+        if self.last_skill is not None:
+            turn_span.set("skill", self.last_skill)
+    
+    async def _chat(self, user_message: str, use_tools: bool = True) -> str:
+        local = await self._skill_lookup(user_message, use_tools)
+        if local is not None:
+            return local
+        
+        cached = self._semantic_lookup(user_message)
+        if cached is not None:
+            return cached
+        
         # Save history length to rollback on error
         history_checkpoint = len(self.conversation_history)
         
@@ -259,48 +939,46 @@ class FoodNutritionAgent:
             ))
             
             # Build base messages from history (user/assistant only)
-            base_messages = self._build_messages_from_history()
-            
-            # Working messages for this turn (may include tool interactions)
-            working_messages = list(base_messages)
+            working_messages = self._build_messages_from_history()
+            summary = self.context.summary
             
             # Call LLM (with or without tools)
-            content, tool_calls = await self._call_llm(working_messages, include_tools=use_tools)
+            content, tool_calls = await self._call_llm(working_messages, include_tools=use_tools, summary=summary)
+            turn_usage = self.last_usage
             
-            # Process tool calls if any (within this turn only)
+            # Process tool calls using the provider's native tool protocol.
+            # Tool results are appended once to the turn state, so the model
+            # can chain tools without outputs being resent cumulatively.
             max_iterations = 5
             iteration = 0
-            tool_context = []  # Collect tool results as context
             
             while tool_calls and iteration < max_iterations:
                 iteration += 1
                 
-                # Execute tools and collect results
-                for tc in tool_calls:
-                    result = await self._execute_tool(tc)
-                    tool_context.append(f"[Tool: {tc.name}]\n{result}")
+                # Execute tools concurrently and collect results in order
+                results = await self._execute_tools(tool_calls)
+                self._append_tool_round(working_messages, content, tool_calls, results)
                 
-                # Build context message with tool results
-                context_msg = "\n\n".join(tool_context)
-                
-                # Create new messages with tool context injected
-                enhanced_messages = list(base_messages)
-                # Inject tool results as system context in the last user message
-                if enhanced_messages and enhanced_messages[-1]["role"] == "user":
-                    original_content = enhanced_messages[-1]["content"]
-                    enhanced_messages[-1] = {
-                        "role": "user",
-                        "content": f"{original_content}\n\n---\n📊 Thông tin tra cứu được:\n{context_msg}"
-                    }
-                
-                # Call LLM again without tools (to get final response)
-                content, tool_calls = await self._call_llm(enhanced_messages, include_tools=False)
+                # Let the model call more tools, except on the last iteration
+                content, tool_calls = await self._call_llm(
+                    working_messages,
+                    summary=summary,
+                    force_answer=iteration >= max_iterations,
+                )
+                turn_usage += self.last_usage
             
+            self.turn_usage = turn_usage
+            self.last_tool_iterations = iteration
+
             # Add final assistant response to history
             self.conversation_history.append(Message(
                 role="assistant",
                 content=content,
             ))
+            self._semantic_store(history_checkpoint, user_message, content)
+            
+            # Fold turns that left the context window into the summary (off the hot path)
+            self.context.schedule_summary(self.conversation_history, self._summarize)
             
             return content
             
@@ -310,7 +988,7 @@ class FoodNutritionAgent:
             
             # If tools caused error, retry without tools
             if use_tools and "tool" in str(e).lower():
-                return await self.chat(user_message, use_tools=False)
+                return await self._chat(user_message, use_tools=False)
             raise
             
         except Exception as e:
@@ -318,14 +996,202 @@ class FoodNutritionAgent:
             self.conversation_history = self.conversation_history[:history_checkpoint]
             raise
     
+    async def chat_stream(self, user_message: str, use_tools: bool = True) -> AsyncGenerator[str, None]:
+        """
+        Process a user message and stream the agent's response.
+        
+        Yields text deltas as soon as the provider sends them. Tool calls are
+        handled the same way as in `chat()`; the final answer is saved to
+        history once the stream completes.
+        """
+        with span("agent.turn", stream=True) as turn_span:
+            async for delta in self._chat_stream(user_message, use_tools):
+                yield delta
+            self._annotate_turn_span(turn_span)
+            self.save_history()
+    
+    async def _chat_stream(self, user_message: str, use_tools: bool = True) -> AsyncGenerator[str, None]:
+        local = await self._skill_lookup(user_message, use_tools)
+        if local is not None:
+            yield local
+            return
+        
+        cached = self._semantic_lookup(user_message)
+        if cached is not None:
+            yield cached
+            return
+        
+        history_checkpoint = len(self.conversation_history)
+        completed = False
+        streamed_any = False
+        
+        try:
+            self.conversation_history.append(Message(
+                role="user",
+                content=user_message,
+            ))
+            
+            working_messages = self._build_messages_from_history()
+            summary = self.context.summary
+            
+            parser = self._new_stream_parser()
+            async for delta in self._stream_llm(working_messages, parser, include_tools=use_tools, summary=summary):
+                streamed_any = True
+                yield delta
+            content, tool_calls = parser.content, [ToolCall(**tc) for tc in parser.tool_calls]
+            turn_usage = self.last_usage
+            
+            max_iterations = 5
+            iteration = 0
+            
+            while tool_calls and iteration < max_iterations:
+                iteration += 1
+                
+                results = await self._execute_tools(tool_calls)
+                self._append_tool_round(working_messages, content, tool_calls, results)
+                
+                if content:
+                    # Separate any preamble text from the next answer
+                    yield "\n\n"
+                
+                parser = self._new_stream_parser()
+                async for delta in self._stream_llm(
+                    working_messages,
+                    parser,
+                    summary=summary,
+                    force_answer=iteration >= max_iterations,
+                ):
+                    streamed_any = True
+                    yield delta
+                content, tool_calls = parser.content, [ToolCall(**tc) for tc in parser.tool_calls]
+                turn_usage += self.last_usage
+            
+            self.turn_usage = turn_usage
+            self.last_tool_iterations = iteration
+            self.conversation_history.append(Message(
+                role="assistant",
+                content=content,
+            ))
+            self._semantic_store(history_checkpoint, user_message, content)
+            completed = True
+            
+            self.context.schedule_summary(self.conversation_history, self._summarize)
+            
+        except LLMException as e:
+            self.conversation_history = self.conversation_history[:history_checkpoint]
+            
+            # If tools caused error before anything was streamed, retry without tools
+            if use_tools and not streamed_any and "tool" in str(e).lower():
+                async for delta in self._chat_stream(user_message, use_tools=False):
+                    yield delta
+                completed = True
+                return
+            raise
+            
+        finally:
+            # Roll back if the stream failed or the consumer stopped early
+            if not completed:
+                self.conversation_history = self.conversation_history[:history_checkpoint]
+    
+    async def _summarize(self, previous_summary: str, messages: list[Message]) -> str:
+        """Fold older messages into the running conversation summary"""
+        transcript = "\n".join(
+            f"{'Người dùng' if msg.role == 'user' else 'Trợ lý'}: {msg.content}"
+            for msg in messages
+            if msg.role in ("user", "assistant")
+        )
+        
+        prompt = (
+            "Hãy cập nhật bản tóm tắt hội thoại dưới đây. Giữ lại các món ăn, khẩu phần, "
+            "số liệu dinh dưỡng, mục tiêu và sở thích của người dùng. Viết ngắn gọn, "
+            f"tối đa khoảng {self.summary_max_tokens} tokens, chỉ trả về bản tóm tắt.\n\n"
+            f"### Tóm tắt hiện tại\n{previous_summary or '(chưa có)'}\n\n"
+            f"### Đoạn hội thoại mới\n{transcript}"
+        )
+        
+        # Runs in the background, possibly during a turn: sent directly so it
+        # neither touches the turn's usage numbers nor the response cache
+        config = self.config
+        body = self._build_request_body([Message(role="user", content=prompt)], include_tools=False)
+        with span("llm.summary", provider=config.provider.value, model=config.model) as summary_span:
+            data = await self._send_json(config, body, summary_span)
+        
+        self.summary_usage += parse_usage(config.provider.value, data.get("usage"))
+        content, _ = self._parse_response(data, config)
+        return content
+    
     def clear_history(self):
-        """Clear conversation history"""
+        """Clear conversation history (and its session log)"""
         self.conversation_history = []
+        self.context.reset()
+        self._encoded_history.reset()
+        if self.session_log is not None:
+            self.session_log.delete(self.session_id)
+        self._logged_count = 0
+        self._logged_at = None
     
     def get_history(self) -> list[dict]:
-        """Get conversation history as list of dicts"""
+        """
+        Get conversation history as list of dicts.
+        
+        The dicts are the messages' cached wire format, shared with the
+        request encoder; copy them before modifying.
+        """
         return [
-            {"role": msg.role, "content": msg.content}
+            msg.wire()
             for msg in self.conversation_history
             if msg.role in ("user", "assistant")
         ]
+    
+    def attach_session_log(self, log: "SessionLog", session_id: str) -> bool:
+        """
+        Log completed turns to `log` under `session_id`.
+        
+        A session already in the log is resumed: its history and summary
+        replace the current ones. Returns whether it was resumed.
+        """
+        self.session_log = log
+        self.session_id = session_id
+        record = log.load(session_id)
+        if record is None:
+            self._logged_count = 0
+            self._logged_at = None
+            return False
+        
+        self.context.reset()
+        self._encoded_history.reset()
+        self.conversation_history = [Message(role=role, content=content) for role, content in record.messages]
+        self.context.summary = record.summary
+        self.context.summarized_count = min(record.summarized_count, len(self.conversation_history))
+        self._logged_count = len(self.conversation_history)
+        self._logged_at = record.updated_at
+        return True
+    
+    def sync_session_log(self) -> bool:
+        """
+        Reload the history if another process has changed this session's
+        log since this agent last read or wrote it (multi-worker servers).
+        Returns whether it was reloaded.
+        """
+        if self.session_log is None or self.session_log.updated_at(self.session_id) == self._logged_at:
+            return False
+        self.conversation_history = []
+        self.context.reset()
+        self._encoded_history.reset()
+        self.attach_session_log(self.session_log, self.session_id)
+        return True
+    
+    def save_history(self):
+        """Append messages added since the last save (and the summary) to the session log"""
+        if self.session_log is None:
+            return
+        
+        new = self.conversation_history[self._logged_count:]
+        self._logged_at = self.session_log.append(
+            self.session_id,
+            self._logged_count,
+            new,
+            summary=self.context.summary,
+            summarized_count=self.context.summarized_count,
+        )
+        self._logged_count += len(new)
@@ -0,0 +1,331 @@
+"""
+Offline batch analysis of dish lists.
+
+Reads dishes from CSV or JSONL, resolves what it can from the local
+nutrition database and sends the rest through FoodNutritionAgent with a
+bounded pool of workers. Results are appended to a JSONL file as they
+complete; that file doubles as the checkpoint, so a rerun skips every
+dish already written successfully.
+
+Usage:
+    pipeline = BatchPipeline(config, workers=8)
+    stats = await pipeline.run("menu.csv", "results.jsonl")
+"""
+
+import asyncio
+import csv
+import json
+import os
+import re
+import time
+from dataclasses import dataclass, asdict, field
+from typing import Callable, Iterator, Optional
+
+from config import LLMConfig, NUTRITION_CONFIG
+from .agent import FoodNutritionAgent, create_http_client
+from .exceptions import AgentException
+from .router import ProviderRouter
+from .usage import TokenUsage
+
+# Accepted column / key names in input files
+DISH_FIELDS = ("dish", "name", "food", "món", "mon")
+PORTION_FIELDS = ("portion_grams", "portion", "grams")
+
+BATCH_PROMPT = "Phân tích dinh dưỡng của món: {dish} (khẩu phần {portion})"
+
+# "200", "200g", "1,5 kg", "150 gram"; other units ("1 bát") go to the LLM as written
+_GRAMS_RE = re.compile(r"^\s*(\d+(?:[.,]\d+)?)\s*(kg|g|gr|gram|grams|gam)?\s*$", re.IGNORECASE)
+
+
+@dataclass
+class BatchItem:
+    """A dish to analyze"""
+    id: str
+    dish: str
+    portion_grams: Optional[float] = 100.0  # None when given in other units
+    portion: Optional[str] = None  # Portion as written, when not in grams ("1 bát")
+    
+    @property
+    def portion_label(self) -> str:
+        return self.portion if self.portion_grams is None else f"{self.portion_grams:g}g"
+
+
+@dataclass
+class BatchResult:
+    """Result for one dish, written as a JSONL record"""
+    id: str
+    dish: str
+    portion_grams: Optional[float]
+    status: str  # "ok" or "error"
+    source: str  # "database", "skill" (local skill of the agent) or "llm"
+    matched_name: Optional[str] = None
+    nutrition: Optional[dict] = None
+    response: Optional[str] = None
+    usage: Optional[dict] = None
+    error: Optional[str] = None
+    elapsed_ms: float = 0.0
+    portion: Optional[str] = None  # Portion as written, when not in grams
+
+
+@dataclass
+class BatchStats:
+    """Summary of a batch run"""
+    total: int = 0
+    skipped: int = 0  # Already done in a previous run
+    from_database: int = 0
+    from_skill: int = 0
+    from_llm: int = 0
+    errors: int = 0
+    usage: TokenUsage = field(default_factory=TokenUsage)
+    elapsed: float = 0.0
+
+
+def _pick(record: dict, names: tuple[str, ...]):
+    for name in names:
+        value = record.get(name)
+        if value not in (None, ""):
+            return value
+    return None
+
+
+def parse_portion(value) -> Optional[float]:
+    """Grams from a portion value (200, "200g", "0,5 kg"), or None if not in grams"""
+    if value is None:
+        return 100.0
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value) if value > 0 else None
+    
+    match = _GRAMS_RE.match(str(value))
+    if match is None:
+        return None
+    grams = float(match.group(1).replace(",", "."))
+    if (match.group(2) or "").lower() == "kg":
+        grams *= 1000
+    return grams if grams > 0 else None
+
+
+def _to_item(record: dict, index: int) -> Optional[BatchItem]:
+    record = {str(k).strip().lower(): v for k, v in record.items() if k is not None}
+    dish = _pick(record, DISH_FIELDS)
+    if not dish or not str(dish).strip():
+        return None
+    
+    portion = _pick(record, PORTION_FIELDS)
+    grams = parse_portion(portion)
+    return BatchItem(
+        id=str(record.get("id") or index),
+        dish=str(dish).strip(),
+        portion_grams=grams,
+        portion=None if grams is not None else str(portion).strip(),
+    )
+
+
+def read_dishes(path: str) -> Iterator[BatchItem]:
+    """
+    Read dishes from a CSV or JSONL file.
+    
+    CSV needs a header with a dish column (`dish`/`name`/`food`/`món`);
+    JSONL lines are objects with the same keys. `portion_grams` and `id`
+    are optional; rows without an id are numbered from 1. Portions are
+    grams ("200", "200g", "0,5kg"); others ("1 bát") are kept as written.
+    """
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        if path.lower().endswith((".jsonl", ".ndjson", ".json")):
+            records = (json.loads(line) for line in f if line.strip())
+        else:
+            records = csv.DictReader(f)
+        
+        for index, record in enumerate(records, start=1):
+            item = _to_item(record, index)
+            if item is not None:
+                yield item
+
+
+def load_checkpoint(output_path: str) -> set[str]:
+    """Ids of dishes already written successfully to the output file"""
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Partial line from an interrupted run
+            if record.get("status") == "ok":
+                done.add(str(record.get("id")))
+    return done
+
+
+class BatchPipeline:
+    """
+    Concurrent batch runner over FoodNutritionAgent.
+    
+    All workers share one pooled HTTP client, one set of tools and one
+    skill router and semantic cache; each dish gets a fresh agent so
+    histories never mix. Request rate per
+    provider is bounded by `LLMConfig.rate_limit_rps`.
+    """
+    
+    def __init__(
+        self,
+        config: LLMConfig,
+        workers: int = 8,
+        min_local_score: Optional[float] = None,
+        on_result: Optional[Callable[[BatchResult], None]] = None,
+    ):
+        self.config = config
+        self.workers = max(1, workers)
+        self.min_local_score = (
+            min_local_score if min_local_score is not None
+            else NUTRITION_CONFIG.get("fuzzy_threshold", 0.75)
+        )
+        self.on_result = on_result
+        self.nutrition_tool = FoodNutritionAgent.create_nutrition_tool()
+        self.response_cache = FoodNutritionAgent.create_response_cache()
+        self.semantic_cache = FoodNutritionAgent.create_semantic_cache()
+        self.skill_router = FoodNutritionAgent.create_skill_router(self.nutrition_tool)
+        self.router = ProviderRouter.from_config(config)
+        self.search_tool = None
+        self.http_client = None
+    
+    def resolve_locally(self, item: BatchItem) -> Optional[BatchResult]:
+        """Answer from the nutrition database if the dish matches confidently"""
+        if item.portion_grams is None:
+            return None  # The database is per 100g; other units need the LLM
+        matches = self.nutrition_tool.search(item.dish, limit=1)
+        if not matches or matches[0].score < self.min_local_score:
+            return None
+        
+        match = matches[0]
+        multiplier = item.portion_grams / 100
+        return BatchResult(
+            id=item.id,
+            dish=item.dish,
+            portion_grams=item.portion_grams,
+            status="ok",
+            source="database",
+            matched_name=match.name,
+            nutrition={key: round(value * multiplier, 2) for key, value in match.data.items()},
+        )
+    
+    async def analyze(self, item: BatchItem) -> BatchResult:
+        """
+        Analyze one dish, using the LLM only when the database has no match.
+        
+        Never raises: any failure becomes a result with status "error", so
+        one bad dish cannot stop the workers.
+        """
+        start = time.perf_counter()
+        try:
+            result = self.resolve_locally(item) or await self._ask_llm(item)
+        except Exception as e:
+            message = str(e) if isinstance(e, AgentException) else f"{type(e).__name__}: {e}"
+            result = BatchResult(
+                id=item.id,
+                dish=item.dish,
+                portion_grams=item.portion_grams,
+                portion=item.portion,
+                status="error",
+                source="llm",
+                error=message,
+            )
+        
+        result.elapsed_ms = round((time.perf_counter() - start) * 1000, 2)
+        return result
+    
+    async def _ask_llm(self, item: BatchItem) -> BatchResult:
+        agent = FoodNutritionAgent(
+            self.config,
+            http_client=self.http_client,
+            search_tool=self.search_tool,
+            nutrition_tool=self.nutrition_tool,
+            response_cache=self.response_cache,
+            semantic_cache=self.semantic_cache,
+            skill_router=self.skill_router,
+            router=self.router,
+        )
+        try:
+            response = await agent.chat(BATCH_PROMPT.format(dish=item.dish, portion=item.portion_label))
+        finally:
+            await agent.aclose()
+        return BatchResult(
+            id=item.id,
+            dish=item.dish,
+            portion_grams=item.portion_grams,
+            portion=item.portion,
+            status="ok",
+            source="skill" if agent.last_skill is not None else "llm",
+            response=response,
+            usage=asdict(agent.turn_usage),
+        )
+    
+    async def run(self, input_path: str, output_path: str, resume: bool = True) -> BatchStats:
+        """
+        Process every dish in `input_path`, appending results to `output_path`.
+        
+        With `resume`, dishes already written with status "ok" are skipped
+        and failed ones are retried; otherwise the output is overwritten.
+        """
+        stats = BatchStats()
+        start = time.perf_counter()
+        done = load_checkpoint(output_path) if resume else set()
+        
+        # Terminate a partial last line left by an interrupted run
+        needs_newline = False
+        if resume and os.path.exists(output_path) and os.path.getsize(output_path):
+            with open(output_path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                needs_newline = f.read(1) != b"\n"
+        
+        queue: asyncio.Queue[Optional[BatchItem]] = asyncio.Queue(maxsize=self.workers * 2)
+        
+        self.http_client = create_http_client(self.config)
+        self.search_tool = FoodNutritionAgent.create_search_tool()
+        
+        with open(output_path, "a" if resume else "w", encoding="utf-8") as out:
+            if needs_newline:
+                out.write("\n")
+            
+            async def worker():
+                while True:
+                    item = await queue.get()
+                    if item is None:
+                        return
+                    result = await self.analyze(item)
+                    out.write(json.dumps(asdict(result), ensure_ascii=False) + "\n")
+                    out.flush()
+                    
+                    if result.status != "ok":
+                        stats.errors += 1
+                    elif result.source == "database":
+                        stats.from_database += 1
+                    elif result.source == "skill":
+                        stats.from_skill += 1
+                    else:
+                        stats.from_llm += 1
+                    if result.usage:
+                        stats.usage += TokenUsage(**result.usage)
+                    if self.on_result is not None:
+                        self.on_result(result)
+            
+            tasks = [asyncio.create_task(worker()) for _ in range(self.workers)]
+            try:
+                for item in read_dishes(input_path):
+                    stats.total += 1
+                    if item.id in done:
+                        stats.skipped += 1
+                        continue
+                    await queue.put(item)
+                for _ in tasks:
+                    await queue.put(None)
+                await asyncio.gather(*tasks)
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                await self.http_client.aclose()
+        
+        stats.elapsed = time.perf_counter() - start
+        return stats
@@ -0,0 +1,144 @@
+"""
+Precompiled prompt bundle for fast startup.
+
+`python build_bundle.py` serializes the system prompt, the templates
+and the tool specs of every provider wire format into one JSON file
+(PROMPT_BUNDLE_PATH, default knowledge_base/bundle.json). At runtime the
+bundle is read once per process, and all agents share the same prompt
+string and tool spec lists instead of re-reading files and rebuilding
+specs on every init.
+
+A bundle older than its source files is ignored, so an edited prompt is
+never served stale. Without a bundle the sources are read once and
+cached the same way.
+"""
+
+import json
+import os
+from functools import lru_cache
+
+from config import BASE_DIR, LLMProvider, PROMPTS_DIR, TEMPLATES_DIR, PROMPT_BUNDLE_PATH
+from .tools import AVAILABLE_TOOLS
+
+BUNDLE_VERSION = 1
+
+# Tool spec wire formats: Claude, and OpenAI-compatible (OpenAI, Deepseek)
+TOOL_FORMATS = ("openai", "claude")
+
+
+def tool_format(provider: LLMProvider) -> str:
+    return "claude" if provider == LLMProvider.CLAUDE else "openai"
+
+
+def build_tools_spec(fmt: str) -> list[dict]:
+    """Tool definitions in a provider wire format"""
+    tools = []
+    for tool_info in AVAILABLE_TOOLS.values():
+        if fmt == "claude":
+            tools.append({
+                "name": tool_info["name"],
+                "description": tool_info["description"],
+                "input_schema": tool_info["parameters"],
+            })
+        else:
+            tools.append({
+                "type": "function",
+                "function": {
+                    "name": tool_info["name"],
+                    "description": tool_info["description"],
+                    "parameters": tool_info["parameters"],
+                }
+            })
+    return tools
+
+
+def source_files() -> list[str]:
+    """Files the bundle is compiled from, relative to BASE_DIR"""
+    paths = [os.path.join(PROMPTS_DIR, "SYSTEM_PROMPT.md"), os.path.join(os.path.dirname(__file__), "tools.py")]
+    if os.path.isdir(TEMPLATES_DIR):
+        paths += sorted(
+            os.path.join(TEMPLATES_DIR, name)
+            for name in os.listdir(TEMPLATES_DIR)
+            if name.endswith(".md")
+        )
+    return [os.path.relpath(path, BASE_DIR) for path in paths]
+
+
+def compile_bundle() -> dict:
+    """Read prompt sources and build all tool specs"""
+    sources = {}
+    for path in source_files():
+        try:
+            stat = os.stat(os.path.join(BASE_DIR, path))
+        except OSError:
+            continue
+        sources[path] = [stat.st_mtime_ns, stat.st_size]
+    
+    with open(os.path.join(PROMPTS_DIR, "SYSTEM_PROMPT.md"), "r", encoding="utf-8") as f:
+        system_prompt = f.read()
+    
+    templates = {}
+    for path in sources:
+        if os.path.dirname(os.path.join(BASE_DIR, path)) == os.path.normpath(TEMPLATES_DIR):
+            with open(os.path.join(BASE_DIR, path), "r", encoding="utf-8") as f:
+                templates[os.path.splitext(os.path.basename(path))[0]] = f.read()
+    
+    return {
+        "version": BUNDLE_VERSION,
+        "sources": sources,
+        "system_prompt": system_prompt,
+        "templates": templates,
+        "tools": {fmt: build_tools_spec(fmt) for fmt in TOOL_FORMATS},
+    }
+
+
+def write_bundle(path: str = PROMPT_BUNDLE_PATH) -> dict:
+    """Compile the bundle and write it to `path`"""
+    bundle = compile_bundle()
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(bundle, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, path)
+    return bundle
+
+
+def is_fresh(bundle: dict) -> bool:
+    """Whether no source file changed since the bundle was built"""
+    for path, (mtime_ns, size) in bundle.get("sources", {}).items():
+        try:
+            stat = os.stat(os.path.join(BASE_DIR, path))
+        except OSError:
+            # Sources not shipped (e.g. PyInstaller exe): trust the bundle
+            continue
+        if stat.st_mtime_ns != mtime_ns or stat.st_size != size:
+            return False
+    return True
+
+
+@lru_cache(maxsize=1)
+def load_bundle() -> dict:
+    """The prompt bundle, loaded once per process (compiled from sources if missing or stale)"""
+    if PROMPT_BUNDLE_PATH:
+        try:
+            with open(PROMPT_BUNDLE_PATH, "r", encoding="utf-8") as f:
+                bundle = json.load(f)
+            if bundle.get("version") == BUNDLE_VERSION and is_fresh(bundle):
+                return bundle
+        except (OSError, ValueError):
+            pass
+    return compile_bundle()
+
+
+def system_prompt() -> str:
+    return load_bundle()["system_prompt"]
+
+
+def template(name: str) -> str:
+    return load_bundle()["templates"][name]
+
+
+def tools_spec(provider: LLMProvider) -> list[dict]:
+    """Shared tool spec list for a provider; copy before modifying"""
+    return load_bundle()["tools"][tool_format(provider)]
+
@@ -0,0 +1,250 @@
+"""
+Caching primitives shared by agent tools.
+
+- MemoryCache: in-process LRU with TTL expiry
+- SQLiteCache: optional on-disk tier with TTL and size-bounded eviction
+- TieredCache: memory in front of disk, with hit/miss counters
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from typing import Any, Optional
+
+
+@dataclass
+class CacheStats:
+    """Hit/miss counters for a cache"""
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    
+    @property
+    def lookups(self) -> int:
+        return self.hits + self.misses
+    
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.lookups if self.lookups else 0.0
+    
+    def as_dict(self) -> dict:
+        data = asdict(self)
+        data["hit_rate"] = round(self.hit_rate, 4)
+        return data
+
+
+class MemoryCache:
+    """
+    In-memory LRU cache with per-entry TTL.
+    
+    Values are stored as-is. Expired entries are dropped lazily on access
+    and the least recently used entry is evicted once `max_entries` is hit.
+    """
+    
+    def __init__(self, max_entries: int = 1024, ttl: Optional[float] = 3600.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._data: OrderedDict[str, tuple[Optional[float], Any]] = OrderedDict()
+    
+    def __len__(self) -> int:
+        return len(self._data)
+    
+    def get(self, key: str) -> Any:
+        """Get a value, or None if missing or expired"""
+        entry = self._data.get(key)
+        if entry is None:
+            self.stats.misses += 1
+            return None
+        
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= time.time():
+            del self._data[key]
+            self.stats.expirations += 1
+            self.stats.misses += 1
+            return None
+        
+        self._data.move_to_end(key)
+        self.stats.hits += 1
+        return value
+    
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """Store a value, evicting the least recently used entries if full"""
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.time() + ttl if ttl else None
+        
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+            self.stats.evictions += 1
+    
+    def delete(self, key: str):
+        self._data.pop(key, None)
+    
+    def clear(self):
+        self._data.clear()
+
+
+class SQLiteCache:
+    """
+    On-disk cache backed by SQLite.
+    
+    Values must be JSON-serializable. Entries expire after `ttl` seconds and
+    the least recently used rows are evicted once `max_entries` is exceeded.
+    The database uses WAL mode so several processes can share one file.
+    """
+    
+    def __init__(self, path: str, max_entries: int = 100_000, ttl: Optional[float] = 86400.0):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        
+        self._conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " expires_at REAL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed_at)")
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+    
+    def get(self, key: str) -> Any:
+        """Get a value, or None if missing or expired"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            
+            if row is None:
+                self.stats.misses += 1
+                return None
+            
+            value, expires_at = row
+            if expires_at is not None and expires_at <= now:
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                self.stats.expirations += 1
+                self.stats.misses += 1
+                return None
+            
+            self._conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+        
+        self.stats.hits += 1
+        return json.loads(value)
+    
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """Store a value, evicting expired and least recently used rows if full"""
+        now = time.time()
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = now + ttl if ttl else None
+        encoded = json.dumps(value, ensure_ascii=False)
+        
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, encoded, expires_at, now),
+            )
+            self._evict(now)
+    
+    def _evict(self, now: float):
+        count = self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+        if count <= self.max_entries:
+            return
+        
+        removed = self._conn.execute(
+            "DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,)
+        ).rowcount
+        self.stats.expirations += removed
+        
+        overflow = count - removed - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM cache WHERE key IN ("
+                " SELECT key FROM cache ORDER BY accessed_at LIMIT ?)",
+                (overflow,),
+            )
+            self.stats.evictions += overflow
+    
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+    
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+    
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class TieredCache:
+    """
+    Memory LRU in front of an optional on-disk tier.
+    
+    Disk hits are promoted into memory. `stats` counts lookups across both
+    tiers: a hit in either tier is a hit.
+    """
+    
+    def __init__(self, memory: MemoryCache, disk: Optional[SQLiteCache] = None):
+        self.memory = memory
+        self.disk = disk
+        self.stats = CacheStats()
+    
+    def get(self, key: str) -> Any:
+        value = self.memory.get(key)
+        if value is None and self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                self.memory.set(key, value)
+        
+        if value is None:
+            self.stats.misses += 1
+        else:
+            self.stats.hits += 1
+        return value
+    
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        self.memory.set(key, value, ttl=ttl)
+        if self.disk is not None:
+            self.disk.set(key, value, ttl=ttl)
+    
+    def delete(self, key: str):
+        self.memory.delete(key)
+        if self.disk is not None:
+            self.disk.delete(key)
+    
+    def clear(self):
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+
+def build_cache(
+    max_entries: int = 1024,
+    ttl: Optional[float] = 3600.0,
+    path: Optional[str] = None,
+    disk_max_entries: int = 100_000,
+) -> TieredCache:
+    """Create a memory cache, backed by SQLite when `path` is given"""
+    disk = SQLiteCache(path, max_entries=disk_max_entries, ttl=ttl) if path else None
+    return TieredCache(MemoryCache(max_entries=max_entries, ttl=ttl), disk)
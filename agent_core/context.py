@@ -0,0 +1,121 @@
+"""
+Bounded conversation context with token budgeting and rolling summaries.
+
+Only the most recent turns that fit the token budget are sent to the LLM.
+Older turns are folded into a compact summary by a background task, so the
+request size stays flat however long the session runs.
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Optional, Sequence
+
+
+# Fixed per-message overhead (role, separators) in tokens
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Approximate token count of a text.
+    
+    Uses ~4 UTF-8 bytes per token, which tracks BPE tokenizers reasonably
+    well for both English and Vietnamese (diacritics take extra bytes).
+    """
+    if not text:
+        return 0
+    return len(text.encode("utf-8")) // 4 + 1
+
+
+class ConversationContext:
+    """
+    Selects which messages of the history are sent to the LLM.
+    
+    - At most `recent_turns` user/assistant turns are kept verbatim, and
+      only as many as fit in `max_tokens`.
+    - Messages that fall out of the window are summarized asynchronously
+      via `schedule_summary()`; until the summary catches up they are
+      simply left out, never sent in full.
+    """
+    
+    def __init__(self, max_tokens: int = 6000, recent_turns: int = 10):
+        self.max_tokens = max_tokens
+        self.recent_turns = recent_turns
+        self.summary = ""
+        self.summarized_count = 0  # Leading history messages folded into summary
+        self._task: Optional[asyncio.Task] = None
+    
+    @property
+    def summary_pending(self) -> bool:
+        return self._task is not None and not self._task.done()
+    
+    def window_start(self, history: Sequence) -> int:
+        """Index of the first history message to send verbatim"""
+        budget = self.max_tokens - estimate_tokens(self.summary)
+        end = len(history)
+        # Walk back no further than the turn limit
+        floor = max(self.summarized_count, end - max(1, self.recent_turns * 2))
+        start = end
+        used = 0
+        
+        while start > floor:
+            cost = history[start - 1].token_count + MESSAGE_OVERHEAD_TOKENS
+            if used + cost > budget and start < end:
+                break
+            used += cost
+            start -= 1
+        
+        # Providers expect the conversation to start with a user message
+        while start < end - 1 and history[start].role != "user":
+            start += 1
+        return start
+    
+    def select(self, history: Sequence) -> list:
+        """Messages to send verbatim for the next request"""
+        return list(history[self.window_start(history):])
+    
+    def schedule_summary(
+        self,
+        history: Sequence,
+        summarize: Callable[[str, list], Awaitable[str]],
+    ) -> Optional[asyncio.Task]:
+        """
+        Fold messages that left the window into the summary in the background.
+        
+        `summarize(previous_summary, messages)` must return the new summary.
+        At most one summary task runs at a time; failures keep the previous
+        summary and the messages are retried on the next schedule.
+        """
+        if self.summary_pending:
+            return None
+        
+        cut = self.window_start(history)
+        if cut <= self.summarized_count:
+            return None
+        
+        overflow = list(history[self.summarized_count:cut])
+        previous = self.summary
+        
+        async def run():
+            try:
+                summary = await summarize(previous, overflow)
+            except Exception:
+                return
+            if summary:
+                self.summary = summary.strip()
+                self.summarized_count = cut
+        
+        self._task = asyncio.create_task(run())
+        return self._task
+    
+    async def wait(self):
+        """Wait for a pending summary task (mainly for tests and shutdown)"""
+        if self._task is not None:
+            await asyncio.gather(self._task, return_exceptions=True)
+    
+    def reset(self):
+        """Drop the summary and cancel any pending summarization"""
+        if self.summary_pending:
+            self._task.cancel()
+        self._task = None
+        self.summary = ""
+        self.summarized_count = 0
@@ -0,0 +1,642 @@
+"""
+Indexed food nutrition database.
+
+Supports tens of thousands of foods loaded from CSV or SQLite with:
+- Exact-name hash lookup
+- Token inverted index for phrase matches in both directions
+  ("phở bò tái" -> "phở bò", "cơm" -> "cơm trắng")
+- Character trigram index over the token vocabulary for partial words
+- Accent-insensitive matching ("pho bo" -> "phở bò") and a BK-tree over
+  the folded vocabulary for typo correction ("thitt ga" -> "thịt gà")
+- Ranked results
+"""
+
+import csv
+import heapq
+import itertools
+import os
+import re
+import sqlite3
+import unicodedata
+from array import array
+from dataclasses import dataclass
+from typing import Iterable, Iterator, Optional, Sequence
+
+_numpy = False  # Not imported yet
+
+
+def load_numpy():
+    """
+    Import NumPy on first use, or return None if it is not installed.
+    
+    NumPy takes ~0.1s to import and is only needed for batch math, so
+    it is kept out of startup.
+    """
+    global _numpy
+    if _numpy is False:
+        try:
+            import numpy
+        except ImportError:  # Optional: pure-Python fallback for batch math
+            numpy = None
+        _numpy = numpy
+    return _numpy
+
+
+# Nutrient fields stored per 100g
+NUTRIENT_FIELDS = ("calories", "protein", "fat", "carbs")
+
+# Accepted column names when loading external databases
+COLUMN_ALIASES = {
+    "name": ("name", "food", "food_name", "description", "ten", "tên"),
+    "calories": ("calories", "kcal", "energy_kcal", "energy", "nang_luong"),
+    "protein": ("protein", "protein_g", "protid"),
+    "fat": ("fat", "fat_g", "total_fat", "lipid"),
+    "carbs": ("carbs", "carbs_g", "carbohydrate", "carbohydrate_g", "glucid"),
+}
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def normalize_food_name(name: str) -> str:
+    """Normalize a food name (NFC, lowercase, single spaces)"""
+    name = unicodedata.normalize("NFC", name).lower()
+    return " ".join(_TOKEN_RE.findall(name))
+
+
+def fold_accents(text: str) -> str:
+    """Strip Vietnamese tone marks and diacritics ("phở bò" -> "pho bo")"""
+    decomposed = unicodedata.normalize("NFD", text)
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return stripped.replace("đ", "d").replace("Đ", "D")
+
+
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    """Levenshtein distance, returning max_distance + 1 once it is exceeded"""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ca != cb),
+            ))
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return previous[-1]
+
+
+def similarity(a: str, b: str, distance: int) -> float:
+    """Edit-distance similarity in [0, 1]"""
+    return 1.0 - distance / max(len(a), len(b), 1)
+
+
+class BKTree:
+    """Burkhard-Keller tree for nearest-word search by edit distance"""
+    
+    def __init__(self, words: Iterable[str] = ()):
+        self._root: Optional[tuple[str, dict]] = None
+        for word in words:
+            self.add(word)
+    
+    def add(self, word: str):
+        if self._root is None:
+            self._root = (word, {})
+            return
+        
+        node_word, children = self._root
+        while True:
+            distance = edit_distance(word, node_word, max(len(word), len(node_word)))
+            if distance == 0:
+                return
+            child = children.get(distance)
+            if child is None:
+                children[distance] = (word, {})
+                return
+            node_word, children = child
+    
+    def search(self, word: str, max_distance: int) -> list[tuple[int, str]]:
+        """Words within max_distance, closest first"""
+        if self._root is None:
+            return []
+        
+        found = []
+        stack = [self._root]
+        while stack:
+            node_word, children = stack.pop()
+            distance = edit_distance(word, node_word, max_distance + max(len(word), len(node_word)))
+            if distance <= max_distance:
+                found.append((distance, node_word))
+            for edge, child in children.items():
+                if distance - max_distance <= edge <= distance + max_distance:
+                    stack.append(child)
+        
+        found.sort()
+        return found
+
+
+def trigrams(token: str) -> set[str]:
+    """Character trigrams of a token, padded so short tokens still index"""
+    padded = f" {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+@dataclass
+class FoodMatch:
+    """A ranked lookup result"""
+    name: str
+    data: dict
+    score: float
+    food_id: int = -1
+
+
+class NutrientTable:
+    """
+    Column-oriented nutrient storage (values per 100g).
+    
+    Each field in NUTRIENT_FIELDS is a contiguous float column. Batch
+    computations run as one vectorized NumPy pass when NumPy is installed,
+    with a pure-Python fallback otherwise.
+    """
+    
+    def __init__(self):
+        self._columns = {field: array("d") for field in NUTRIENT_FIELDS}
+        self._matrix = None
+    
+    def __len__(self) -> int:
+        return len(self._columns[NUTRIENT_FIELDS[0]])
+    
+    def append(self, record: dict):
+        for field in NUTRIENT_FIELDS:
+            self._columns[field].append(float(record.get(field) or 0))
+        self._matrix = None
+    
+    def set(self, row: int, record: dict):
+        for field in NUTRIENT_FIELDS:
+            self._columns[field][row] = float(record.get(field) or 0)
+        self._matrix = None
+    
+    def row(self, row: int) -> dict:
+        return {field: self._columns[field][row] for field in NUTRIENT_FIELDS}
+    
+    def matrix(self):
+        """(rows, fields) NumPy matrix, built once and reused until changed"""
+        if self._matrix is None:
+            np = load_numpy()
+            self._matrix = np.column_stack([
+                np.frombuffer(self._columns[field], dtype=np.float64)
+                for field in NUTRIENT_FIELDS
+            ])
+        return self._matrix
+    
+    def compute(self, rows: Sequence[int], grams: Sequence[float]) -> tuple[list[dict], dict]:
+        """
+        Scale nutrients of `rows` by portion `grams` in one pass.
+        
+        Returns per-item nutrient dicts and the totals.
+        """
+        if not rows:
+            return [], {field: 0.0 for field in NUTRIENT_FIELDS}
+        
+        np = load_numpy()
+        if np is not None:
+            scaled = self._gather(np, rows) * (
+                np.asarray(grams, dtype=np.float64)[:, None] / 100.0
+            )
+            totals = scaled.sum(axis=0)
+            items = [dict(zip(NUTRIENT_FIELDS, values)) for values in scaled.tolist()]
+            return items, dict(zip(NUTRIENT_FIELDS, totals.tolist()))
+        
+        items = []
+        totals = dict.fromkeys(NUTRIENT_FIELDS, 0.0)
+        for row, portion in zip(rows, grams):
+            factor = portion / 100.0
+            item = {field: value * factor for field, value in self.row(row).items()}
+            for field in NUTRIENT_FIELDS:
+                totals[field] += item[field]
+            items.append(item)
+        return items, totals
+    
+    def lowest_below(self, field: str, value: float, limit: int) -> list[int]:
+        """Up to `limit` rows whose `field` is below `value`, lowest first (ties by row)"""
+        np = load_numpy()
+        if np is not None:
+            column = self.matrix()[:, NUTRIENT_FIELDS.index(field)]
+            # Compare in the column's precision, so a row equal to `value` is not below it
+            rows = np.flatnonzero(column < column.dtype.type(value))
+            return rows[np.argsort(column[rows], kind="stable")[:limit]].tolist()
+        
+        values = [self.row(row)[field] for row in range(len(self))]
+        rows = [row for row, current in enumerate(values) if current < value]
+        rows.sort(key=values.__getitem__)
+        return rows[:limit]
+    
+    def _gather(self, np, rows: Sequence[int]):
+        """(len(rows), fields) float64 matrix of the given rows"""
+        return self.matrix()[np.asarray(rows, dtype=np.intp)]
+
+
+class FoodIndex:
+    """
+    Read-only index over a food nutrition table.
+    
+    Usage:
+        index = FoodIndex.from_dict({"phở bò": {"calories": 215, ...}})
+        index.lookup("phở bò tái")  # -> nutrition dict for "phở bò"
+        index.search("cơm", limit=5)  # -> ranked FoodMatch list
+    """
+    
+    # Bounds that keep partial-match lookups fast on large tables
+    MAX_TOKEN_EXPANSIONS = 32
+    MAX_CANDIDATES = 5000
+    
+    # Fuzzy matching: minimum per-word similarity and corrections per word
+    FUZZY_THRESHOLD = 0.75
+    MAX_CORRECTIONS = 2
+    
+    # Score penalty when a match only holds after folding accents
+    ACCENT_PENALTY = 0.95
+    
+    def __init__(self):
+        self.names: list[str] = []
+        self.nutrients = NutrientTable()
+        self._exact: dict[str, int] = {}
+        self._folded_exact: dict[str, list[int]] = {}
+        self._folded_names: list[str] = []
+        self._tokens: list[tuple[str, ...]] = []
+        self._postings: dict[str, list[int]] = {}
+        self._vocab_trigrams: dict[str, set[str]] = {}
+        self._vocab_tree = BKTree()
+        self._max_name_tokens = 0
+        self._dirty = False
+    
+    def __len__(self) -> int:
+        return len(self.names)
+    
+    def __contains__(self, name: str) -> bool:
+        return normalize_food_name(name) in self._exact
+    
+    @classmethod
+    def from_dict(cls, database: dict[str, dict]) -> "FoodIndex":
+        index = cls()
+        index.extend(database.items())
+        return index
+    
+    def add(self, name: str, data: dict):
+        """Add or replace a food entry"""
+        key = normalize_food_name(name)
+        if not key:
+            return
+        
+        if key in self._exact:
+            self.nutrients.set(self._exact[key], data)
+            return
+        
+        food_id = len(self.names)
+        folded = fold_accents(key)
+        self._exact[key] = food_id
+        self._folded_exact.setdefault(folded, []).append(food_id)
+        self.names.append(key)
+        self._folded_names.append(folded)
+        self.nutrients.append(data)
+        self._tokens.append(tuple(folded.split(" ")))
+        self._max_name_tokens = max(self._max_name_tokens, len(self._tokens[-1]))
+        self._dirty = True
+    
+    def extend(self, items: Iterable[tuple[str, dict]]):
+        for name, data in items:
+            self.add(name, data)
+    
+    def load(self, path: str):
+        """Load foods from a CSV or SQLite file"""
+        self.extend(load_foods(path))
+    
+    def _build(self):
+        """(Re)build the secondary indexes after entries were added"""
+        postings: dict[str, list[int]] = {}
+        sizes = []
+        for food_id, (tokens, name) in enumerate(zip(self._tokens, self.names)):
+            sizes.append((len(tokens), len(name)))
+            for token in set(tokens):
+                postings.setdefault(token, []).append(food_id)
+        
+        # Shorter names first so phrase scans can stop at the best matches
+        for ids in postings.values():
+            ids.sort(key=sizes.__getitem__)
+        
+        vocab_trigrams: dict[str, set[str]] = {}
+        for token in postings:
+            for gram in trigrams(token):
+                vocab_trigrams.setdefault(gram, set()).add(token)
+        
+        self._postings = postings
+        self._vocab_trigrams = vocab_trigrams
+        self._vocab_tree = BKTree(sorted(postings))
+        self._dirty = False
+    
+    def build(self):
+        """Build the secondary indexes now rather than on the first inexact search"""
+        if self._dirty:
+            self._build()
+    
+    def get(self, name: str) -> Optional[dict]:
+        """Exact lookup by (normalized) name"""
+        food_id = self._exact.get(normalize_food_name(name))
+        return self.nutrients.row(food_id) if food_id is not None else None
+    
+    def lookup(self, query: str, fuzzy_threshold: Optional[float] = None) -> Optional[dict]:
+        """Return the nutrition data of the best match, or None"""
+        matches = self.search(query, limit=1, fuzzy_threshold=fuzzy_threshold)
+        return matches[0].data if matches else None
+    
+    def search(self, query: str, limit: int = 5, fuzzy_threshold: Optional[float] = None) -> list[FoodMatch]:
+        """
+        Return up to `limit` foods matching the query, best first.
+        
+        Matching runs from cheapest to most expensive and stops at the first
+        stage with results: exact name, accent-folded name, phrase matches,
+        partial words, then typo-tolerant fuzzy matching. Fuzzy matches need
+        every corrected word to reach `fuzzy_threshold` similarity.
+        """
+        key = normalize_food_name(query)
+        if not key:
+            return []
+        
+        food_id = self._exact.get(key)
+        if food_id is not None:
+            return [self._match(food_id, 1.0)]
+        
+        folded = fold_accents(key)
+        folded_ids = self._folded_exact.get(folded)
+        if folded_ids:
+            return [self._match(i, self.ACCENT_PENALTY) for i in folded_ids[:limit]]
+        
+        self.build()
+        
+        tokens = folded.split(" ")
+        scores: dict[int, float] = {}
+        self._match_contained_names(tokens, scores, accented=key.split(" "))
+        self._match_containing_names(tokens, limit, scores, accented=key)
+        
+        if not scores:
+            self._match_partial_tokens(tokens, limit, scores)
+        
+        if not scores:
+            threshold = self.FUZZY_THRESHOLD if fuzzy_threshold is None else fuzzy_threshold
+            self._match_fuzzy(tokens, limit, threshold, scores)
+        
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], len(self.names[item[0]])))
+        return [self._match(food_id, score) for food_id, score in ranked[:limit]]
+    
+    def leading_tokens(self) -> set[str]:
+        """First words of all food names, accent-folded ("com", "thit", ...)"""
+        return {tokens[0] for tokens in self._tokens}
+    
+    def find_mentions(self, tokens: Sequence[str]) -> list[tuple[int, int, int]]:
+        """
+        Foods named inside a normalized, tokenized text.
+        
+        Returns non-overlapping (start, end, food_id) token spans, taking
+        the longest name at each position. Matching is accent-insensitive
+        and prefers the food whose accented name matches exactly.
+        """
+        folded = [fold_accents(token) for token in tokens]
+        mentions = []
+        start = 0
+        while start < len(tokens):
+            for size in range(min(self._max_name_tokens, len(tokens) - start), 0, -1):
+                end = start + size
+                food_ids = self._folded_exact.get(" ".join(folded[start:end]))
+                if food_ids:
+                    food_id = self._exact.get(" ".join(tokens[start:end]), food_ids[0])
+                    mentions.append((start, end, food_id))
+                    start = end
+                    break
+            else:
+                start += 1
+        return mentions
+    
+    def _match(self, food_id: int, score: float) -> FoodMatch:
+        return FoodMatch(
+            name=self.names[food_id],
+            data=self.nutrients.row(food_id),
+            score=round(score, 4),
+            food_id=food_id,
+        )
+    
+    def _match_contained_names(
+        self,
+        tokens: list[str],
+        scores: dict[int, float],
+        accented: Optional[list[str]] = None,
+        weight: float = 1.0,
+    ):
+        """Foods whose full name appears as a phrase inside the query"""
+        n_tokens = len(tokens)
+        for size in range(n_tokens - 1, 0, -1):
+            for start in range(n_tokens - size + 1):
+                food_ids = self._folded_exact.get(" ".join(tokens[start:start + size]))
+                if not food_ids:
+                    continue
+                
+                exact_id = self._exact.get(" ".join(accented[start:start + size])) if accented else None
+                for food_id in food_ids:
+                    score = weight * 0.9 * size / n_tokens
+                    if food_id != exact_id:
+                        score *= self.ACCENT_PENALTY
+                    scores[food_id] = max(scores.get(food_id, 0.0), score)
+    
+    def _match_containing_names(
+        self,
+        tokens: list[str],
+        limit: int,
+        scores: dict[int, float],
+        accented: Optional[str] = None,
+        weight: float = 1.0,
+    ):
+        """Foods whose name contains the whole query as a phrase"""
+        postings = [self._postings.get(token) for token in tokens]
+        if not all(postings):
+            return
+        
+        phrase = f" {' '.join(tokens)} "
+        accented_phrase = f" {accented} " if accented else None
+        found = 0
+        for food_id in min(postings, key=len)[:self.MAX_CANDIDATES]:
+            if phrase in f" {self._folded_names[food_id]} ":
+                score = weight * 0.9 * len(tokens) / len(self._tokens[food_id])
+                if accented_phrase is None or accented_phrase not in f" {self.names[food_id]} ":
+                    score *= self.ACCENT_PENALTY
+                scores[food_id] = max(scores.get(food_id, 0.0), score)
+                found += 1
+                if found >= limit:
+                    break
+    
+    def _correct_token(self, token: str, threshold: float) -> list[tuple[str, float]]:
+        """Closest vocabulary words to `token` with their similarity"""
+        if token in self._postings:
+            return [(token, 1.0)]
+        
+        max_distance = int(len(token) * (1.0 - threshold))
+        if max_distance < 1:
+            return []
+        
+        corrections = []
+        for distance, word in self._vocab_tree.search(token, max_distance):
+            score = similarity(token, word, distance)
+            if score >= threshold:
+                corrections.append((word, score))
+        return corrections[:self.MAX_CORRECTIONS]
+    
+    def _match_fuzzy(self, tokens: list[str], limit: int, threshold: float, scores: dict[int, float]):
+        """Phrase matching after correcting misspelled words"""
+        corrected = []
+        for token in tokens:
+            options = self._correct_token(token, threshold)
+            if not options:
+                # Unknown word: keep it so contained-name matches still work
+                options = [(token, 1.0)]
+            corrected.append(options)
+        
+        for combo in itertools.islice(itertools.product(*corrected), 16):
+            words = [word for word, _ in combo]
+            weight = min(score for _, score in combo)
+            if words == tokens:
+                continue
+            for food_id in self._folded_exact.get(" ".join(words), []):
+                scores[food_id] = max(scores.get(food_id, 0.0), weight * self.ACCENT_PENALTY)
+            self._match_contained_names(words, scores, weight=weight)
+            self._match_containing_names(words, limit, scores, weight=weight)
+    
+    def _expand_token(self, token: str) -> list[str]:
+        """Vocabulary tokens containing `token` as a substring"""
+        if token in self._postings:
+            return [token]
+        if len(token) < 2:
+            return []
+        
+        if len(token) == 2:
+            # Too short for an inner trigram: match it as a word prefix
+            grams = {f" {token}"}
+        else:
+            grams = {g for g in trigrams(token) if " " not in g}
+        
+        candidates = None
+        for gram in sorted(grams, key=lambda g: len(self._vocab_trigrams.get(g, ()))):
+            found = self._vocab_trigrams.get(gram)
+            if not found:
+                return []
+            candidates = set(found) if candidates is None else candidates & found
+            if not candidates:
+                return []
+        
+        matches = sorted(t for t in candidates or () if token in t)
+        return matches[:self.MAX_TOKEN_EXPANSIONS]
+    
+    def _match_partial_tokens(self, tokens: list[str], limit: int, scores: dict[int, float]):
+        """Foods containing every query token, allowing partial words"""
+        expansions = []
+        for token in tokens:
+            if len(token) < 2 and len(tokens) > 1:
+                # Single letters carry too little signal on their own
+                continue
+            expanded = self._expand_token(token)
+            if not expanded:
+                return
+            expansions.append(set(expanded))
+        
+        if not expansions:
+            return
+        
+        # Walk the rarest token group in name-length order; postings are
+        # pre-sorted, so the first matches found are the best ranked ones
+        pivot = min(expansions, key=lambda group: sum(len(self._postings[t]) for t in group))
+        candidates = heapq.merge(
+            *(self._postings[t] for t in pivot),
+            key=lambda i: (len(self._tokens[i]), len(self.names[i])),
+        )
+        
+        query_len = sum(len(t) for t in tokens)
+        found = 0
+        for food_id in itertools.islice(candidates, self.MAX_CANDIDATES):
+            if food_id in scores:
+                continue
+            food_tokens = self._tokens[food_id]
+            if all(any(t in group for t in food_tokens) for group in expansions):
+                scores[food_id] = 0.5 * query_len / sum(len(t) for t in food_tokens)
+                found += 1
+                if found >= limit:
+                    break
+
+
+def _resolve_columns(fieldnames: Iterable[str]) -> dict[str, str]:
+    """Map canonical field names to the columns present in a file"""
+    lowered = {name.strip().lower(): name for name in fieldnames if name}
+    columns = {}
+    for field, aliases in COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in lowered:
+                columns[field] = lowered[alias]
+                break
+    
+    if "name" not in columns:
+        raise ValueError(f"Food database has no name column (expected one of {COLUMN_ALIASES['name']})")
+    return columns
+
+
+def _to_float(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def load_foods(path: str) -> Iterator[tuple[str, dict]]:
+    """Yield (name, nutrients) rows from a CSV or SQLite file"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        return load_foods_csv(path)
+    if ext in (".db", ".sqlite", ".sqlite3"):
+        return load_foods_sqlite(path)
+    raise ValueError(f"Unsupported food database format: {path}")
+
+
+def load_foods_csv(path: str) -> Iterator[tuple[str, dict]]:
+    """Yield (name, nutrients) rows from a CSV file with a header row"""
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        reader = csv.DictReader(f)
+        columns = _resolve_columns(reader.fieldnames or [])
+        
+        for row in reader:
+            name = row.get(columns["name"])
+            if not name:
+                continue
+            yield name, {
+                field: _to_float(row.get(columns[field])) if field in columns else 0.0
+                for field in NUTRIENT_FIELDS
+            }
+
+
+def load_foods_sqlite(path: str, table: str = "foods") -> Iterator[tuple[str, dict]]:
+    """Yield (name, nutrients) rows from a SQLite table"""
+    conn = sqlite3.connect(path)
+    try:
+        cursor = conn.execute(f'SELECT * FROM "{table}"')
+        fieldnames = [d[0] for d in cursor.description]
+        columns = _resolve_columns(fieldnames)
+        positions = {field: fieldnames.index(column) for field, column in columns.items()}
+        
+        for row in cursor:
+            name = row[positions["name"]]
+            if not name:
+                continue
+            yield str(name), {
+                field: _to_float(row[positions[field]]) if field in positions else 0.0
+                for field in NUTRIENT_FIELDS
+            }
+    finally:
+        conn.close()
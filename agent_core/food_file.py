@@ -0,0 +1,291 @@
+"""
+Memory-mapped, read-only food database file.
+
+`build_food_db.py` compiles food tables (CSV/SQLite plus the built-in
+foods) into one binary file that `MappedFoodIndex` opens with mmap.
+Nothing is parsed or copied at startup: lookups read the mapped pages,
+and every process that opens the file shares them through the page
+cache.
+
+Layout (little-endian, sections 8-byte aligned):
+
+    header        magic, version, food count, longest name in words,
+                  offsets of the sections below
+    nutrients     one float32 column of `count` values per NUTRIENT_FIELDS
+    names         uint32 offsets[count + 1], then the UTF-8 normalized names
+    folded names  the same for the accent-folded names
+    name index    uint32 food ids sorted by name bytes
+    folded index  uint32 food ids sorted by folded name bytes (then id)
+
+Exact and accent-insensitive lookups binary-search the sorted indexes.
+Phrase, partial-word and fuzzy matching build their in-memory indexes
+on first use, as for other databases.
+"""
+
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import Iterable, Optional, Sequence
+
+from .food_db import NUTRIENT_FIELDS, FoodIndex, NutrientTable, fold_accents, load_numpy, normalize_food_name
+
+FOOD_FILE_EXTENSION = ".fdb"
+
+MAGIC = b"FOODIDX\0"
+VERSION = 1
+
+# magic, version, count, max name tokens, then section offsets:
+# nutrients, names, folded names, name index, folded index
+_HEADER = struct.Struct("<8sIII5Q")
+
+
+def _decimal(value: float) -> float:
+    """
+    The decimal a float32 was stored from (2.7, not 2.700000047683716).
+    float32 keeps 6 significant digits exactly.
+    """
+    return float(f"{value:.6g}")
+
+
+def _decimals(np, values):
+    """`_decimal` over a float32 NumPy array, as float64"""
+    values = values.astype(np.float64)
+    with np.errstate(divide="ignore"):
+        digits = 5 - np.floor(np.log10(np.abs(values)))
+    digits = np.where(np.isfinite(digits), digits, 0)  # Zeros
+    # Powers of ten up to 1e22 are exact, so rounding to an integer and
+    # scaling back gives the nearest float64 to the 6-digit decimal
+    scale = 10.0 ** np.abs(digits)
+    return np.where(digits >= 0, np.round(values * scale) / scale, np.round(values / scale) * scale)
+
+
+class _StringTable(Sequence):
+    """Strings by food id, decoded from the mapped file on access"""
+    
+    def __init__(self, buffer, offset: int, count: int):
+        self._buffer = buffer
+        self._count = count
+        self._offsets = memoryview(buffer)[offset:offset + 4 * (count + 1)].cast("I")
+        self._data = offset + 4 * (count + 1)
+    
+    def __len__(self) -> int:
+        return self._count
+    
+    def raw(self, i: int) -> bytes:
+        return self._buffer[self._data + self._offsets[i]:self._data + self._offsets[i + 1]]
+    
+    def __getitem__(self, i: int) -> str:
+        if i < 0:
+            i += self._count
+        if not 0 <= i < self._count:
+            raise IndexError("food id out of range")
+        return self.raw(i).decode("utf-8")
+
+
+class _Tokens(Sequence):
+    """Accent-folded name words by food id"""
+    
+    def __init__(self, folded_names: _StringTable):
+        self._folded_names = folded_names
+    
+    def __len__(self) -> int:
+        return len(self._folded_names)
+    
+    def __getitem__(self, i: int) -> tuple[str, ...]:
+        return tuple(self._folded_names[i].split(" "))
+
+
+class _KeyIndex:
+    """
+    Exact-key lookup through food ids sorted by key bytes (binary search).
+    
+    Stands in for FoodIndex's name -> id dict (`unique`) and folded
+    name -> [ids] dict.
+    """
+    
+    def __init__(self, table: _StringTable, buffer, offset: int, unique: bool):
+        self._table = table
+        self._ids = memoryview(buffer)[offset:offset + 4 * len(table)].cast("I")
+        self._unique = unique
+    
+    def _find(self, key: bytes) -> int:
+        """Position of the first id whose key is >= `key`"""
+        low, high = 0, len(self._ids)
+        while low < high:
+            mid = (low + high) // 2
+            if self._table.raw(self._ids[mid]) < key:
+                low = mid + 1
+            else:
+                high = mid
+        return low
+    
+    def ids(self, key: str) -> list[int]:
+        encoded = key.encode("utf-8")
+        found = []
+        for pos in range(self._find(encoded), len(self._ids)):
+            food_id = self._ids[pos]
+            if self._table.raw(food_id) != encoded:
+                break
+            found.append(food_id)
+        return found
+    
+    def get(self, key: str, default=None):
+        found = self.ids(key)
+        if not found:
+            return default
+        return found[0] if self._unique else found
+    
+    def __contains__(self, key: str) -> bool:
+        return bool(self.ids(key))
+
+
+class MappedNutrientTable(NutrientTable):
+    """NutrientTable over the float32 columns of a mapped food file"""
+    
+    def __init__(self, buffer, offset: int, count: int):
+        self._buffer = buffer
+        self._offset = offset
+        self._count = count
+        view = memoryview(buffer)[offset:offset + 4 * count * len(NUTRIENT_FIELDS)].cast("f")
+        self._columns = {
+            field: view[i * count:(i + 1) * count] for i, field in enumerate(NUTRIENT_FIELDS)
+        }
+        self._matrix = None
+    
+    def __len__(self) -> int:
+        return self._count
+    
+    def append(self, record: dict):
+        raise TypeError("Mapped food files are read-only")
+    
+    def set(self, row: int, record: dict):
+        raise TypeError("Mapped food files are read-only")
+    
+    def row(self, row: int) -> dict:
+        return {field: _decimal(self._columns[field][row]) for field in NUTRIENT_FIELDS}
+    
+    def matrix(self):
+        """(rows, fields) float32 NumPy view of the mapped columns (no copy)"""
+        if self._matrix is None:
+            np = load_numpy()
+            columns = np.frombuffer(
+                self._buffer, dtype="<f4", count=self._count * len(NUTRIENT_FIELDS), offset=self._offset,
+            )
+            self._matrix = columns.reshape(len(NUTRIENT_FIELDS), self._count).T
+        return self._matrix
+    
+    def _gather(self, np, rows: Sequence[int]):
+        # Rounded like row() so results match the source decimals exactly
+        return _decimals(np, self.matrix().take(np.asarray(rows, dtype=np.intp), axis=0))
+
+
+class MappedFoodIndex(FoodIndex):
+    """
+    Read-only FoodIndex over a food file, opened with mmap.
+    
+    Usage:
+        index = MappedFoodIndex("data/foods.fdb")
+        index.lookup("pho bo")
+    """
+    
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        
+        if len(self._mmap) < _HEADER.size:
+            raise ValueError(f"Not a food file: {path}")
+        magic, version, count, max_name_tokens, nutrients, names, folded, name_index, folded_index = (
+            _HEADER.unpack_from(self._mmap)
+        )
+        if magic != MAGIC:
+            raise ValueError(f"Not a food file: {path}")
+        if version != VERSION:
+            raise ValueError(f"Unsupported food file version {version}: {path} (rebuild it with build_food_db.py)")
+        if sys.byteorder != "little":
+            raise ValueError("Food files can only be mapped on little-endian machines")
+        
+        buffer = self._mmap
+        self.names = _StringTable(buffer, names, count)
+        self._folded_names = _StringTable(buffer, folded, count)
+        self._exact = _KeyIndex(self.names, buffer, name_index, unique=True)
+        self._folded_exact = _KeyIndex(self._folded_names, buffer, folded_index, unique=False)
+        self._tokens = _Tokens(self._folded_names)
+        self.nutrients = MappedNutrientTable(buffer, nutrients, count)
+        self._max_name_tokens = max_name_tokens
+        # Phrase, partial and fuzzy matching indexes are built in memory on first use
+        self._dirty = count > 0
+    
+    def add(self, name: str, data: dict):
+        raise TypeError(f"{self.path} is read-only; rebuild it with build_food_db.py")
+
+
+def is_food_file(path: Optional[str]) -> bool:
+    return bool(path) and os.path.splitext(path)[1].lower() == FOOD_FILE_EXTENSION
+
+
+def _string_table(strings: list[bytes]) -> bytes:
+    offsets = array("I", [0])
+    for encoded in strings:
+        offsets.append(offsets[-1] + len(encoded))
+    return _native(offsets) + b"".join(strings)
+
+
+def _native(values: array) -> bytes:
+    """Array bytes in file (little-endian) order"""
+    if sys.byteorder != "little":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def write_food_file(path: str, items: Iterable[tuple[str, dict]]) -> int:
+    """
+    Compile (name, nutrients) rows into a food file at `path`.
+    
+    Names are normalized as in FoodIndex; a later row with the same name
+    replaces the values of the earlier one. Returns the number of foods.
+    """
+    foods: dict[str, dict] = {}
+    for name, data in items:
+        key = normalize_food_name(name)
+        if key:
+            foods[key] = data
+    
+    names = [name.encode("utf-8") for name in foods]
+    folded = [fold_accents(name).encode("utf-8") for name in foods]
+    count = len(names)
+    
+    columns = array("f")
+    for field in NUTRIENT_FIELDS:
+        columns.extend(float(data.get(field) or 0) for data in foods.values())
+    
+    sections = [
+        _native(columns),
+        _string_table(names),
+        _string_table(folded),
+        _native(array("I", sorted(range(count), key=names.__getitem__))),
+        _native(array("I", sorted(range(count), key=folded.__getitem__))),
+    ]
+    
+    offsets = []
+    body = bytearray()
+    for section in sections:
+        body += b"\0" * (-(_HEADER.size + len(body)) % 8)
+        offsets.append(_HEADER.size + len(body))
+        body += section
+    
+    max_name_tokens = max((name.count(" ") + 1 for name in foods), default=0)
+    header = _HEADER.pack(MAGIC, VERSION, count, max_name_tokens, *offsets)
+    
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        f.write(body)
+    os.replace(tmp_path, path)
+    return count
+
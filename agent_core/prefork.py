@@ -0,0 +1,183 @@
+"""
+Pre-fork worker processes for server mode.
+
+The supervisor binds the listening socket once, then forks `workers`
+children that all accept connections from it, so CPU-bound work
+(JSON, fuzzy food matching, rendering) spreads over several cores.
+Anything loaded before forking (the food index) is shared
+copy-on-write; everything with its own connections or threads (HTTP
+client, SQLite caches, session store) is created in each child.
+
+Workers that die are restarted. SIGTERM or SIGINT to the supervisor
+is forwarded once to every worker, which stops accepting, finishes its
+requests and shuts down; workers still running after
+`graceful_timeout` seconds are killed.
+
+POSIX only (needs os.fork).
+"""
+
+import os
+import select
+import signal
+import socket
+import sys
+import threading
+import time
+from typing import Callable
+
+# Signals that stop the supervisor
+STOP_SIGNALS = (signal.SIGTERM, signal.SIGINT)
+
+
+def bind_socket(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    """A listening TCP socket the workers can share"""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    # IPPROTO_TCP lets asyncio enable TCP_NODELAY on accepted connections
+    sock = socket.socket(family, socket.SOCK_STREAM, socket.IPPROTO_TCP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+class PreforkSupervisor:
+    """
+    Forks and supervises worker processes serving one socket.
+    
+    Usage:
+        sock = bind_socket("0.0.0.0", 8000)
+        PreforkSupervisor(lambda sock: serve(sock), sock, workers=4).run()
+    """
+    
+    def __init__(
+        self,
+        serve: Callable[[socket.socket], None],
+        sock: socket.socket,
+        workers: int,
+        graceful_timeout: float = 30.0,
+        restart_delay: float = 1.0,
+    ):
+        if not hasattr(os, "fork"):
+            raise RuntimeError("Pre-fork workers need os.fork (POSIX)")
+        self.serve = serve  # Runs in each worker until it is told to stop
+        self.sock = sock
+        self.workers = workers
+        self.graceful_timeout = graceful_timeout
+        self.restart_delay = restart_delay  # Before restarting a worker that died right after starting
+        self.restarts = 0
+        self._children: dict[int, float] = {}  # pid -> start time
+        self._stopping = False
+        self._wakeup_r, self._wakeup_w = os.pipe()
+    
+    def run(self) -> int:
+        """Serve until stopped; returns the exit code"""
+        previous = {sig: signal.signal(sig, self._on_signal) for sig in STOP_SIGNALS}
+        previous[signal.SIGCHLD] = signal.signal(signal.SIGCHLD, self._on_child_exit)
+        try:
+            for _ in range(self.workers):
+                self._spawn()
+            while not self._stopping:
+                self._wait()
+            self._shutdown()
+        finally:
+            for sig, handler in previous.items():
+                signal.signal(sig, handler)
+            os.close(self._wakeup_r)
+            os.close(self._wakeup_w)
+        return 0
+    
+    def _on_signal(self, signum, frame):
+        self._stopping = True
+        os.write(self._wakeup_w, b"\0")
+    
+    def _on_child_exit(self, signum, frame):
+        os.write(self._wakeup_w, b"\0")
+    
+    def _spawn(self):
+        pid = os.fork()
+        if pid == 0:
+            os._exit(self._child())
+        self._children[pid] = time.monotonic()
+    
+    def _child(self) -> int:
+        code = 0
+        try:
+            for sig in (*STOP_SIGNALS, signal.SIGCHLD):
+                signal.signal(sig, signal.SIG_DFL)
+            os.close(self._wakeup_r)
+            os.close(self._wakeup_w)
+            # Terminal Ctrl+C reaches the supervisor only, which then stops each worker once
+            os.setpgid(0, 0)
+            _watch_parent(os.getppid())
+            self.serve(self.sock)
+        except BaseException as e:
+            if not isinstance(e, KeyboardInterrupt):
+                print(f"Worker {os.getpid()} failed: {e!r}", file=sys.stderr)
+                code = 1
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        return code
+    
+    def _wait(self):
+        """Reap exited workers and restart them; returns early on a stop signal"""
+        while self._children and not self._stopping:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+            if pid == 0:
+                # Sleep until a worker exits or a stop signal arrives
+                _wait_readable(self._wakeup_r, 1.0)
+                continue
+            
+            started = self._children.pop(pid, None)
+            if started is None:
+                continue
+            code = os.waitstatus_to_exitcode(status)
+            print(f"Worker {pid} exited with code {code}; restarting", file=sys.stderr)
+            if time.monotonic() - started < self.restart_delay:
+                time.sleep(self.restart_delay)
+            if not self._stopping:
+                self.restarts += 1
+                self._spawn()
+    
+    def _shutdown(self):
+        for pid in self._children:
+            _kill(pid, signal.SIGTERM)
+        
+        deadline = time.monotonic() + self.graceful_timeout
+        while self._children and time.monotonic() < deadline:
+            pid, _ = os.waitpid(-1, os.WNOHANG)
+            if pid:
+                self._children.pop(pid, None)
+            else:
+                time.sleep(0.05)
+        
+        for pid in self._children:
+            print(f"Worker {pid} did not stop in {self.graceful_timeout:g}s; killing it", file=sys.stderr)
+            _kill(pid, signal.SIGKILL)
+        while self._children:
+            pid, _ = os.waitpid(-1, 0)
+            self._children.pop(pid, None)
+
+
+def _kill(pid: int, sig: int):
+    try:
+        os.kill(pid, sig)
+    except ProcessLookupError:
+        pass
+
+
+def _wait_readable(fd: int, timeout: float):
+    readable, _, _ = select.select([fd], [], [], timeout)
+    if readable:
+        os.read(fd, 64)
+
+
+def _watch_parent(parent: int, interval: float = 1.0):
+    """Stop this worker gracefully if the supervisor dies without stopping it"""
+    def watch():
+        while os.getppid() == parent:
+            time.sleep(interval)
+        os.kill(os.getpid(), signal.SIGTERM)
+    
+    threading.Thread(target=watch, name="prefork-parent-watch", daemon=True).start()
@@ -0,0 +1,149 @@
+"""
+Client-side rate limiting for LLM providers.
+
+A token bucket per provider (and configured rate) is shared by every
+agent in the process, so concurrent sessions or batch workers together
+stay under the provider's request rate. The bucket adapts to
+throttling: each 429 halves the rate and successful calls raise it
+again step by step (AIMD).
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Optional
+
+from config import LLMConfig
+
+
+class TokenBucket:
+    """
+    Token bucket rate limiter for asyncio.
+    
+    Refills `rate` tokens per second up to `capacity`. Callers reserve a
+    token and sleep until it is due, so waiters are served in arrival
+    order without a lock.
+    """
+    
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+    
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+    
+    async def acquire(self, tokens: float = 1.0):
+        """Wait until `tokens` are available and consume them"""
+        self._refill()
+        self._tokens -= tokens
+        if self._tokens < 0:
+            await asyncio.sleep(-self._tokens / self.rate)
+
+
+class AdaptiveTokenBucket(TokenBucket):
+    """
+    Token bucket that backs off on provider throttling.
+    
+    `max_rate` is the configured limit (None = unlimited). On `throttle()`
+    the rate is cut by `decrease`, starting from the observed request
+    rate when unlimited; a burst of 429s counts as one event per
+    `COOLDOWN`. Every later success regains `increase` of the ceiling
+    until the configured limit (or unlimited) is reached again.
+    """
+    
+    WINDOW = 5.0  # Seconds of history used to estimate the request rate
+    COOLDOWN = 1.0  # Seconds between two rate cuts
+    
+    def __init__(
+        self,
+        max_rate: Optional[float] = None,
+        min_rate: float = 0.5,
+        decrease: float = 0.5,
+        increase: float = 0.02,
+    ):
+        super().__init__(max_rate or 1.0)
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.decrease = decrease
+        self.increase = increase
+        self.limited = max_rate is not None
+        self.throttles = 0
+        self._ceiling = max_rate or 0.0
+        self._last_cut = 0.0
+        self._recent: deque[float] = deque(maxlen=4096)
+    
+    def observed_rate(self) -> float:
+        """Requests per second over the recent window"""
+        now = time.monotonic()
+        while self._recent and self._recent[0] < now - self.WINDOW:
+            self._recent.popleft()
+        if not self._recent:
+            return 0.0
+        # Measure over the span actually covered, so a fresh burst is not underestimated
+        return len(self._recent) / max(now - self._recent[0], 0.1)
+    
+    async def acquire(self, tokens: float = 1.0):
+        self._recent.append(time.monotonic())
+        if self.limited:
+            await super().acquire(tokens)
+    
+    def _set_rate(self, rate: float):
+        self._refill()
+        self.rate = rate
+        self.capacity = max(1.0, rate)
+    
+    def throttle(self, retry_after: Optional[float] = None):
+        """Provider returned 429: slow down, pausing for `retry_after` if given"""
+        self.throttles += 1
+        now = time.monotonic()
+        if now - self._last_cut < self.COOLDOWN:
+            return
+        self._last_cut = now
+        
+        if not self.limited:
+            self._ceiling = max(self.observed_rate(), self.min_rate)
+            self._set_rate(self._ceiling)
+            self.limited = True
+        
+        self._set_rate(max(self.min_rate, self.rate * self.decrease))
+        # No bursts after a throttle; make new callers wait out Retry-After
+        self._tokens = min(self._tokens, 0.0, -(retry_after or 0.0) * self.rate)
+    
+    def on_success(self):
+        """Provider accepted a request: recover toward the configured rate"""
+        if not self.limited or self.rate >= self._ceiling:
+            return
+        
+        rate = self.rate + self._ceiling * self.increase
+        if self.max_rate is None and rate >= self._ceiling:
+            # Back to where throttling started: lift the limit again
+            self.limited = False
+            return
+        self._set_rate(min(rate, self._ceiling))
+
+
+# Buckets by (provider, configured rate): a config with another limit gets its
+# own bucket instead of replacing the one other agents are using
+_limiters: dict[tuple[str, Optional[float]], AdaptiveTokenBucket] = {}
+
+
+def get_rate_limiter(config: LLMConfig) -> AdaptiveTokenBucket:
+    """Get the shared adaptive rate limiter for a provider and rate limit"""
+    max_rate = config.rate_limit_rps if config.rate_limit_rps > 0 else None
+    key = (config.provider.value, max_rate)
+    
+    limiter = _limiters.get(key)
+    if limiter is None:
+        limiter = _limiters[key] = AdaptiveTokenBucket(max_rate)
+    return limiter
+
+
+def reset_rate_limiters():
+    """Forget all limiter state (e.g. between benchmark runs)"""
+    _limiters.clear()
@@ -0,0 +1,357 @@
+"""
+Precompiled provider request scaffolding.
+
+Everything in an LLM request that depends only on the provider config
+and the system prompt (URL, headers, system block, tool specs and
+tool_choice variants, generation settings) is built once per config as
+a `RequestTemplate` and shared by all agents. A turn then only adds its
+messages (and summary) to a shallow body dict.
+
+`RequestTemplate.encode()` serializes a body to bytes, splicing in the
+pre-encoded JSON of every object the template owns and of history
+messages (`EncodedDict`), so only the variable parts are encoded per
+request. orjson is used when installed.
+
+An agent's history window is encoded incrementally by `EncodedHistory`:
+messages are encoded once, as they are appended, into one buffer, and a
+request takes the window as one pre-encoded chunk (`EncodedList`), and
+the body is assembled with a single join, so large histories are copied
+once per request rather than once per concatenation.
+"""
+
+import json
+from typing import Any, Optional, Sequence
+
+from config import LLMConfig, LLMProvider
+from . import bundle
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+
+def dumps(value: Any) -> bytes:
+    """Compact UTF-8 JSON, via orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return _encoder.encode(value).encode("utf-8")
+
+
+def loads(data: bytes | str) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class EncodedDict(dict):
+    """
+    A JSON object that carries its own encoding, made once on creation.
+    
+    Used for messages that are resent with every request. It is a plain
+    dict to everything else (json, response cache keys), but must not be
+    modified after creation.
+    """
+    
+    __slots__ = ("json",)
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Not orjson: its output keeps an over-allocated buffer (1 KiB and up),
+        # too much to hold for every message of every session
+        self.json = _encoder.encode(self).encode("utf-8")
+
+
+class EncodedList(list):
+    """
+    A list whose first `count` items are pre-encoded in `head`: chunks
+    of their JSON that, joined by commas, give the items without
+    brackets. Like EncodedDict, it is a plain list to everything else
+    and must not be modified.
+    """
+    
+    __slots__ = ("head", "count")
+    
+    def __init__(self, items=(), head: tuple[bytes, ...] = (), count: int = 0):
+        super().__init__(items)
+        self.head = head
+        self.count = count
+    
+    def extended(self, items: list) -> "EncodedList":
+        """A copy with `items` appended after the pre-encoded ones"""
+        result = EncodedList(self, self.head, self.count)
+        result += items
+        return result
+
+
+class EncodedHistory:
+    """
+    Incrementally encoded window of a conversation history.
+    
+    Keeps the JSON of history messages `[base, end)` comma-terminated in
+    one buffer, with the offset of each message. Messages appended to
+    the history are encoded once, when first requested; messages removed
+    from the end (rolled back turns) are dropped from the buffer, and the
+    part before the window is released as the window moves on. A request
+    then costs one copy of the window's bytes, however long it is.
+    
+    History messages must be plain user/assistant messages (`wire()`).
+    """
+    
+    __slots__ = ("_messages", "_wires", "_buffer", "_offsets", "_base", "_last", "_last_start")
+    
+    def __init__(self):
+        self.reset()
+    
+    def reset(self):
+        self._messages: list = []  # history[_base:_base + len(_messages)]
+        self._wires: list[EncodedDict] = []
+        self._buffer = bytearray()
+        self._offsets = [0]  # Start of each message in _buffer, then the end
+        self._base = 0
+        self._last: Optional[EncodedList] = None  # Reused while the window is unchanged
+        self._last_start = -1
+    
+    def window(self, history: Sequence, start: int) -> EncodedList:
+        """Wire format of `history[start:]` with its JSON pre-encoded"""
+        self._sync(history, start)
+        
+        if self._last is not None and self._last_start == start:
+            return self._last
+        
+        begin = start - self._base
+        head = ()
+        if begin < len(self._messages):
+            with memoryview(self._buffer) as view:
+                head = (bytes(view[self._offsets[begin]:len(self._buffer) - 1]),)
+        self._last = EncodedList(self._wires[begin:], head, len(self._messages) - begin)
+        self._last_start = start
+        return self._last
+    
+    def _sync(self, history: Sequence, start: int):
+        messages, base = self._messages, self._base
+        
+        # Drop messages that are no longer in the history (rolled back or replaced)
+        kept = len(messages)
+        while kept and (base + kept > len(history) or history[base + kept - 1] is not messages[kept - 1]):
+            kept -= 1
+        if kept < len(messages):
+            self._truncate(kept)
+        
+        if start < base or start > base + kept:
+            # Window moved back (e.g. a shorter summary) or past everything encoded
+            self.reset()
+            self._base = base = start
+        elif start - base > len(self._messages) // 2:
+            self._release(start - base)
+            base = self._base
+        
+        buffer, offsets = self._buffer, self._offsets
+        for msg in history[base + len(self._messages):]:
+            wire = msg.wire()
+            buffer += wire.json
+            buffer += b","
+            offsets.append(len(buffer))
+            self._messages.append(msg)
+            self._wires.append(wire)
+            self._last = None
+    
+    def _truncate(self, count: int):
+        del self._buffer[self._offsets[count]:]
+        del self._offsets[count + 1:]
+        del self._messages[count:]
+        del self._wires[count:]
+        self._last = None
+    
+    def _release(self, count: int):
+        """Forget the first `count` messages"""
+        cut = self._offsets[count]
+        del self._buffer[:cut]
+        self._offsets = [offset - cut for offset in self._offsets[count:]]
+        del self._messages[:count]
+        del self._wires[:count]
+        self._base += count
+        self._last = None
+
+
+class RequestTemplate:
+    """
+    Immutable request scaffolding for one provider config.
+    
+    The objects placed into request bodies (system block, tool lists,
+    tool_choice values) are shared and must not be modified.
+    """
+    
+    __slots__ = (
+        "provider", "claude", "url", "headers", "stream_headers", "system_prompt",
+        "_base", "_system", "_tools", "_tool_choice", "_fragments", "_keys",
+    )
+    
+    def __init__(self, config: LLMConfig, system_prompt: str):
+        self.provider = config.provider.value
+        self.claude = config.provider == LLMProvider.CLAUDE
+        self.system_prompt = system_prompt
+        
+        if self.claude:
+            self.url = f"{config.base_url}/messages"
+            headers = {"x-api-key": config.api_key, "anthropic-version": "2023-06-01"}
+        else:
+            self.url = f"{config.base_url}/chat/completions"
+            headers = {"Authorization": f"Bearer {config.api_key}"}
+        self.headers = {"Content-Type": "application/json", **headers}
+        self.stream_headers = {**self.headers, "Accept": "text/event-stream"}
+        
+        self._base = {
+            "model": config.model,
+            "max_tokens": config.max_tokens,
+            "temperature": config.temperature,
+        }
+        
+        tools = list(bundle.tools_spec(config.provider))
+        if self.claude:
+            # Static system prompt first; the changing summary goes after the
+            # cache breakpoint so it does not invalidate the cached prefix
+            block = {"type": "text", "text": system_prompt}
+            if config.prompt_cache:
+                block["cache_control"] = {"type": "ephemeral"}
+                if tools:
+                    tools[-1] = {**tools[-1], "cache_control": {"type": "ephemeral"}}
+            self._system = [block]
+            self._tool_choice = (None, {"type": "none"})
+        else:
+            # Automatic prefix caching matches the longest identical prefix,
+            # so the static system prompt and tools always come first
+            self._system = [{"role": "system", "content": system_prompt}]
+            self._tool_choice = ("auto", "none")
+        self._tools = tools
+        
+        # Pre-encoded JSON of every object this template hands out, by identity.
+        # The template keeps them alive, so an id() match means the same object.
+        owned = [self._system, self._system[0], self._tools, *self._base.values(), *self._tool_choice, True]
+        self._fragments = {id(value): dumps(value) for value in owned if value is not None}
+        self._keys: dict[str, bytes] = {}
+    
+    def build(
+        self,
+        messages: list[dict],
+        summary: Optional[str] = None,
+        include_tools: bool = True,
+        force_answer: bool = False,
+        stream: bool = False,
+    ) -> dict:
+        """
+        Request body for formatted `messages` (and an optional summary text).
+        
+        With `force_answer`, tools stay declared (required when the messages
+        contain tool calls) but the model is told not to call them again.
+        """
+        body = dict(self._base)
+        if self.claude:
+            system = self._system
+            if summary:
+                system = system + [{"type": "text", "text": summary}]
+            body["system"] = system
+            body["messages"] = messages
+            if include_tools and self._tools:
+                body["tools"] = self._tools
+                if force_answer:
+                    body["tool_choice"] = self._tool_choice[1]
+            if stream:
+                body["stream"] = True
+        else:
+            full_messages = list(self._system)
+            if summary:
+                full_messages.append({"role": "system", "content": summary})
+            if type(messages) is EncodedList and messages.count:
+                # System message(s), then the pre-encoded history window
+                head = (self._encode_items(full_messages),) + messages.head
+                full_messages = EncodedList(full_messages, head, len(full_messages) + messages.count)
+            full_messages += messages
+            body["messages"] = full_messages
+            if include_tools and self._tools:
+                body["tools"] = self._tools
+                body["tool_choice"] = self._tool_choice[force_answer]
+            if stream:
+                body["stream"] = True
+                body["stream_options"] = {"include_usage": True}
+        return body
+    
+    def encode(self, body: dict) -> bytes:
+        """Serialize a body, reusing the pre-encoded JSON of template-owned parts"""
+        fragments = self._fragments
+        parts = [b"{"]
+        for key, value in body.items():
+            prefix = self._keys.get(key)
+            if prefix is None:
+                prefix = self._keys[key] = dumps(key) + b":"
+            parts.append(prefix if len(parts) == 1 else b"," + prefix)
+            encoded = fragments.get(id(value))
+            if encoded is not None:
+                parts.append(encoded)
+            elif isinstance(value, list):
+                self._encode_list(value, parts)
+            else:
+                parts.append(dumps(value))
+        parts.append(b"}")
+        # One join: pre-encoded histories can be large, so they are copied only here
+        return b"".join(parts)
+    
+    def _encode_list(self, items: list, parts: list[bytes]):
+        """Append the JSON of a list to `parts`"""
+        parts.append(b"[")
+        if type(items) is EncodedList and items.count:
+            for i, chunk in enumerate(items.head):
+                parts.append(chunk if i == 0 else b"," + chunk)
+            rest = items[items.count:]
+            if rest:
+                parts.append(b",")
+                parts.append(self._encode_items(rest))
+        else:
+            parts.append(self._encode_items(items))
+        parts.append(b"]")
+    
+    def _encode_items(self, items: list) -> bytes:
+        """
+        JSON of list items joined by commas, reusing pre-encoded items
+        (system block / message, history messages). Runs of other items are
+        encoded in one call.
+        """
+        fragments = self._fragments
+        parts = []
+        pending = []  # Consecutive items without an encoding, dumped together
+        for item in items:
+            encoded = item.json if type(item) is EncodedDict else fragments.get(id(item))
+            if encoded is None:
+                pending.append(item)
+                continue
+            if pending:
+                parts.append(dumps(pending)[1:-1])
+                pending = []
+            parts.append(encoded)
+        
+        if pending:
+            parts.append(dumps(pending)[1:-1])
+        return b",".join(parts)
+
+
+# Templates by the config fields they are compiled from
+_templates: dict[tuple, RequestTemplate] = {}
+
+
+def get_request_template(config: LLMConfig, system_prompt: str) -> RequestTemplate:
+    """Get the shared request template for a provider config"""
+    key = (
+        config.provider, config.base_url, config.api_key, config.model,
+        config.max_tokens, config.temperature, config.prompt_cache, system_prompt,
+    )
+    template = _templates.get(key)
+    if template is None:
+        template = _templates[key] = RequestTemplate(config, system_prompt)
+    return template
+
+
+def reset_request_templates():
+    """Forget compiled templates (e.g. after the prompt bundle changed)"""
+    _templates.clear()
@@ -0,0 +1,150 @@
+"""
+Retry policy and circuit breaker for LLM provider calls.
+
+- RetryPolicy: exponential backoff with full jitter, honouring
+  `Retry-After`, bounded by a retry count and a total time budget
+- CircuitBreaker: stops calling a provider after repeated failures and
+  lets a single probe through once the reset timeout has passed
+"""
+
+import random
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Mapping, Optional
+
+from config import LLMConfig
+from .exceptions import LLMException
+
+# Statuses worth retrying: throttling, timeouts and server-side failures
+# (529 is Anthropic's "overloaded")
+RETRYABLE_STATUS = frozenset({408, 429, 500, 502, 503, 504, 529})
+
+
+def parse_retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    """Seconds to wait from `retry-after-ms` / `Retry-After` (seconds or HTTP date)"""
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return max(0.0, float(value) / 1000)
+        except ValueError:
+            pass
+    
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass
+class RetryPolicy:
+    """Exponential backoff with full jitter"""
+    max_retries: int = 3
+    base_delay: float = 0.5  # Seconds
+    max_delay: float = 20.0  # Cap for a single backoff
+    max_total: float = 60.0  # Budget for all attempts of one call
+    
+    @classmethod
+    def from_config(cls, config: LLMConfig) -> "RetryPolicy":
+        return cls(
+            max_retries=config.max_retries,
+            base_delay=config.retry_base_delay,
+            max_delay=config.retry_max_delay,
+            max_total=config.retry_max_total,
+        )
+    
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Delay before retry number `attempt` (0-based)"""
+        if retry_after is not None:
+            return retry_after
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+
+class CircuitBreaker:
+    """
+    Per-provider circuit breaker.
+    
+    Opens after `failure_threshold` consecutive failures. While open,
+    calls fail fast; after `reset_timeout` seconds one probe call is let
+    through (half-open) and its outcome closes or re-opens the circuit.
+    A probe that ends without an outcome (cancelled) must `release()`
+    its slot so the next call can probe instead.
+    """
+    
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+    
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+    
+    def check(self) -> bool:
+        """
+        Raise LLMException if calls to the provider are currently blocked.
+        Returns True if this call is the half-open probe.
+        """
+        state = self.state
+        if state == "closed":
+            return False
+        if state == "half_open" and not self._probing:
+            self._probing = True
+            return True
+        
+        remaining = max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+        raise LLMException(
+            f"Circuit open for {self.name} after {self.failures} failures; retry in {remaining:.0f}s",
+            provider=self.name,
+        )
+    
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+    
+    def record_failure(self):
+        self.failures += 1
+        if self._probing or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+        self._probing = False
+    
+    def release(self):
+        """Free the probe slot without an outcome (the probe was cancelled)"""
+        self._probing = False
+
+
+# Breakers by provider: every agent of a worker sees the same outage
+_breakers: dict[str, CircuitBreaker] = {}
+
+
+def get_circuit_breaker(config: LLMConfig) -> CircuitBreaker:
+    """Get the shared circuit breaker for a provider"""
+    key = config.provider.value
+    breaker = _breakers.get(key)
+    if breaker is None:
+        breaker = _breakers[key] = CircuitBreaker(
+            key,
+            failure_threshold=config.circuit_failure_threshold,
+            reset_timeout=config.circuit_reset_timeout,
+        )
+    return breaker
+
+
+def reset_circuit_breakers():
+    """Forget all breaker state (e.g. between benchmark runs)"""
+    _breakers.clear()
@@ -0,0 +1,100 @@
+"""
+Deterministic LLM response cache.
+
+Responses are keyed on a hash of the provider request body (model,
+messages, tools, generation settings) as encoded by the agent's request
+template, so an identical request is answered locally. Only
+deterministic requests (temperature 0) are cached unless caching is
+forced, e.g. for replaying recorded traffic.
+"""
+
+import hashlib
+from dataclasses import dataclass
+from typing import Optional
+
+from .cache import TieredCache, build_cache
+
+# Transport-only fields that do not change the answer
+_IGNORED_FIELDS = ("stream", "stream_options")
+
+
+@dataclass
+class CachedResponse:
+    """A provider response reduced to what the agent needs"""
+    content: str
+    tool_calls: list[dict]  # {"id", "name", "arguments"}
+    usage: dict  # Raw provider usage of the original call
+
+
+class ResponseCache:
+    """
+    Cache of LLM responses in front of the provider API.
+    
+    Streaming and non-streaming requests share entries. `stats` counts
+    hits and misses of cacheable requests; `bypassed` counts requests
+    skipped because they are not deterministic.
+    """
+    
+    def __init__(self, cache: TieredCache, force: bool = False):
+        self.cache = cache
+        self.force = force
+        self.bypassed = 0
+    
+    @property
+    def stats(self):
+        return self.cache.stats
+    
+    @staticmethod
+    def cache_payload(body: dict) -> dict:
+        """The part of a request body that determines the answer (transport flags dropped)"""
+        return {k: v for k, v in body.items() if k not in _IGNORED_FIELDS}
+    
+    @staticmethod
+    def make_key(provider: str, encoded: bytes) -> str:
+        """Hash of an encoded `cache_payload`.
+        
+        The encoding must be deterministic; the agent passes the bytes of
+        its request template, which reuses the pre-encoded history, so
+        keying a turn costs no more than sending it.
+        """
+        digest = hashlib.sha256(provider.encode("utf-8") + b"\0")
+        digest.update(encoded)
+        return digest.hexdigest()
+    
+    def is_cacheable(self, body: dict) -> bool:
+        """Only deterministic requests are cached unless forced"""
+        if self.force or not body.get("temperature"):
+            return True
+        self.bypassed += 1
+        return False
+    
+    def get(self, key: str) -> Optional[CachedResponse]:
+        value = self.cache.get(key)
+        return CachedResponse(**value) if value is not None else None
+    
+    def set(self, key: str, content: str, tool_calls: list[dict], usage: Optional[dict]):
+        self.cache.set(key, {
+            "content": content,
+            "tool_calls": tool_calls,
+            "usage": usage or {},
+        })
+    
+    def as_dict(self) -> dict:
+        """Hit-rate metrics"""
+        data = self.stats.as_dict()
+        data["bypassed"] = self.bypassed
+        return data
+
+
+def build_response_cache(
+    max_entries: int = 1024,
+    ttl: Optional[float] = 3600.0,
+    path: Optional[str] = None,
+    disk_max_entries: int = 100_000,
+    force: bool = False,
+) -> ResponseCache:
+    """Create a response cache in memory, backed by SQLite when `path` is given"""
+    return ResponseCache(
+        build_cache(max_entries=max_entries, ttl=ttl, path=path, disk_max_entries=disk_max_entries),
+        force=force,
+    )
@@ -0,0 +1,207 @@
+"""
+Multi-provider routing for LLM calls.
+
+- Failover: providers are tried in the configured order, skipping ahead
+  when one is down (network errors, 5xx, throttling, open circuit)
+- Hedging: when the current provider has not sent its first byte within
+  a percentile of its recent first-byte latencies, the same request is
+  sent to the next provider and whichever answers first wins
+"""
+
+import asyncio
+from collections import deque
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from config import LLMConfig, ROUTER_CONFIG, get_fallback_configs
+from .exceptions import LLMException
+from .resilience import RETRYABLE_STATUS, get_circuit_breaker
+
+T = TypeVar("T")
+
+# Errors another provider may not have: outages, throttling, bad credentials
+FAILOVER_STATUS = RETRYABLE_STATUS | {401, 403}
+
+
+def should_failover(error: LLMException) -> bool:
+    """Whether a failed call is worth repeating on another provider"""
+    return error.status_code is None or error.status_code in FAILOVER_STATUS
+
+
+class LatencyTracker:
+    """Sliding window of first-byte latencies for one provider"""
+    
+    def __init__(self, size: int = 200):
+        self.samples: deque[float] = deque(maxlen=size)
+    
+    def __len__(self) -> int:
+        return len(self.samples)
+    
+    def add(self, seconds: float):
+        self.samples.append(seconds)
+    
+    def percentile(self, pct: float) -> float:
+        ordered = sorted(self.samples)
+        index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+        return ordered[index]
+
+
+class ProviderRouter:
+    """
+    Ordered list of provider configs with failover and optional hedging.
+    
+    Shared by all agents of a process (e.g. server sessions) so latency
+    statistics reflect real traffic.
+    """
+    
+    def __init__(
+        self,
+        configs: list[LLMConfig],
+        hedge: bool = False,
+        hedge_percentile: float = 95.0,
+        hedge_min_delay: float = 0.2,
+        hedge_max_delay: float = 5.0,
+        hedge_min_samples: int = 20,
+        failover_retries: int = 1,
+    ):
+        if not configs:
+            raise ValueError("At least one provider config is required")
+        self.configs = configs
+        self.hedge_enabled = hedge and len(configs) > 1
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_max_delay = hedge_max_delay
+        self.hedge_min_samples = hedge_min_samples
+        self.failover_retries = failover_retries
+        self.latency = {config.provider.value: LatencyTracker() for config in configs}
+        
+        # Counters
+        self.failovers = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+    
+    @classmethod
+    def from_config(cls, primary: LLMConfig) -> Optional["ProviderRouter"]:
+        """Create a router from ROUTER_CONFIG, or None if no fallback providers are set"""
+        fallbacks = get_fallback_configs(primary)
+        if not fallbacks:
+            return None
+        
+        return cls(
+            [primary] + fallbacks,
+            hedge=ROUTER_CONFIG.get("hedge", False),
+            hedge_percentile=ROUTER_CONFIG.get("hedge_percentile", 95.0),
+            hedge_min_delay=ROUTER_CONFIG.get("hedge_min_delay", 0.2),
+            hedge_max_delay=ROUTER_CONFIG.get("hedge_max_delay", 5.0),
+            failover_retries=ROUTER_CONFIG.get("failover_retries", 1),
+        )
+    
+    @property
+    def primary(self) -> LLMConfig:
+        return self.configs[0]
+    
+    def candidates(self) -> list[LLMConfig]:
+        """Providers in configured order, those with an open circuit last"""
+        healthy = [c for c in self.configs if get_circuit_breaker(c).state != "open"]
+        return healthy + [c for c in self.configs if c not in healthy]
+    
+    def record_first_byte(self, provider: str, seconds: float):
+        tracker = self.latency.get(provider)
+        if tracker is not None:
+            tracker.add(seconds)
+    
+    def hedge_delay(self, config: LLMConfig) -> float:
+        """How long to wait for a first byte before sending a hedge request"""
+        tracker = self.latency[config.provider.value]
+        if len(tracker) < self.hedge_min_samples:
+            return self.hedge_max_delay
+        delay = tracker.percentile(self.hedge_percentile)
+        return min(self.hedge_max_delay, max(self.hedge_min_delay, delay))
+    
+    async def hedge(
+        self,
+        primary: Callable[[], Awaitable[T]],
+        backup: Callable[[], Awaitable[T]],
+        delay: float,
+    ) -> T:
+        """
+        Run `primary`; if it has not finished after `delay`, also run
+        `backup` and return the first successful result.
+        
+        The losing call is cancelled; if it was a half-open circuit probe,
+        `_send` releases the probe slot. If both fail, the last error is raised.
+        """
+        first = asyncio.ensure_future(primary())
+        try:
+            done, _ = await asyncio.wait({first}, timeout=delay)
+        except asyncio.CancelledError:
+            first.cancel()
+            raise
+        if done:
+            return first.result()
+        
+        self.hedges += 1
+        second = asyncio.ensure_future(backup())
+        pending = {first, second}
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is second:
+                            self.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+    
+    async def call(self, attempt: Callable[[LLMConfig, bool], Awaitable[T]], hedge: bool = True) -> T:
+        """
+        Run `attempt(config, last)` against providers until one succeeds.
+        
+        `last` tells the attempt whether another provider remains (used to
+        limit retries before failing over). Non-failover errors, e.g. an
+        invalid request, are raised immediately.
+        """
+        candidates = self.candidates()
+        error: Optional[LLMException] = None
+        index = 0
+        
+        while index < len(candidates):
+            config = candidates[index]
+            last = index == len(candidates) - 1
+            hedged = hedge and self.hedge_enabled and not last
+            backup_started = False
+            
+            async def run_backup():
+                nonlocal backup_started
+                backup_started = True
+                return await attempt(candidates[index + 1], index + 2 == len(candidates))
+            
+            try:
+                if hedged:
+                    return await self.hedge(lambda: attempt(config, False), run_backup, self.hedge_delay(config))
+                return await attempt(config, last)
+            except LLMException as e:
+                if not should_failover(e):
+                    raise
+                error = e
+                # A failed hedge already tried the backup provider too
+                index += 2 if backup_started else 1
+                if index < len(candidates):
+                    self.failovers += 1
+        
+        raise error
+    
+    def as_dict(self) -> dict:
+        """Routing metrics"""
+        return {
+            "providers": [c.provider.value for c in self.configs],
+            "failovers": self.failovers,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "hedge_delay": {c.provider.value: round(self.hedge_delay(c), 4) for c in self.configs},
+        }
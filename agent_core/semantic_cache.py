@@ -0,0 +1,230 @@
+"""
+Semantic cache for near-duplicate questions.
+
+User messages are normalized (stop words dropped, calorie synonyms
+unified) and embedded with hashed word and character n-gram features,
+so "bao nhiêu calo trong phở bò" and "phở bò có mấy calo" land on the
+same vector. A nearest-neighbour search over cached single-turn answers
+returns the best answer above a similarity threshold.
+
+The embedder is CPU-only and deterministic across processes (CRC32
+feature hashing). Accents are kept on purpose: "bò" (beef) and "bơ"
+(avocado) must not collide.
+"""
+
+import math
+import re
+import time
+import unicodedata
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from .cache import CacheStats
+from .food_db import load_numpy
+
+_TOKEN_RE = re.compile(r"\w+")
+_CLAUSE_RE = re.compile(r"[.,;:!?\n]+")
+
+# Question filler that does not change what is being asked
+STOP_WORDS = frozenset("""
+    bao nhiêu có mấy trong là gì cho tôi mình em anh chị hỏi của một thì vậy nhỉ ạ à
+    không được với và hãy giúp biết cái món ăn chứa khoảng chừng xin vui lòng bạn ơi
+    how many much is in the of a an what does do contain
+""".split())
+
+# Words with the same meaning in nutrition questions
+SYNONYMS = {
+    "calories": "calo",
+    "calorie": "calo",
+    "cal": "calo",
+    "kcal": "calo",
+    "calo": "calo",
+    "đạm": "protein",
+    "béo": "fat",
+}
+
+# "không nên ăn" (negation) vs. "có nên ăn ... không" (question particle):
+# a negator counts only when a word other than a final particle follows it
+NEGATORS = frozenset("không chưa đừng chẳng not never".split())
+FINAL_PARTICLES = frozenset("ạ à nhỉ nhé vậy hả hở thế chứ".split())
+
+WORD_WEIGHT = 2.0  # Whole words count more than their character n-grams
+
+
+def normalize_question(text: str) -> list[str]:
+    """Lowercase, tokenize, drop stop words and unify synonyms"""
+    text = unicodedata.normalize("NFC", text).lower()
+    tokens = []
+    for token in _TOKEN_RE.findall(text):
+        if token in STOP_WORDS:
+            continue
+        tokens.append(SYNONYMS.get(token, token))
+    return tokens
+
+
+def negated_words(text: str) -> frozenset:
+    """Words under negation ("không nên ăn" -> {"nên"}), per clause"""
+    negated = set()
+    for clause in _CLAUSE_RE.split(unicodedata.normalize("NFC", text).lower()):
+        tokens = _TOKEN_RE.findall(clause)
+        for token, following in zip(tokens, tokens[1:]):
+            if token in NEGATORS and following not in FINAL_PARTICLES and following not in NEGATORS:
+                negated.add(SYNONYMS.get(following, following))
+    return frozenset(negated)
+
+
+def embed(tokens: list[str], dim: int) -> dict[int, float]:
+    """Hashed word + character trigram embedding as a unit-length sparse vector"""
+    vector: dict[int, float] = {}
+    for token in tokens:
+        features = [(token, WORD_WEIGHT)]
+        padded = f"#{token}#"
+        features.extend((padded[i:i + 3], 1.0) for i in range(len(padded) - 2))
+        for feature, weight in features:
+            slot = zlib.crc32(feature.encode("utf-8")) % dim
+            vector[slot] = vector.get(slot, 0.0) + weight
+    
+    norm = math.sqrt(sum(v * v for v in vector.values()))
+    if norm:
+        vector = {k: v / norm for k, v in vector.items()}
+    return vector
+
+
+@dataclass
+class SemanticMatch:
+    """A cached answer for a similar question"""
+    question: str
+    answer: str
+    score: float
+
+
+class SemanticCache:
+    """
+    Bounded nearest-neighbour cache of question -> answer.
+    
+    Vectors live in a fixed (max_entries, dim) NumPy matrix, searched
+    with one matrix-vector product; without NumPy, sparse dot products
+    are used. The least recently used entry is evicted when full.
+    Questions with numbers (portions like "200g") only match questions
+    with the same numbers, and negated questions ("không nên ăn ...")
+    only questions negating the same words, since the feature vectors
+    cannot tell them apart.
+    """
+    
+    def __init__(
+        self,
+        threshold: float = 0.92,
+        max_entries: int = 2048,
+        ttl: Optional[float] = 86400.0,
+        dim: int = 1024,
+    ):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.dim = dim
+        self.stats = CacheStats()
+        
+        # key (normalized question) -> slot, in LRU order
+        self._slots: OrderedDict[str, int] = OrderedDict()
+        self._entries: list[Optional[tuple[str, str, frozenset, Optional[float]]]] = [None] * max_entries
+        self._free = list(range(max_entries - 1, -1, -1))
+        self._np = np = load_numpy()
+        if np is not None:
+            self._matrix = np.zeros((max_entries, dim), dtype=np.float32)
+        else:
+            self._vectors: list[dict[int, float]] = [{} for _ in range(max_entries)]
+    
+    def __len__(self) -> int:
+        return len(self._slots)
+    
+    def _prepare(self, question: str) -> tuple[str, dict[int, float], frozenset]:
+        """Normalized key, vector, and the guards a match must share (numbers, negations)"""
+        tokens = normalize_question(question)
+        guards = frozenset(t for t in tokens if any(ch.isdigit() for ch in t))
+        guards |= {f"không {word}" for word in negated_words(question)}
+        return " ".join(tokens), embed(tokens, self.dim), guards
+    
+    def _scores(self, vector: dict[int, float]) -> list[tuple[float, int]]:
+        """Similarity of every occupied slot, best first"""
+        np = self._np
+        if np is not None:
+            query = np.zeros(self.dim, dtype=np.float32)
+            query[list(vector)] = list(vector.values())
+            scores = self._matrix @ query
+            order = np.argsort(scores)[::-1][:8]
+            return [(float(scores[i]), int(i)) for i in order if scores[i] > 0]
+        
+        scored = []
+        for slot in self._slots.values():
+            stored = self._vectors[slot]
+            score = sum(weight * stored.get(index, 0.0) for index, weight in vector.items())
+            scored.append((score, slot))
+        scored.sort(reverse=True)
+        return scored[:8]
+    
+    def get(self, question: str) -> Optional[SemanticMatch]:
+        """Return the cached answer of the most similar question, if close enough"""
+        key, vector, guards = self._prepare(question)
+        if not vector or not self._slots:
+            self.stats.misses += 1
+            return None
+        
+        now = time.time()
+        for score, slot in self._scores(vector):
+            if score < self.threshold:
+                break
+            entry = self._entries[slot]
+            if entry is None:
+                continue
+            entry_key, answer, entry_guards, expires_at = entry
+            if expires_at is not None and expires_at <= now:
+                self._remove(entry_key)
+                self.stats.expirations += 1
+                continue
+            if entry_guards != guards:
+                continue
+            
+            self._slots.move_to_end(entry_key)
+            self.stats.hits += 1
+            return SemanticMatch(question=entry_key, answer=answer, score=score)
+        
+        self.stats.misses += 1
+        return None
+    
+    def set(self, question: str, answer: str):
+        """Cache the answer to a single-turn question"""
+        key, vector, guards = self._prepare(question)
+        if not vector:
+            return
+        
+        if key in self._slots:
+            self._remove(key)
+        if not self._free:
+            oldest = next(iter(self._slots))
+            self._remove(oldest)
+            self.stats.evictions += 1
+        
+        slot = self._free.pop()
+        expires_at = time.time() + self.ttl if self.ttl else None
+        self._entries[slot] = (key, answer, guards, expires_at)
+        self._slots[key] = slot
+        
+        if self._np is not None:
+            self._matrix[slot, list(vector)] = list(vector.values())
+        else:
+            self._vectors[slot] = vector
+    
+    def _remove(self, key: str):
+        slot = self._slots.pop(key)
+        self._entries[slot] = None
+        if self._np is not None:
+            self._matrix[slot] = 0.0
+        else:
+            self._vectors[slot] = {}
+        self._free.append(slot)
+    
+    def clear(self):
+        for key in list(self._slots):
+            self._remove(key)
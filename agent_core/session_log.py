@@ -0,0 +1,155 @@
+"""
+Append-only on-disk session history.
+
+Completed turns are appended to a SQLite database as they happen, so an
+idle session can be dropped from memory (paged out) and resumed later,
+by any server process, from its log. Reads go through SQLite's
+memory-mapped I/O (`PRAGMA mmap_size`), so resuming a session is a
+single indexed range scan over mapped pages.
+
+Only user/assistant messages are logged; tool rounds are never part of
+the history (see `FoodNutritionAgent.chat`). The rolling summary is
+stored alongside so a resumed session keeps its older context.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Optional, Sequence
+
+
+@dataclass
+class SessionRecord:
+    """A logged session"""
+    messages: list[tuple[str, str]] = field(default_factory=list)  # (role, content)
+    summary: str = ""
+    summarized_count: int = 0
+    updated_at: Optional[float] = None  # Version of the logged session
+
+
+class SessionLog:
+    """
+    Session message log backed by SQLite.
+    
+    Messages are keyed by (session id, position in history) and only ever
+    inserted; a session is removed as a whole by `delete()` or, once idle
+    for `max_age` seconds, by `purge()`. WAL mode lets several processes
+    share one file; `updated_at()` tells a process whether another one
+    has changed a session since it last read or wrote it.
+    """
+    
+    def __init__(self, path: str, mmap_size: int = 256 * 1024 * 1024):
+        self.path = path
+        self._lock = threading.Lock()
+        
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        
+        self._conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(f"PRAGMA mmap_size={int(mmap_size)}")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS messages ("
+            " session_id TEXT NOT NULL,"
+            " seq INTEGER NOT NULL,"
+            " role TEXT NOT NULL,"
+            " content TEXT NOT NULL,"
+            " PRIMARY KEY (session_id, seq)) WITHOUT ROWID"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            " session_id TEXT PRIMARY KEY,"
+            " summary TEXT NOT NULL,"
+            " summarized_count INTEGER NOT NULL,"
+            " updated_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS sessions_updated ON sessions (updated_at)")
+    
+    def __len__(self) -> int:
+        """Number of logged sessions"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+    
+    def append(
+        self,
+        session_id: str,
+        start: int,
+        messages: Sequence,
+        summary: str = "",
+        summarized_count: int = 0,
+    ) -> float:
+        """
+        Log `messages` (objects with `role` and `content`) as history
+        positions `start`, `start + 1`, ... and record the current summary.
+        Returns the session's new `updated_at`.
+        """
+        rows = [(session_id, start + i, msg.role, msg.content) for i, msg in enumerate(messages)]
+        updated_at = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO messages (session_id, seq, role, content) VALUES (?, ?, ?, ?)",
+                    rows,
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO sessions (session_id, summary, summarized_count, updated_at)"
+                    " VALUES (?, ?, ?, ?)",
+                    (session_id, summary, summarized_count, updated_at),
+                )
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+        return updated_at
+    
+    def load(self, session_id: str) -> Optional[SessionRecord]:
+        """The logged history of a session, or None if it is not logged"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT summary, summarized_count, updated_at FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            messages = self._conn.execute(
+                "SELECT role, content FROM messages WHERE session_id = ? ORDER BY seq", (session_id,)
+            ).fetchall()
+        return SessionRecord(messages=messages, summary=row[0], summarized_count=row[1], updated_at=row[2])
+    
+    def updated_at(self, session_id: str) -> Optional[float]:
+        """When a session was last logged, or None if it is not logged"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT updated_at FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        return row[0] if row is not None else None
+    
+    def delete(self, session_id: str) -> bool:
+        """Remove a session; returns whether it was logged"""
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+            deleted = self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,)).rowcount
+            self._conn.execute("COMMIT")
+        return deleted > 0
+    
+    def purge(self, max_age: float) -> int:
+        """Remove sessions not updated for `max_age` seconds"""
+        deadline = time.time() - max_age
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.execute(
+                "DELETE FROM messages WHERE session_id IN ("
+                " SELECT session_id FROM sessions WHERE updated_at < ?)",
+                (deadline,),
+            )
+            removed = self._conn.execute("DELETE FROM sessions WHERE updated_at < ?", (deadline,)).rowcount
+            self._conn.execute("COMMIT")
+        return removed
+    
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,160 @@
+"""
+Per-session agent state for server mode.
+
+Each session owns a FoodNutritionAgent (its conversation history), while
+the HTTP client and tools are shared. Idle sessions are evicted after
+`idle_timeout` seconds and the least recently used ones once
+`max_sessions` is reached.
+
+With a `SessionLog`, eviction only pages a session out of memory: its
+turns are already on disk, and the next request for its id resumes it.
+When several worker processes share the log (`shared=True`), a session
+can be served by any of them: a resident copy is reloaded whenever
+another worker has logged newer turns for it.
+"""
+
+import asyncio
+import secrets
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+from .agent import FoodNutritionAgent
+from .session_log import SessionLog
+
+
+@dataclass
+class Session:
+    """A conversation session"""
+    id: str
+    agent: FoodNutritionAgent
+    created_at: float = field(default_factory=time.monotonic)
+    last_used: float = field(default_factory=time.monotonic)
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)  # One turn at a time
+    
+    def touch(self):
+        self.last_used = time.monotonic()
+
+
+class SessionStore:
+    """
+    In-memory session store with idle eviction (and optional paging to a log).
+    
+    Usage:
+        store = SessionStore(lambda: FoodNutritionAgent(config, http_client=client))
+        session = store.get_or_create(session_id)
+        async with session.lock:
+            await session.agent.chat(message)
+    """
+    
+    def __init__(
+        self,
+        agent_factory: Callable[[], FoodNutritionAgent],
+        idle_timeout: float = 1800.0,
+        max_sessions: int = 10_000,
+        log: Optional[SessionLog] = None,
+        log_max_age: Optional[float] = None,
+        shared: bool = False,
+    ):
+        self.agent_factory = agent_factory
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self.log = log
+        self.log_max_age = log_max_age  # Logged sessions unused for longer are purged
+        self.shared = shared and log is not None  # Other processes write to the same log
+        self.resumed = 0  # Sessions paged back in from the log
+        self._sessions: OrderedDict[str, Session] = OrderedDict()
+        self._evictor: Optional[asyncio.Task] = None
+    
+    def __len__(self) -> int:
+        return len(self._sessions)
+    
+    def get(self, session_id: str) -> Optional[Session]:
+        session = self._sessions.get(session_id)
+        if session is not None:
+            session.touch()
+            self._sessions.move_to_end(session_id)
+        return session
+    
+    def get_or_create(self, session_id: Optional[str] = None) -> Session:
+        """Return the session, resuming it from the log or creating it (with a new id if none given)"""
+        if session_id:
+            session = self.get(session_id)
+            if session is not None:
+                if self.shared and not session.lock.locked() and session.agent.sync_session_log():
+                    self.resumed += 1
+                return session
+        
+        session = Session(id=session_id or secrets.token_urlsafe(16), agent=self.agent_factory())
+        if self.log is not None and session.agent.attach_session_log(self.log, session.id):
+            self.resumed += 1
+        self._sessions[session.id] = session
+        
+        self._evict_overflow(keep=session)
+        return session
+    
+    def delete(self, session_id: str) -> bool:
+        """Drop a session, in memory and in the log"""
+        session = self._sessions.pop(session_id, None)
+        if session is not None:
+            session.agent.context.reset()
+        logged = self.log.delete(session_id) if self.log is not None else False
+        return session is not None or logged
+    
+    def _evict_overflow(self, keep: Session):
+        """Drop least recently used sessions beyond max_sessions, skipping `keep` and those mid-turn"""
+        excess = len(self._sessions) - self.max_sessions
+        if excess <= 0:
+            return
+        # Busy sessions stay (the store may briefly exceed max_sessions)
+        victims = []
+        for sid, session in self._sessions.items():
+            if len(victims) == excess:
+                break
+            if session is not keep and not session.lock.locked():
+                victims.append(sid)
+        for sid in victims:
+            self._close(self._sessions.pop(sid))
+    
+    def evict_idle(self) -> int:
+        """Remove sessions idle for longer than idle_timeout"""
+        deadline = time.monotonic() - self.idle_timeout
+        expired = [
+            sid for sid, session in self._sessions.items()
+            if session.last_used < deadline and not session.lock.locked()
+        ]
+        for sid in expired:
+            self._close(self._sessions.pop(sid))
+        return len(expired)
+    
+    def _close(self, session: Session):
+        # Agents do not own the shared client; this only saves the latest
+        # summary to the log and cancels background work
+        if self.log is not None:
+            if self.shared:
+                session.agent.sync_session_log()
+            session.agent.save_history()
+        session.agent.context.reset()
+    
+    async def _evict_loop(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            self.evict_idle()
+            if self.log is not None and self.log_max_age:
+                self.log.purge(self.log_max_age)
+    
+    def start(self, interval: float = 60.0):
+        """Start periodic idle eviction"""
+        if self._evictor is None:
+            self._evictor = asyncio.create_task(self._evict_loop(interval))
+    
+    async def close(self):
+        """Stop eviction and drop all sessions"""
+        if self._evictor is not None:
+            self._evictor.cancel()
+            await asyncio.gather(self._evictor, return_exceptions=True)
+            self._evictor = None
+        for session in self._sessions.values():
+            self._close(session)
+        self._sessions.clear()
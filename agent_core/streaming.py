@@ -0,0 +1,188 @@
+"""
+Server-Sent Events parsing for streaming LLM responses.
+
+Supports OpenAI/Deepseek `chat/completions` chunks and Claude `messages`
+events. Text deltas are returned as they arrive; tool-call fragments are
+collected and reassembled once the stream ends.
+"""
+
+import json
+from typing import AsyncIterator, AsyncGenerator, Optional
+
+from .exceptions import LLMException
+
+
+async def iter_sse_events(lines: AsyncIterator[str]) -> AsyncGenerator[tuple[Optional[str], str], None]:
+    """
+    Group raw SSE lines into (event, data) pairs.
+    
+    Multi-line `data:` fields are joined with newlines as per the SSE spec.
+    Comment lines (starting with ':') are ignored.
+    """
+    event = None
+    data_lines = []
+    
+    async for line in lines:
+        if not line:
+            if data_lines:
+                yield event, "\n".join(data_lines)
+            event = None
+            data_lines = []
+            continue
+        
+        if line.startswith(":"):
+            continue
+        
+        field_name, _, value = line.partition(":")
+        if value.startswith(" "):
+            value = value[1:]
+        
+        if field_name == "event":
+            event = value
+        elif field_name == "data":
+            data_lines.append(value)
+    
+    if data_lines:
+        yield event, "\n".join(data_lines)
+
+
+class StreamParser:
+    """Base class for provider-specific stream parsers"""
+    
+    def __init__(self, provider: str):
+        self.provider = provider
+        self.content = ""
+        self.done = False
+        self.usage: dict = {}  # Raw provider usage, merged across events
+        self._tool_calls: dict[int, dict] = {}
+    
+    def feed(self, event: Optional[str], data: str) -> str:
+        """Consume one SSE event and return the text delta (may be empty)"""
+        raise NotImplementedError
+    
+    @property
+    def tool_calls(self) -> list[dict]:
+        """Reassembled tool calls as dicts with id, name and arguments"""
+        calls = []
+        for index in sorted(self._tool_calls):
+            tc = self._tool_calls[index]
+            raw_args = "".join(tc["arguments"]).strip()
+            try:
+                arguments = json.loads(raw_args) if raw_args else {}
+            except json.JSONDecodeError:
+                arguments = {}
+            calls.append({
+                "id": tc["id"],
+                "name": tc["name"],
+                "arguments": arguments,
+            })
+        return calls
+    
+    def replay(self, content: str, tool_calls: list[dict], usage: Optional[dict] = None):
+        """Fill the parser with a complete response (e.g. from a cache)"""
+        self.content = content
+        self.usage = dict(usage or {})
+        self._tool_calls = {
+            index: {"id": tc["id"], "name": tc["name"], "arguments": [json.dumps(tc["arguments"])]}
+            for index, tc in enumerate(tool_calls)
+        }
+        self.done = True
+    
+    def _tool_call_slot(self, index: int) -> dict:
+        return self._tool_calls.setdefault(index, {"id": "", "name": "", "arguments": []})
+    
+    def _load(self, data: str) -> dict:
+        try:
+            return json.loads(data)
+        except json.JSONDecodeError:
+            raise LLMException(
+                f"Invalid stream chunk: {data[:200]}",
+                provider=self.provider,
+            )
+
+
+class OpenAIStreamParser(StreamParser):
+    """Parser for OpenAI/Deepseek `chat/completions` streams"""
+    
+    def feed(self, event: Optional[str], data: str) -> str:
+        if data.strip() == "[DONE]":
+            self.done = True
+            return ""
+        
+        chunk = self._load(data)
+        if "error" in chunk:
+            raise LLMException(
+                f"Stream error: {chunk['error']}",
+                provider=self.provider,
+            )
+        
+        if chunk.get("usage"):
+            # Sent in the final chunk when stream_options.include_usage is set
+            self.usage = chunk["usage"]
+        
+        text = ""
+        for choice in chunk.get("choices", []):
+            delta = choice.get("delta") or {}
+            
+            if delta.get("content"):
+                text += delta["content"]
+            
+            for tc in delta.get("tool_calls") or []:
+                slot = self._tool_call_slot(tc.get("index", 0))
+                if tc.get("id"):
+                    slot["id"] = tc["id"]
+                func = tc.get("function") or {}
+                if func.get("name"):
+                    slot["name"] += func["name"]
+                if func.get("arguments"):
+                    slot["arguments"].append(func["arguments"])
+        
+        self.content += text
+        return text
+
+
+class ClaudeStreamParser(StreamParser):
+    """Parser for Claude `messages` streams"""
+    
+    def feed(self, event: Optional[str], data: str) -> str:
+        payload = self._load(data)
+        event_type = payload.get("type", event)
+        
+        if event_type == "error":
+            raise LLMException(
+                f"Stream error: {payload.get('error')}",
+                provider=self.provider,
+            )
+        
+        if event_type == "message_start":
+            self.usage.update(payload.get("message", {}).get("usage") or {})
+        
+        elif event_type == "message_delta":
+            self.usage.update(payload.get("usage") or {})
+        
+        elif event_type == "content_block_start":
+            block = payload.get("content_block", {})
+            if block.get("type") == "tool_use":
+                slot = self._tool_call_slot(payload.get("index", 0))
+                slot["id"] = block.get("id", "")
+                slot["name"] = block.get("name", "")
+                if block.get("input"):
+                    slot["arguments"].append(json.dumps(block["input"]))
+            elif block.get("type") == "text" and block.get("text"):
+                self.content += block["text"]
+                return block["text"]
+        
+        elif event_type == "content_block_delta":
+            delta = payload.get("delta", {})
+            if delta.get("type") == "text_delta":
+                text = delta.get("text", "")
+                self.content += text
+                return text
+            if delta.get("type") == "input_json_delta":
+                slot = self._tool_call_slot(payload.get("index", 0))
+                slot["arguments"].append(delta.get("partial_json", ""))
+        
+        elif event_type == "message_stop":
+            self.done = True
+        
+        return ""
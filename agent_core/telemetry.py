@@ -0,0 +1,326 @@
+"""
+Lightweight tracing and metrics for agent turns.
+
+Instrumented code opens spans with `span(name, **attributes)`:
+
+    agent.turn      one chat()/chat_stream() call (tool iterations, tokens, local skill)
+    llm.call        one model response (provider, tokens, cache hit, bytes)
+    llm.http        one HTTP attempt up to the response headers (status, request bytes)
+    tool.execute    one tool call
+    search.web      one web search (cache hit, result count)
+
+Finished spans update Prometheus counters/histograms (`render_prometheus()`)
+and can be exported as OTLP/JSON lines, the format read by the
+OpenTelemetry Collector's `otlpjsonfile` receiver.
+
+Telemetry is off unless TELEMETRY_ENABLED is set; `span()` then returns
+one shared no-op object, so instrumented code costs a flag check.
+"""
+
+import atexit
+import contextvars
+import json
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Optional
+
+from config import TELEMETRY_CONFIG
+
+# Upper bounds (seconds) of the duration histogram buckets
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Attributes used as metric labels, per span name
+SPAN_LABELS = {
+    "llm.call": ("provider",),
+    "llm.http": ("provider",),
+    "tool.execute": ("tool",),
+}
+
+# Span attribute -> token type label of agent_llm_tokens_total
+TOKEN_ATTRIBUTES = {
+    "prompt_tokens": "prompt",
+    "completion_tokens": "completion",
+    "cached_tokens": "cached",
+    "cache_write_tokens": "cache_write",
+}
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+
+
+class NoopSpan:
+    """Span returned while telemetry is disabled"""
+    
+    __slots__ = ()
+    recording = False
+    
+    def __enter__(self) -> "NoopSpan":
+        return self
+    
+    def __exit__(self, exc_type, exc, tb) -> None:
+        return None
+    
+    def set(self, key: str, value: Any):
+        pass
+    
+    def record_error(self, message: str):
+        pass
+
+
+NOOP_SPAN = NoopSpan()
+
+
+class Span:
+    """A timed operation with attributes, nested under the active span"""
+    
+    __slots__ = (
+        "telemetry", "name", "attributes", "trace_id", "span_id", "parent_id",
+        "start_ns", "end_ns", "error", "_token",
+    )
+    recording = True
+    
+    def __init__(self, telemetry: "Telemetry", name: str, attributes: dict):
+        parent = _current_span.get()
+        self.telemetry = telemetry
+        self.name = name
+        self.attributes = attributes
+        self.trace_id = parent.trace_id if parent is not None else f"{random.getrandbits(128):032x}"
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent.span_id if parent is not None else None
+        self.start_ns = 0
+        self.end_ns = 0
+        self.error: Optional[str] = None
+        self._token = None
+    
+    def __enter__(self) -> "Span":
+        self._token = _current_span.set(self)
+        self.start_ns = time.time_ns()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.end_ns = time.time_ns()
+        if exc_type is not None and self.error is None and not issubclass(exc_type, GeneratorExit):
+            self.error = f"{exc_type.__name__}: {exc}"
+        try:
+            _current_span.reset(self._token)
+        except ValueError:
+            # Exited from another context, e.g. an async generator closed by the GC
+            pass
+        self.telemetry.finish(self)
+    
+    @property
+    def duration(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e9
+    
+    def set(self, key: str, value: Any):
+        self.attributes[key] = value
+    
+    def record_error(self, message: str):
+        """Mark the span as failed without an exception leaving it"""
+        self.error = message
+    
+    def to_otlp(self) -> dict:
+        """Span in OTLP/JSON form"""
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [_otlp_attribute(key, value) for key, value in self.attributes.items()],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+def _otlp_attribute(key: str, value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense"""
+    
+    __slots__ = ("counts", "sum", "count")
+    
+    def __init__(self):
+        self.counts = [0] * len(DURATION_BUCKETS)
+        self.sum = 0.0
+        self.count = 0
+    
+    def observe(self, value: float):
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(DURATION_BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+
+class Telemetry:
+    """
+    Span sink and metric registry.
+    
+    Metrics are kept in plain dicts keyed by (metric, labels); finished
+    spans are kept in a bounded buffer and, when `export_path` is set,
+    appended to it in batches as OTLP/JSON lines.
+    """
+    
+    EXPORT_BATCH = 64
+    
+    def __init__(
+        self,
+        enabled: bool = False,
+        export_path: Optional[str] = None,
+        max_spans: int = 1000,
+        service_name: str = "food-nutrition-agent",
+    ):
+        self.enabled = enabled
+        self.export_path = export_path
+        self.service_name = service_name
+        self.spans: deque[Span] = deque(maxlen=max_spans)
+        self.counters: dict[tuple[str, tuple], float] = {}
+        self.histograms: dict[tuple[str, tuple], Histogram] = {}
+        self._pending: list[Span] = []
+        self._lock = threading.Lock()
+    
+    def span(self, name: str, **attributes):
+        if not self.enabled:
+            return NOOP_SPAN
+        return Span(self, name, attributes)
+    
+    def inc(self, metric: str, labels: tuple = (), value: float = 1.0):
+        key = (metric, labels)
+        self.counters[key] = self.counters.get(key, 0.0) + value
+    
+    def finish(self, span: Span):
+        """Record a finished span into metrics and the export buffer"""
+        attributes = span.attributes
+        labels = (("span", span.name),) + tuple(
+            (key, str(attributes.get(key, ""))) for key in SPAN_LABELS.get(span.name, ())
+        )
+        key = ("agent_span_duration_seconds", labels)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram()
+        histogram.observe(span.duration)
+        if span.error:
+            self.inc("agent_span_errors_total", labels)
+        
+        provider = (("provider", str(attributes.get("provider", ""))),)
+        if span.name == "llm.call":
+            for attribute, token_type in TOKEN_ATTRIBUTES.items():
+                if attributes.get(attribute):
+                    self.inc("agent_llm_tokens_total", provider + (("type", token_type),), attributes[attribute])
+            if "response_bytes" in attributes:
+                self.inc("agent_llm_response_bytes_total", provider, attributes["response_bytes"])
+            self._count_cache("response", attributes.get("cache_hit"))
+        elif span.name == "llm.http":
+            status = str(attributes.get("status_code", "error"))
+            self.inc("agent_llm_http_requests_total", provider + (("status", status),))
+            if "request_bytes" in attributes:
+                self.inc("agent_llm_request_bytes_total", provider, attributes["request_bytes"])
+        elif span.name == "agent.turn":
+            self.inc("agent_turns_total")
+            self.inc("agent_tool_iterations_total", value=attributes.get("tool_iterations", 0))
+            self._count_cache("semantic", attributes.get("semantic_cache_hit"))
+            if "skill" in attributes:
+                self.inc("agent_skill_answers_total", (("skill", str(attributes["skill"])),))
+        elif span.name == "search.web":
+            self._count_cache("search", attributes.get("cache_hit"))
+        
+        self.spans.append(span)
+        if self.export_path:
+            self._pending.append(span)
+            if len(self._pending) >= self.EXPORT_BATCH:
+                self.flush()
+    
+    def _count_cache(self, cache: str, hit: Optional[bool]):
+        if hit is None:
+            return
+        self.inc("agent_cache_lookups_total", (("cache", cache),))
+        if hit:
+            self.inc("agent_cache_hits_total", (("cache", cache),))
+    
+    def flush(self):
+        """Append buffered spans to `export_path` as one OTLP/JSON line"""
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if not pending or not self.export_path:
+            return
+        
+        line = json.dumps({"resourceSpans": [{
+            "resource": {"attributes": [_otlp_attribute("service.name", self.service_name)]},
+            "scopeSpans": [{
+                "scope": {"name": "agent_core"},
+                "spans": [span.to_otlp() for span in pending],
+            }],
+        }]}, ensure_ascii=False)
+        with open(self.export_path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+    
+    def render_prometheus(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        seen = set()
+        
+        for (metric, labels), value in sorted(self.counters.items()):
+            if metric not in seen:
+                seen.add(metric)
+                lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric}{_format_labels(labels)} {value:g}")
+        
+        for (metric, labels), histogram in sorted(self.histograms.items()):
+            if metric not in seen:
+                seen.add(metric)
+                lines.append(f"# TYPE {metric} histogram")
+            cumulative = 0
+            for bound, count in zip(DURATION_BUCKETS, histogram.counts):
+                cumulative += count
+                lines.append(f"{metric}_bucket{_format_labels(labels + (('le', f'{bound:g}'),))} {cumulative}")
+            lines.append(f"{metric}_bucket{_format_labels(labels + (('le', '+Inf'),))} {histogram.count}")
+            lines.append(f"{metric}_sum{_format_labels(labels)} {histogram.sum:.6f}")
+            lines.append(f"{metric}_count{_format_labels(labels)} {histogram.count}")
+        
+        return "\n".join(lines) + "\n"
+    
+    def reset(self):
+        self.spans.clear()
+        self.counters.clear()
+        self.histograms.clear()
+        self._pending = []
+
+
+def _format_labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape_label(value)}"' for key, value in labels) + "}"
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+telemetry = Telemetry(
+    enabled=TELEMETRY_CONFIG.get("enabled", False),
+    export_path=TELEMETRY_CONFIG.get("export_path"),
+    max_spans=TELEMETRY_CONFIG.get("max_spans", 1000),
+)
+if telemetry.export_path:
+    atexit.register(telemetry.flush)
+
+
+def span(name: str, **attributes):
+    """Open a span on the process-wide telemetry (a no-op when disabled)"""
+    if not telemetry.enabled:
+        return NOOP_SPAN
+    return Span(telemetry, name, attributes)
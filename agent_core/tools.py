@@ -3,11 +3,18 @@ Tools for AI Agent including web search capability.
 """
 
 import json
+import re
+import unicodedata
 import httpx
+from functools import lru_cache
 from typing import Optional
-from dataclasses import dataclass
+from dataclasses import dataclass, asdict
 
+from .cache import TieredCache
+from .food_db import FoodIndex, FoodMatch
+from .food_file import MappedFoodIndex, is_food_file
 from .exceptions import SearchException, ToolException
+from .telemetry import span
 
 
 @dataclass
@@ -26,18 +33,38 @@ class SearchResponse:
     results: list[SearchResult]
     
 
+def normalize_query(query: str) -> str:
+    """Normalize a search query for cache keys (NFC, lowercase, single spaces)"""
+    query = unicodedata.normalize("NFC", query).lower()
+    return re.sub(r"\s+", " ", query).strip()
+
+
 class WebSearchTool:
     """
     Web search tool using Serper API (Google Search).
     
+    Results are cached by normalized query and result count when a cache
+    is provided, so repeated questions skip the network round-trip.
+    
     Get your API key at: https://serper.dev/
     """
     
     SERPER_URL = "https://google.serper.dev/search"
     
-    def __init__(self, api_key: str, max_results: int = 5):
+    def __init__(
+        self,
+        api_key: str,
+        max_results: int = 5,
+        cache: Optional[TieredCache] = None,
+        url: Optional[str] = None,
+    ):
         self.api_key = api_key
         self.max_results = max_results
+        self.cache = cache
+        self.url = url or self.SERPER_URL  # Override to point at a proxy or local stand-in
+    
+    def _cache_key(self, query: str, num: int) -> str:
+        return f"{num}:{normalize_query(query)}"
         
     async def search(self, query: str, num_results: Optional[int] = None) -> SearchResponse:
         """
@@ -50,55 +77,73 @@ class WebSearchTool:
         Returns:
             SearchResponse with list of results
         """
-        if not self.api_key:
-            raise SearchException(
-                "SERPER_API_KEY is not configured. "
-                "Get your API key at https://serper.dev/"
-            )
-        
-        num = num_results or self.max_results
-        
-        headers = {
-            "X-API-KEY": self.api_key,
-            "Content-Type": "application/json",
-        }
-        
-        payload = {
-            "q": query,
-            "num": num,
-        }
-        
-        try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    self.SERPER_URL,
-                    headers=headers,
-                    json=payload,
-                    timeout=30.0,
+        with span("search.web") as search_span:
+            if not self.api_key:
+                raise SearchException(
+                    "SERPER_API_KEY is not configured. "
+                    "Get your API key at https://serper.dev/"
                 )
-                response.raise_for_status()
-                data = response.json()
-                
-        except httpx.HTTPStatusError as e:
-            raise SearchException(f"Search API error: {e.response.status_code}")
-        except httpx.RequestError as e:
-            raise SearchException(f"Search request failed: {str(e)}")
-        except json.JSONDecodeError:
-            raise SearchException("Failed to parse search response")
-        
-        # Parse results
-        results = []
-        organic = data.get("organic", [])
-        
-        for i, item in enumerate(organic[:num], 1):
-            results.append(SearchResult(
-                title=item.get("title", ""),
-                link=item.get("link", ""),
-                snippet=item.get("snippet", ""),
-                position=i,
-            ))
-        
-        return SearchResponse(query=query, results=results)
+            
+            num = num_results or self.max_results
+            
+            if self.cache is not None:
+                cached = self.cache.get(self._cache_key(query, num))
+                search_span.set("cache_hit", cached is not None)
+                if cached is not None:
+                    return SearchResponse(
+                        query=query,
+                        results=[SearchResult(**item) for item in cached["results"]],
+                    )
+            
+            headers = {
+                "X-API-KEY": self.api_key,
+                "Content-Type": "application/json",
+            }
+            
+            payload = {
+                "q": query,
+                "num": num,
+            }
+            
+            try:
+                async with httpx.AsyncClient() as client:
+                    response = await client.post(
+                        self.url,
+                        headers=headers,
+                        json=payload,
+                        timeout=30.0,
+                    )
+                    response.raise_for_status()
+                    search_span.set("response_bytes", len(response.content))
+                    data = response.json()
+                    
+            except httpx.HTTPStatusError as e:
+                raise SearchException(f"Search API error: {e.response.status_code}")
+            except httpx.RequestError as e:
+                raise SearchException(f"Search request failed: {str(e)}")
+            except json.JSONDecodeError:
+                raise SearchException("Failed to parse search response")
+            
+            # Parse results
+            results = []
+            organic = data.get("organic", [])
+            
+            for i, item in enumerate(organic[:num], 1):
+                results.append(SearchResult(
+                    title=item.get("title", ""),
+                    link=item.get("link", ""),
+                    snippet=item.get("snippet", ""),
+                    position=i,
+                ))
+            
+            search_span.set("results", len(results))
+            if self.cache is not None:
+                self.cache.set(
+                    self._cache_key(query, num),
+                    {"results": [asdict(r) for r in results]},
+                )
+            
+            return SearchResponse(query=query, results=results)
     
     def format_results(self, response: SearchResponse) -> str:
         """Format search results as readable text for the LLM"""
@@ -116,10 +161,34 @@ class WebSearchTool:
         return "\n".join(lines)
 
 
+@dataclass
+class MealItem:
+    """Nutrition of one food in a meal"""
+    food_name: str
+    portion_grams: float
+    matched_name: Optional[str] = None
+    nutrition: Optional[dict] = None
+
+
+@dataclass
+class MealNutrition:
+    """Per-item and total nutrition of a meal"""
+    items: list[MealItem]
+    totals: dict
+    
+    @property
+    def missing(self) -> list[str]:
+        return [item.food_name for item in self.items if item.nutrition is None]
+
+
 class NutritionCalculator:
     """
     Tool for calculating nutritional information of foods.
     Uses a basic database + web search for unknown foods.
+    
+    The built-in FOOD_DATABASE can be extended with a CSV or SQLite file
+    (see `agent_core.food_db`). Lookups go through an indexed FoodIndex
+    that is built once per database path and shared between instances.
     """
     
     # Basic nutrition data per 100g (calories, protein_g, fat_g, carbs_g)
@@ -138,20 +207,85 @@ class NutritionCalculator:
         "bún chả": {"calories": 350, "protein": 20, "fat": 15, "carbs": 35},
     }
     
+    def __init__(self, database_path: Optional[str] = None, fuzzy_threshold: Optional[float] = None):
+        self.database_path = database_path
+        self.fuzzy_threshold = fuzzy_threshold
+        self.index = load_food_index(database_path)
+    
     def lookup(self, food_name: str) -> dict | None:
-        """Look up nutrition info from database"""
-        food_lower = food_name.lower().strip()
+        """Look up nutrition info from database (accent- and typo-tolerant)"""
+        return self.index.lookup(food_name, fuzzy_threshold=self.fuzzy_threshold)
+    
+    def search(self, food_name: str, limit: int = 5) -> list[FoodMatch]:
+        """Search foods by name, best matches first"""
+        return self.index.search(food_name, limit=limit, fuzzy_threshold=self.fuzzy_threshold)
+    
+    def compute_meal(self, items: list[tuple[str, float]]) -> MealNutrition:
+        """
+        Compute nutrition for a whole meal in one batch.
+        
+        Args:
+            items: (food_name, portion_grams) pairs
+            
+        Returns:
+            MealNutrition with per-item values and totals. Foods that are not
+            in the database are kept with `nutrition=None` and left out of
+            the totals.
+        """
+        meal_items = []
+        rows = []
+        grams = []
+        found = []
         
-        # Direct match
-        if food_lower in self.FOOD_DATABASE:
-            return self.FOOD_DATABASE[food_lower]
+        for food_name, portion in items:
+            portion = float(portion or 100)
+            meal_items.append(MealItem(food_name=food_name, portion_grams=portion))
+            
+            matches = self.search(food_name, limit=1)
+            if matches:
+                meal_items[-1].matched_name = matches[0].name
+                rows.append(matches[0].food_id)
+                grams.append(portion)
+                found.append(meal_items[-1])
         
-        # Partial match
-        for key, value in self.FOOD_DATABASE.items():
-            if key in food_lower or food_lower in key:
-                return value
+        per_item, totals = self.index.nutrients.compute(rows, grams)
+        for item, nutrition in zip(found, per_item):
+            item.nutrition = nutrition
         
-        return None
+        return MealNutrition(items=meal_items, totals=totals)
+    
+    def format_meal(self, meal: MealNutrition) -> str:
+        """Format meal nutrition as a readable table"""
+        lines = [
+            "📊 **Thông tin dinh dưỡng bữa ăn**",
+            "",
+            "| Món | Khẩu phần | 🔥 Calories | 💪 Protein | 🧈 Fat | 🍚 Carbs |",
+            "|-----|-----------|-------------|------------|--------|----------|",
+        ]
+        
+        for item in meal.items:
+            if item.nutrition is None:
+                continue
+            n = item.nutrition
+            lines.append(
+                f"| {item.matched_name} | {item.portion_grams:g}g | {n['calories']:.1f} kcal "
+                f"| {n['protein']:.1f} g | {n['fat']:.1f} g | {n['carbs']:.1f} g |"
+            )
+        
+        t = meal.totals
+        lines.append(
+            f"| **Tổng cộng** | | **{t['calories']:.1f} kcal** | **{t['protein']:.1f} g** "
+            f"| **{t['fat']:.1f} g** | **{t['carbs']:.1f} g** |"
+        )
+        
+        if meal.missing:
+            lines.append("")
+            lines.append(
+                f"Không tìm thấy trong cơ sở dữ liệu: {', '.join(meal.missing)}. "
+                "Hãy sử dụng web_search để tìm kiếm thêm thông tin."
+            )
+        
+        return "\n".join(lines)
     
     def format_nutrition(self, food_name: str, data: dict, portion_grams: int = 100) -> str:
         """Format nutrition info as readable text"""
@@ -169,6 +303,22 @@ class NutritionCalculator:
 """
 
 
+@lru_cache(maxsize=8)
+def load_food_index(database_path: Optional[str] = None) -> FoodIndex:
+    """
+    Build the food index for the built-in database plus an optional file.
+    
+    A compiled food file (.fdb, see build_food_db.py) already contains the
+    built-in foods and is memory-mapped instead of loaded.
+    """
+    if is_food_file(database_path):
+        return MappedFoodIndex(database_path)
+    index = FoodIndex.from_dict(NutritionCalculator.FOOD_DATABASE)
+    if database_path:
+        index.load(database_path)
+    return index
+
+
 # Tool registry
 AVAILABLE_TOOLS = {
     "web_search": {
@@ -202,6 +352,34 @@ AVAILABLE_TOOLS = {
             },
             "required": ["food_name"]
         }
+    },
+    "meal_nutrition": {
+        "name": "meal_nutrition",
+        "description": "Tính dinh dưỡng cho cả bữa ăn gồm nhiều món trong một lần gọi (từng món và tổng cộng).",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "items": {
+                    "type": "array",
+                    "description": "Danh sách các món trong bữa ăn",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "food_name": {
+                                "type": "string",
+                                "description": "Tên món ăn"
+                            },
+                            "portion_grams": {
+                                "type": "integer",
+                                "description": "Khẩu phần tính bằng gram (mặc định 100g)"
+                            }
+                        },
+                        "required": ["food_name"]
+                    }
+                }
+            },
+            "required": ["items"]
+        }
     }
 }
 
@@ -0,0 +1,62 @@
+"""
+Token usage accounting across LLM providers.
+"""
+
+from dataclasses import dataclass, fields
+from typing import Optional
+
+
+@dataclass
+class TokenUsage:
+    """Token counts reported by the provider for one or more responses"""
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0  # Prompt tokens served from the provider's prompt cache
+    cache_write_tokens: int = 0  # Prompt tokens written to the cache (Claude)
+    
+    def __add__(self, other: "TokenUsage") -> "TokenUsage":
+        return TokenUsage(**{
+            f.name: getattr(self, f.name) + getattr(other, f.name)
+            for f in fields(self)
+        })
+    
+    @property
+    def cache_hit_rate(self) -> float:
+        return self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0.0
+    
+    def __str__(self) -> str:
+        return (
+            f"prompt {self.prompt_tokens} (cached {self.cached_tokens}), "
+            f"completion {self.completion_tokens}"
+        )
+
+
+def parse_usage(provider: str, usage: Optional[dict]) -> TokenUsage:
+    """
+    Normalize a provider `usage` object.
+    
+    - OpenAI: prompt_tokens, completion_tokens, prompt_tokens_details.cached_tokens
+    - Deepseek: same, plus prompt_cache_hit_tokens
+    - Claude: input_tokens (uncached part), cache_read_input_tokens,
+      cache_creation_input_tokens, output_tokens
+    """
+    if not usage:
+        return TokenUsage()
+    
+    if provider == "claude":
+        cached = usage.get("cache_read_input_tokens") or 0
+        written = usage.get("cache_creation_input_tokens") or 0
+        return TokenUsage(
+            prompt_tokens=(usage.get("input_tokens") or 0) + cached + written,
+            completion_tokens=usage.get("output_tokens") or 0,
+            cached_tokens=cached,
+            cache_write_tokens=written,
+        )
+    
+    details = usage.get("prompt_tokens_details") or {}
+    cached = details.get("cached_tokens") or usage.get("prompt_cache_hit_tokens") or 0
+    return TokenUsage(
+        prompt_tokens=usage.get("prompt_tokens") or 0,
+        completion_tokens=usage.get("completion_tokens") or 0,
+        cached_tokens=cached,
+    )
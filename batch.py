@@ -0,0 +1,62 @@
+"""
+Food Nutrition AI Agent - Batch Entry Point
+
+Analyzes a whole menu from a CSV or JSONL file and writes one JSONL
+record per dish. Rerunning with the same output file resumes where the
+previous run stopped.
+
+Run:
+    python batch.py menu.csv -o results.jsonl --workers 8
+"""
+
+import argparse
+import asyncio
+
+from rich.console import Console
+
+from config import get_llm_config, BATCH_CONFIG
+from agent_core.batch import BatchPipeline, BatchResult
+
+console = Console()
+
+
+def print_result(result: BatchResult):
+    """Print one line per finished dish"""
+    if result.status != "ok":
+        console.print(f"[red]✗ {result.id} {result.dish}: {result.error}[/red]")
+    elif result.source == "database":
+        console.print(f"[green]✓ {result.id} {result.dish}[/green] [dim](database: {result.matched_name})[/dim]")
+    else:
+        console.print(f"[green]✓ {result.id} {result.dish}[/green] [dim](LLM, {result.elapsed_ms:.0f}ms)[/dim]")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Batch nutrition analysis for dish lists")
+    parser.add_argument("input", help="CSV or JSONL file with a dish/name column")
+    parser.add_argument("-o", "--output", default="results.jsonl", help="JSONL output (also the checkpoint)")
+    parser.add_argument("-w", "--workers", type=int, default=BATCH_CONFIG.get("workers", 8))
+    parser.add_argument("--provider", default=None, help="Override LLM_PROVIDER")
+    parser.add_argument("--no-resume", action="store_true", help="Overwrite the output instead of resuming")
+    args = parser.parse_args()
+    
+    try:
+        config = get_llm_config(args.provider)
+    except ValueError as e:
+        console.print(f"[red]❌ Configuration Error: {e}[/red]")
+        return
+    
+    pipeline = BatchPipeline(config, workers=args.workers, on_result=print_result)
+    stats = await pipeline.run(args.input, args.output, resume=not args.no_resume)
+    
+    console.print()
+    console.print(
+        f"[bold]Hoàn thành {stats.total} món[/bold] trong {stats.elapsed:.1f}s: "
+        f"{stats.from_database} từ database, {stats.from_skill} từ skill, {stats.from_llm} qua LLM, "
+        f"{stats.skipped} đã có từ lần chạy trước, {stats.errors} lỗi"
+    )
+    console.print(f"[dim]Tokens: {stats.usage}[/dim]")
+    console.print(f"[dim]Kết quả: {args.output}[/dim]")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,3 @@
+"""
+Benchmarks and local stub servers for the AI Agent.
+"""
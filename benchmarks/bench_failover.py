@@ -0,0 +1,121 @@
+"""
+Multi-provider routing: single provider vs failover vs failover + hedging.
+
+The primary stub (OpenAI format) fails with 503 at `--error-rate` and
+answers slowly (`--slow-latency`) for `--slow-rate` of requests; the
+fallback stub (Claude format) is healthy. Concurrent users then send
+single-turn questions.
+
+Usage:
+    python -m benchmarks.bench_failover --agents 10 --turns 40
+"""
+
+import argparse
+import asyncio
+import time
+
+from config import LLMConfig, LLMProvider
+from agent_core import FoodNutritionAgent, LLMException, create_http_client
+from agent_core.ratelimit import reset_rate_limiters
+from agent_core.resilience import reset_circuit_breakers
+from agent_core.router import ProviderRouter
+from benchmarks.stub_llm import StubLLMServer
+from benchmarks.bench_http_pool import percentile
+
+
+def stub_config(provider: LLMProvider, server: StubLLMServer, pool: int) -> LLMConfig:
+    return LLMConfig(
+        provider=provider,
+        api_key="stub",
+        model="stub-model",
+        base_url=server.base_url,
+        max_connections=pool,
+        max_keepalive_connections=pool,
+        max_retries=0,
+        circuit_failure_threshold=1000,
+    )
+
+
+async def run(primary: StubLLMServer, fallback: StubLLMServer, args, mode: str) -> dict:
+    reset_rate_limiters()
+    reset_circuit_breakers()
+    pool = args.agents * 2
+    configs = [stub_config(LLMProvider.OPENAI, primary, pool), stub_config(LLMProvider.CLAUDE, fallback, pool)]
+    router = None
+    if mode != "single":
+        router = ProviderRouter(configs, hedge=mode == "hedged", hedge_percentile=args.percentile, hedge_min_delay=0.02)
+    
+    client = create_http_client(configs[0])
+    search_tool = FoodNutritionAgent.create_search_tool()
+    nutrition_tool = FoodNutritionAgent.create_nutrition_tool()
+    latencies: list[float] = []
+    failures = 0
+    
+    async def user():
+        nonlocal failures
+        agent = FoodNutritionAgent(
+            configs[0],
+            http_client=client,
+            search_tool=search_tool,
+            nutrition_tool=nutrition_tool,
+            router=router,
+        )
+        for _ in range(args.turns):
+            agent.clear_history()
+            start = time.perf_counter()
+            try:
+                await agent.chat("Calories trong phở bò", use_tools=False)
+            except LLMException:
+                failures += 1
+                continue
+            latencies.append((time.perf_counter() - start) * 1000)
+    
+    start = time.perf_counter()
+    await asyncio.gather(*(user() for _ in range(args.agents)))
+    elapsed = time.perf_counter() - start
+    await client.aclose()
+    
+    return {
+        "ok": len(latencies),
+        "failed": failures,
+        "elapsed": elapsed,
+        "latencies": latencies,
+        "router": router.as_dict() if router is not None else None,
+    }
+
+
+def report(label: str, result: dict):
+    total = result["ok"] + result["failed"]
+    latencies = result["latencies"] or [0.0]
+    line = (
+        f"{label:<10} success={result['ok']}/{total} ({result['ok'] / total:6.1%}) "
+        f"p50={percentile(latencies, 50):7.1f}ms p95={percentile(latencies, 95):7.1f}ms "
+        f"p99={percentile(latencies, 99):7.1f}ms"
+    )
+    if result["router"]:
+        router = result["router"]
+        line += f" failovers={router['failovers']} hedges={router['hedges']} hedge_wins={router['hedge_wins']}"
+    print(line)
+
+
+async def main(args):
+    async with StubLLMServer(
+        latency=args.latency,
+        error_rate=args.error_rate,
+        slow_rate=args.slow_rate,
+        slow_latency=args.slow_latency,
+    ) as primary, StubLLMServer(latency=args.latency) as fallback:
+        for mode in ("single", "failover", "hedged"):
+            report(mode, await run(primary, fallback, args, mode))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--agents", type=int, default=10, help="Concurrent users")
+    parser.add_argument("--turns", type=int, default=40, help="Turns per user")
+    parser.add_argument("--latency", type=float, default=0.02, help="Normal stub latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.05, help="Primary 503 probability")
+    parser.add_argument("--slow-rate", type=float, default=0.03, help="Primary slow-answer probability")
+    parser.add_argument("--slow-latency", type=float, default=1.0, help="Primary slow-answer latency in seconds")
+    parser.add_argument("--percentile", type=float, default=90.0, help="Hedge after this first-byte percentile")
+    asyncio.run(main(parser.parse_args()))
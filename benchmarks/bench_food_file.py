@@ -0,0 +1,111 @@
+"""
+Food file benchmark: opening a large database as CSV vs. a mapped .fdb file.
+
+Generates N synthetic foods, writes them as CSV and compiles them with
+`write_food_file`, then, each in a fresh Python process, measures:
+- open: time until the first exact lookup is answered
+- exact: exact-name lookup latency
+- fuzzy: the first misspelled lookup (builds the in-memory indexes)
+- memory: resident memory added by opening the database, and how much
+  of it is mapped file pages, which processes share through the page
+  cache (Linux only)
+
+Usage:
+    python -m benchmarks.bench_food_file --rows 100000
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.bench_food_lookup import generate_names, write_csv
+from agent_core.food_db import load_foods
+from agent_core.food_file import write_food_file
+from agent_core.tools import NutritionCalculator
+
+# Runs in the child process; prints measurements as JSON
+CHILD = """
+import json, random, sys, time
+from agent_core.tools import NutritionCalculator
+
+
+def memory():
+    # (resident, file-backed part) in bytes, from /proc when available
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            fields = {{line.split(":")[0]: int(line.split()[1]) * 1024 for line in f if line.endswith("kB\\n")}}
+        return fields["Rss"], fields["Rss"] - fields["Anonymous"]
+    except OSError:
+        return 0, 0
+
+
+names = json.loads(sys.argv[1])
+rss_before, file_before = memory()
+start = time.perf_counter()
+calculator = NutritionCalculator(database_path={path!r})
+calculator.lookup(names[0])
+opened = time.perf_counter()
+
+samples = []
+for name in names:
+    t = time.perf_counter()
+    calculator.lookup(name)
+    samples.append(time.perf_counter() - t)
+samples.sort()
+
+t = time.perf_counter()
+calculator.lookup(names[0] + "x")
+fuzzy = time.perf_counter() - t
+rss_after, file_after = memory()
+
+print(json.dumps({{
+    "open_ms": (opened - start) * 1000,
+    "exact_us": samples[len(samples) // 2] * 1e6,
+    "fuzzy_ms": fuzzy * 1000,
+    "rss_mib": (rss_after - rss_before) / 2 ** 20,
+    "file_mib": (file_after - file_before) / 2 ** 20,
+}}))
+"""
+
+
+def sample(path: str, names: list[str]) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD.format(path=path), json.dumps(names)],
+        capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(args):
+    names = generate_names(args.rows)
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "foods.csv")
+        fdb_path = os.path.join(tmp, "foods.fdb")
+        write_csv(csv_path, names)
+        
+        start = time.perf_counter()
+        write_food_file(fdb_path, [*NutritionCalculator.FOOD_DATABASE.items(), *load_foods(csv_path)])
+        build_ms = (time.perf_counter() - start) * 1000
+        print(f"rows={len(names)} csv={os.path.getsize(csv_path) / 2 ** 20:.1f}MiB "
+              f"fdb={os.path.getsize(fdb_path) / 2 ** 20:.1f}MiB build={build_ms:.0f}ms")
+        
+        queries = names[::max(1, len(names) // 200)]
+        for label, path in (("csv", csv_path), ("fdb", fdb_path)):
+            runs = [sample(path, queries) for _ in range(args.runs)]
+            best = {key: min(run[key] for run in runs) for key in runs[0]}
+            print(
+                f"{label:<4} open={best['open_ms']:8.1f}ms exact p50={best['exact_us']:6.1f}µs "
+                f"first fuzzy={best['fuzzy_ms']:7.1f}ms "
+                f"memory +{best['rss_mib']:6.1f}MiB (file-backed {best['file_mib']:5.1f}MiB)"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--runs", type=int, default=3, help="Fresh processes per format")
+    main(parser.parse_args())
@@ -0,0 +1,117 @@
+"""
+Food lookup latency benchmark on a large synthetic database.
+
+Generates a CSV with N Vietnamese-style food names, loads it through
+NutritionCalculator and measures lookup latency and local hit rate for
+exact, phrase, partial-word, unaccented, misspelled and missing queries.
+
+Usage:
+    python -m benchmarks.bench_food_lookup --rows 100000
+"""
+
+import argparse
+import csv
+import itertools
+import os
+import random
+import tempfile
+import time
+
+from agent_core.food_db import fold_accents
+from agent_core.tools import NutritionCalculator, load_food_index
+
+BASES = ["cơm", "bún", "phở", "mì", "cháo", "bánh", "xôi", "canh", "gỏi", "chả", "lẩu", "miến"]
+PROTEINS = ["gà", "bò", "heo", "tôm", "cua", "cá", "vịt", "mực", "trứng", "đậu", "sườn", "ốc"]
+STYLES = ["chiên", "luộc", "nướng", "xào", "hấp", "kho", "rang", "trộn", "sốt cà", "chua ngọt", "cay", "tỏi"]
+
+
+def generate_names(rows: int) -> list[str]:
+    """Generate unique food names, adding variant suffixes once combos run out"""
+    combos = [" ".join(c) for c in itertools.product(BASES, PROTEINS, STYLES)]
+    names = []
+    for variant in itertools.count():
+        for combo in combos:
+            names.append(combo if variant == 0 else f"{combo} loại {variant}")
+            if len(names) >= rows:
+                return names
+    return names
+
+
+def write_csv(path: str, names: list[str]):
+    rng = random.Random(42)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["name", "calories", "protein", "fat", "carbs"])
+        for name in names:
+            writer.writerow([name, rng.randint(20, 600), rng.randint(0, 40), rng.randint(0, 30), rng.randint(0, 80)])
+
+
+def add_typo(name: str, rng: random.Random) -> str:
+    """Duplicate one letter of the longest word"""
+    words = name.split(" ")
+    longest = max(range(len(words)), key=lambda i: len(words[i]))
+    word = words[longest]
+    pos = rng.randrange(len(word))
+    words[longest] = word[:pos + 1] + word[pos:]
+    return " ".join(words)
+
+
+def measure(calculator: NutritionCalculator, queries: list[str], repeat: int) -> tuple[list[float], float]:
+    """Per-lookup latency in microseconds and the fraction of queries found"""
+    samples = []
+    hits = 0
+    for _ in range(repeat):
+        for query in queries:
+            start = time.perf_counter()
+            found = calculator.lookup(query)
+            samples.append((time.perf_counter() - start) * 1e6)
+            hits += found is not None
+    return samples, hits / len(samples)
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))]
+
+
+def main(rows: int, repeat: int):
+    names = generate_names(rows)
+    rng = random.Random(7)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "foods.csv")
+        write_csv(path, names)
+        
+        start = time.perf_counter()
+        calculator = NutritionCalculator(database_path=path)
+        calculator.lookup("phở bò tái chín")  # Builds secondary indexes
+        load_ms = (time.perf_counter() - start) * 1000
+        print(f"rows={len(calculator.index)} load+index={load_ms:.0f}ms")
+        
+        scenarios = {
+            "exact": rng.sample(names, 200),
+            "name in query": [f"một bát {n} nóng" for n in rng.sample(names, 200)],
+            "query in name": ["phở bò", "cơm gà", "bún", "bánh tôm", "gỏi cua", "trứng"],
+            "partial word": ["phở b", "chiê", "nướn", "ngọ"],
+            "no accents": [fold_accents(n) for n in rng.sample(names, 200)],
+            "typo": [add_typo(fold_accents(n), rng) for n in rng.sample(names, 200)],
+            "miss": ["pizza hawaii", "hamburger", "sushi"],
+        }
+        
+        for label, queries in scenarios.items():
+            samples, hit_rate = measure(calculator, queries, repeat)
+            print(
+                f"{label:<14} p50={percentile(samples, 50):8.1f}µs "
+                f"p99={percentile(samples, 99):8.1f}µs max={max(samples):8.1f}µs "
+                f"hit={hit_rate:6.1%}"
+            )
+        
+        load_food_index.cache_clear()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    main(args.rows, args.repeat)
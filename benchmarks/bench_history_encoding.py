@@ -0,0 +1,112 @@
+"""
+History encoding benchmark: CPU time per LLM request as the session grows.
+
+For sessions with 10, 100 and 1000 prior turns, times building and
+encoding the request body of:
+- turn: a new user question (history window + 1 new message)
+- tool: the next call of the same turn's tool loop (+ a tool round)
+with the whole body encoded by the json module on every request (as
+before request templates), with per-message cached fragments joined
+per request, and with the agent's incrementally encoded history window
+(`EncodedHistory`).
+
+The context window is opened up to the whole history by default so the
+history size is what is measured; `--window default` uses the
+configured CONTEXT_RECENT_TURNS / CONTEXT_MAX_TOKENS instead.
+
+Usage:
+    python -m benchmarks.bench_history_encoding --turns 10 100 1000
+"""
+
+import argparse
+import json
+import timeit
+
+from config import LLMConfig, LLMProvider
+from agent_core import FoodNutritionAgent, Message
+from agent_core.agent import ToolCall, TurnMessages
+
+PROVIDERS = {"openai": LLMProvider.OPENAI, "claude": LLMProvider.CLAUDE}
+
+QUESTION = "Món số {i} có bao nhiêu calo và đạm?"
+ANSWER = "Khoảng 450 kcal, 25g đạm, 60g carb và 12g chất béo. " * 4
+TOOL_CALLS = [ToolCall(id="call_1", name="calculate_nutrition", arguments={"food_name": "phở bò", "portion_grams": 500})]
+TOOL_RESULT = "Phở bò (500g): 1075 kcal, protein 60g, fat 30g, carbs 140g"
+
+
+def new_agent(provider: LLMProvider, turns: int, full_window: bool) -> FoodNutritionAgent:
+    config = LLMConfig(provider=provider, api_key="stub", model="stub-model", base_url="http://stub/v1")
+    agent = FoodNutritionAgent(config)
+    if full_window:
+        agent.context.recent_turns = turns + 1
+        agent.context.max_tokens = 10 ** 9
+    for i in range(turns):
+        agent.conversation_history.append(Message(role="user", content=QUESTION.format(i=i)))
+        agent.conversation_history.append(Message(role="assistant", content=ANSWER))
+    return agent
+
+
+def json_encode(agent: FoodNutritionAgent, messages: list[Message]) -> bytes:
+    return json.dumps(agent._build_request_body(list(messages))).encode("utf-8")
+
+
+def fragment_encode(agent: FoodNutritionAgent, messages: list[Message]) -> bytes:
+    return agent._request_template().encode(agent._build_request_body(list(messages)))
+
+
+def incremental_encode(agent: FoodNutritionAgent, messages: list[Message]) -> bytes:
+    return agent._request_template().encode(agent._build_request_body(messages))
+
+
+def turn_request(agent: FoodNutritionAgent, encode) -> bytes:
+    """A new question: roll the previous one back, ask again, build the first request"""
+    history = agent.conversation_history
+    del history[len(history) - 1:]
+    history.append(Message(role="user", content="Còn bún chả thì sao?"))
+    return encode(agent, agent._build_messages_from_history())
+
+
+def tool_request(agent: FoodNutritionAgent, encode, base: TurnMessages) -> bytes:
+    """The next tool-loop call: the turn's messages plus one tool round"""
+    messages = TurnMessages(base, base.encoded)
+    agent._append_tool_round(messages, "", TOOL_CALLS, [TOOL_RESULT])
+    return encode(agent, messages)
+
+
+def cost(fn, number: int) -> float:
+    """Microseconds per call"""
+    fn()
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e6
+
+
+def main(args):
+    encoders = {"json": json_encode, "fragments": fragment_encode, "incremental": incremental_encode}
+    print(f"{'':<7} {'turns':>5} {'kind':<5} {'bytes':>8}  " + "  ".join(f"{name:>12}" for name in encoders))
+    for provider_name in args.providers:
+        for turns in args.turns:
+            number = max(20, args.number // max(1, turns // 10))
+            results = {}
+            for kind in ("turn", "tool"):
+                for name, encode in encoders.items():
+                    agent = new_agent(PROVIDERS[provider_name], turns, args.window == "full")
+                    agent.conversation_history.append(Message(role="user", content="Còn bún chả thì sao?"))
+                    base = agent._build_messages_from_history()
+                    if kind == "turn":
+                        fn = lambda: turn_request(agent, encode)  # noqa: E731
+                    else:
+                        fn = lambda: tool_request(agent, encode, base)  # noqa: E731
+                    results[(kind, name)] = (cost(fn, number), len(fn()))
+            
+            for kind in ("turn", "tool"):
+                size = results[(kind, "json")][1]
+                timings = "  ".join(f"{results[(kind, name)][0]:9.1f} us" for name in encoders)
+                print(f"{provider_name:<7} {turns:>5} {kind:<5} {size:>7}B  {timings}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--providers", nargs="+", choices=list(PROVIDERS), default=list(PROVIDERS))
+    parser.add_argument("--turns", nargs="+", type=int, default=[10, 100, 1000], help="Prior turns in the session")
+    parser.add_argument("--window", choices=["full", "default"], default="full", help="Context window sent per request")
+    parser.add_argument("--number", type=int, default=2000, help="Requests per timing at 10 turns")
+    main(parser.parse_args())
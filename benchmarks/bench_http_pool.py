@@ -0,0 +1,75 @@
+"""
+Per-turn latency benchmark: fresh HTTP client per call vs pooled client.
+
+Usage:
+    python -m benchmarks.bench_http_pool --turns 200 --latency 0.005
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from config import LLMConfig, LLMProvider
+from agent_core import FoodNutritionAgent
+from benchmarks.stub_llm import StubLLMServer
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of samples"""
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def run_turns(agent: FoodNutritionAgent, turns: int, pooled: bool) -> list[float]:
+    """Run chat turns and return per-turn latency in milliseconds"""
+    latencies = []
+    for _ in range(turns):
+        agent.clear_history()
+        start = time.perf_counter()
+        await agent.chat("Calories trong phở bò", use_tools=False)
+        latencies.append((time.perf_counter() - start) * 1000)
+        if not pooled:
+            # Drop the client so the next turn reconnects (pre-pooling behaviour)
+            await agent.aclose()
+    return latencies
+
+
+def report(label: str, latencies: list[float], connections: int):
+    print(
+        f"{label:<10} p50={percentile(latencies, 50):7.2f}ms "
+        f"p95={percentile(latencies, 95):7.2f}ms "
+        f"mean={statistics.mean(latencies):7.2f}ms "
+        f"connections={connections}"
+    )
+
+
+async def main(turns: int, latency: float, provider: str):
+    async with StubLLMServer(latency=latency) as server:
+        config = LLMConfig(
+            provider=LLMProvider(provider),
+            api_key="stub",
+            model="stub-model",
+            base_url=server.base_url,
+        )
+        
+        for pooled in (False, True):
+            connections_before = server.stats.connections
+            async with FoodNutritionAgent(config) as agent:
+                await run_turns(agent, 5, pooled)  # warm up
+                latencies = await run_turns(agent, turns, pooled)
+            report(
+                "pooled" if pooled else "unpooled",
+                latencies,
+                server.stats.connections - connections_before,
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.0, help="Stub server latency in seconds")
+    parser.add_argument("--provider", default="openai", choices=[p.value for p in LLMProvider])
+    args = parser.parse_args()
+    asyncio.run(main(args.turns, args.latency, args.provider))
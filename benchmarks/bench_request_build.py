@@ -0,0 +1,106 @@
+"""
+Request build microbenchmark: messages to URL, headers and encoded body.
+
+Compares the per-request work done before request templates (tool specs
+rebuilt from AVAILABLE_TOOLS, headers and URL recomputed, the whole body
+encoded with the json module) against `RequestTemplate.build()` +
+`encode()`, with the stdlib encoder and with orjson when installed.
+The cost of wrapping the result in an httpx.Request, the same for both,
+is reported separately.
+
+Usage:
+    python -m benchmarks.bench_request_build --messages 2 20 100
+"""
+
+import argparse
+import json
+import timeit
+
+import httpx
+
+from config import LLMConfig, LLMProvider
+from agent_core import FoodNutritionAgent, Message
+from agent_core import request_template
+from agent_core.bundle import build_tools_spec, tool_format
+from agent_core.request_template import reset_request_templates
+
+PROVIDERS = {"openai": LLMProvider.OPENAI, "claude": LLMProvider.CLAUDE}
+
+
+def conversation(n: int) -> list[Message]:
+    """Alternating user/assistant history of n messages"""
+    return [
+        Message(role="user", content=f"Món số {i} có bao nhiêu calo và đạm?") if i % 2 == 0
+        else Message(role="assistant", content="Khoảng 450 kcal, 25g đạm, 60g carb và 12g chất béo. " * 4)
+        for i in range(n)
+    ]
+
+
+def legacy_request(agent: FoodNutritionAgent, messages: list[Message]) -> tuple[str, dict, bytes]:
+    """The per-request work as it was done before templates"""
+    config = agent.config
+    claude = config.provider == LLMProvider.CLAUDE
+    tools = build_tools_spec(tool_format(config.provider))
+    formatted = agent._format_messages(messages)
+    if claude:
+        system = [{"type": "text", "text": agent.system_prompt, "cache_control": {"type": "ephemeral"}}]
+        tools[-1]["cache_control"] = {"type": "ephemeral"}
+        body = {"model": config.model, "max_tokens": config.max_tokens, "temperature": config.temperature,
+                "system": system, "messages": formatted, "tools": tools}
+        headers = {"Content-Type": "application/json", "x-api-key": config.api_key, "anthropic-version": "2023-06-01"}
+        url = f"{config.base_url}/messages"
+    else:
+        body = {"model": config.model, "max_tokens": config.max_tokens, "temperature": config.temperature,
+                "messages": [{"role": "system", "content": agent.system_prompt}] + formatted,
+                "tools": tools, "tool_choice": "auto"}
+        headers = {"Content-Type": "application/json", "Authorization": f"Bearer {config.api_key}"}
+        url = f"{config.base_url}/chat/completions"
+    return url, headers, json.dumps(body).encode("utf-8")
+
+
+def template_request(agent: FoodNutritionAgent, messages: list[Message]) -> tuple[str, dict, bytes]:
+    template = agent._request_template()
+    body = agent._build_request_body(messages)
+    return template.url, template.headers, template.encode(body)
+
+
+def cost(fn, agent: FoodNutritionAgent, messages: list[Message], number: int) -> tuple[float, int]:
+    """Microseconds per request and encoded body size"""
+    size = len(fn(agent, messages)[2])
+    seconds = min(timeit.repeat(lambda: fn(agent, messages), number=number, repeat=5)) / number
+    return seconds * 1e6, size
+
+
+def main(args):
+    orjson = request_template.orjson
+    encoders = [("json", None)] + ([("orjson", orjson)] if orjson is not None else [])
+    if orjson is None:
+        print("orjson not installed; template path measured with the json module only")
+    
+    for provider_name in args.providers:
+        config = LLMConfig(provider=PROVIDERS[provider_name], api_key="stub", model="stub-model", base_url="http://stub/v1")
+        agent = FoodNutritionAgent(config)
+        for n in args.messages:
+            messages = conversation(n)
+            request_template.orjson = None
+            legacy_us, legacy_size = cost(legacy_request, agent, messages, args.number)
+            line = f"{provider_name:<7} {n:>4} msgs  legacy {legacy_us:8.1f} us ({legacy_size:>6}B)"
+            for label, encoder in encoders:
+                request_template.orjson = encoder
+                reset_request_templates()
+                us, size = cost(template_request, agent, messages, args.number)
+                line += f"  template/{label} {us:7.1f} us ({size:>6}B, x{legacy_us / us:.1f})"
+            print(line)
+    request_template.orjson = orjson
+    
+    url, headers, content = template_request(agent, conversation(2))
+    seconds = min(timeit.repeat(lambda: httpx.Request("POST", url, headers=headers, content=content), number=args.number, repeat=5))
+    print(f"httpx.Request construction {seconds / args.number * 1e6:.1f} us (both paths)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--providers", nargs="+", choices=list(PROVIDERS), default=list(PROVIDERS))
+    parser.add_argument("--messages", nargs="+", type=int, default=[2, 20, 100], help="History sizes")
+    parser.add_argument("--number", type=int, default=2000, help="Builds per timing")
+    main(parser.parse_args())
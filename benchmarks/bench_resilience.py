@@ -0,0 +1,106 @@
+"""
+Throughput under provider contention: no retries vs the resilient call layer.
+
+The stub LLM answers 429 (with Retry-After) once more than
+`--capacity` requests are in flight and fails randomly with 503 at
+`--error-rate`. Many concurrent agents then push chat turns through it.
+
+Usage:
+    python -m benchmarks.bench_resilience --agents 40 --turns 10 --capacity 8
+"""
+
+import argparse
+import asyncio
+import time
+
+from config import LLMConfig, LLMProvider
+from agent_core import FoodNutritionAgent, LLMException, create_http_client
+from agent_core.ratelimit import reset_rate_limiters
+from agent_core.resilience import reset_circuit_breakers
+from benchmarks.stub_llm import StubLLMServer
+from benchmarks.bench_http_pool import percentile
+
+
+async def run(server: StubLLMServer, agents: int, turns: int, max_retries: int) -> dict:
+    reset_rate_limiters()
+    reset_circuit_breakers()
+    config = LLMConfig(
+        provider=LLMProvider.OPENAI,
+        api_key="stub",
+        model="stub-model",
+        base_url=server.base_url,
+        max_connections=agents,
+        max_keepalive_connections=agents,
+        max_retries=max_retries,
+        retry_base_delay=0.05,
+        retry_max_delay=1.0,
+        retry_max_total=10.0,
+        circuit_failure_threshold=1000,
+    )
+    client = create_http_client(config)
+    search_tool = FoodNutritionAgent.create_search_tool()
+    nutrition_tool = FoodNutritionAgent.create_nutrition_tool()
+    
+    latencies: list[float] = []
+    failures = 0
+    throttled_before = server.stats.throttled
+    
+    async def user():
+        nonlocal failures
+        agent = FoodNutritionAgent(config, http_client=client, search_tool=search_tool, nutrition_tool=nutrition_tool)
+        for _ in range(turns):
+            agent.clear_history()
+            start = time.perf_counter()
+            try:
+                await agent.chat("Calories trong phở bò", use_tools=False)
+            except LLMException:
+                failures += 1
+                continue
+            latencies.append((time.perf_counter() - start) * 1000)
+    
+    start = time.perf_counter()
+    await asyncio.gather(*(user() for _ in range(agents)))
+    elapsed = time.perf_counter() - start
+    await client.aclose()
+    
+    return {
+        "ok": len(latencies),
+        "failed": failures,
+        "throttled": server.stats.throttled - throttled_before,
+        "elapsed": elapsed,
+        "latencies": latencies,
+    }
+
+
+def report(label: str, result: dict):
+    total = result["ok"] + result["failed"]
+    latencies = result["latencies"] or [0.0]
+    print(
+        f"{label:<12} success={result['ok']}/{total} ({result['ok'] / total:6.1%}) "
+        f"goodput={result['ok'] / result['elapsed']:7.1f}/s "
+        f"p50={percentile(latencies, 50):7.1f}ms p99={percentile(latencies, 99):7.1f}ms "
+        f"429s={result['throttled']}"
+    )
+
+
+async def main(args):
+    async with StubLLMServer(
+        latency=args.latency,
+        max_concurrency=args.capacity,
+        retry_after=args.retry_after,
+        error_rate=args.error_rate,
+    ) as server:
+        report("no retries", await run(server, args.agents, args.turns, max_retries=0))
+        report("resilient", await run(server, args.agents, args.turns, max_retries=args.retries))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--agents", type=int, default=40, help="Concurrent users")
+    parser.add_argument("--turns", type=int, default=10, help="Turns per user")
+    parser.add_argument("--capacity", type=int, default=8, help="Stub in-flight limit before 429")
+    parser.add_argument("--latency", type=float, default=0.02, help="Stub latency in seconds")
+    parser.add_argument("--retry-after", type=float, default=0.1, help="Retry-After sent with 429s")
+    parser.add_argument("--error-rate", type=float, default=0.02, help="Random 503 probability")
+    parser.add_argument("--retries", type=int, default=6)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,133 @@
+"""
+Session memory benchmark: bytes per message and per session, paging out and resuming.
+
+Measures with tracemalloc:
+- one history message as the plain dataclass used before and as the
+  slotted `Message`, with and without its cached wire format
+- `--sessions` server sessions of `--turns` turns each, resident in a
+  SessionStore, then after paging them all out to a SessionLog
+and the time to resume a paged-out session from the log.
+
+Usage:
+    python -m benchmarks.bench_session_memory --sessions 1000 --turns 20
+"""
+
+import argparse
+import gc
+import os
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import Optional
+
+from config import LLMConfig, LLMProvider
+from agent_core import FoodNutritionAgent, Message
+from agent_core.context import estimate_tokens
+from agent_core.sessions import SessionStore
+from agent_core.session_log import SessionLog
+
+QUESTION = "Món số {i} có bao nhiêu calo và đạm?"
+ANSWER = "Khoảng 450 kcal, 25g đạm, 60g carb và 12g chất béo cho một phần ăn vừa."
+
+
+@dataclass
+class LegacyMessage:
+    """The message dataclass as it was before slots"""
+    role: str
+    content: str
+    tool_calls: list = field(default_factory=list)
+    tool_call_id: Optional[str] = None
+    token_count: int = field(default=0, compare=False)
+    
+    def __post_init__(self):
+        if not self.token_count:
+            self.token_count = estimate_tokens(self.content)
+
+
+def traced() -> int:
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0]
+
+
+def measure(build) -> tuple[int, object]:
+    """Bytes still allocated after `build()`, and its result (kept alive)"""
+    before = traced()
+    result = build()
+    return traced() - before, result
+
+
+def history(cls, turns: int) -> list:
+    # Contents are shared constants, so only the message objects are measured
+    messages = []
+    for i in range(turns):
+        messages.append(cls(role="user", content=QUESTION))
+        messages.append(cls(role="assistant", content=ANSWER))
+    return messages
+
+
+def message_sizes(count: int):
+    legacy, _ = measure(lambda: history(LegacyMessage, count // 2))
+    slotted, kept = measure(lambda: history(Message, count // 2))
+    wired, _ = measure(lambda: [msg.wire() for msg in kept])
+    print(f"per message    dataclass {legacy / count:6.0f} B   slots {slotted / count:6.0f} B   "
+          f"+ cached wire/JSON {wired / count:6.0f} B")
+
+
+def session_sizes(args, log_path: str):
+    config = LLMConfig(provider=LLMProvider.OPENAI, api_key="stub", model="stub-model", base_url="http://stub/v1")
+    # Shared like in server.py
+    search_tool = FoodNutritionAgent.create_search_tool()
+    nutrition_tool = FoodNutritionAgent.create_nutrition_tool()
+    skill_router = FoodNutritionAgent.create_skill_router(nutrition_tool)
+    
+    def new_agent() -> FoodNutritionAgent:
+        return FoodNutritionAgent(config, search_tool=search_tool, nutrition_tool=nutrition_tool, skill_router=skill_router)
+    
+    log = SessionLog(log_path)
+    store = SessionStore(new_agent, log=log)
+    
+    def fill():
+        for n in range(args.sessions):
+            agent = store.get_or_create(f"session-{n}").agent
+            agent.conversation_history = [
+                Message(role=role, content=template.format(i=i))
+                for i in range(args.turns)
+                for role, template in (("user", QUESTION), ("assistant", ANSWER))
+            ]
+            agent.save_history()
+    
+    start = traced()
+    fill()
+    resident = traced() - start
+    
+    store.idle_timeout = -1
+    store.evict_idle()
+    paged_out = traced() - start
+    
+    ids = [f"session-{n}" for n in range(0, args.sessions, max(1, args.sessions // 100))]
+    start = time.perf_counter()
+    for session_id in ids:
+        store.get_or_create(session_id)
+    resume_ms = (time.perf_counter() - start) / len(ids) * 1000
+    
+    print(f"per session    resident {resident / args.sessions / 1024:7.1f} KiB   "
+          f"paged out {paged_out / args.sessions / 1024:5.1f} KiB   "
+          f"({args.turns} turns, {args.sessions} sessions)")
+    print(f"resume         {resume_ms:.2f} ms/session   log {os.path.getsize(log_path) / 1024 / 1024:.1f} MiB on disk")
+    log.close()
+
+
+def main(args):
+    tracemalloc.start()
+    message_sizes(10_000)
+    with tempfile.TemporaryDirectory() as tmp:
+        session_sizes(args, os.path.join(tmp, "sessions.sqlite3"))
+    tracemalloc.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=1000)
+    parser.add_argument("--turns", type=int, default=20, help="Turns (user + assistant message) per session")
+    main(parser.parse_args())
@@ -0,0 +1,72 @@
+"""
+Local skill fast path: routing decisions and latency vs an LLM round-trip.
+
+Prints which questions are answered locally (and by which skill) and
+the routing cost per message, then times whole chat() turns answered by
+a skill against turns that go to the stub LLM over localhost.
+
+Usage:
+    python -m benchmarks.bench_skills --turns 500
+"""
+
+import argparse
+import asyncio
+import time
+import timeit
+
+from config import LLMConfig, LLMProvider
+from agent_core import FoodNutritionAgent
+from benchmarks.stub_llm import StubLLMServer
+from skills import SkillRouter
+
+QUESTIONS = [
+    "calories 200g cơm trắng",
+    "Phở bò có bao nhiêu calo?",
+    "so sánh thịt gà và thịt bò",
+    "Thịt gà hay thịt bò nhiều protein hơn?",
+    "Tổng calories của phở bò 500g và trứng gà 100g",
+    "Một tô phở bò có bao nhiêu calo?",
+    "200g thịt gà chiên bao nhiêu calo",
+    "Món gì thay thế cơm trắng để giảm carbs?",
+    "Phở bò có tốt cho người giảm cân không?",
+]
+
+
+def routing(router: SkillRouter, number: int):
+    for question in QUESTIONS:
+        match = router.route(question)
+        us = min(timeit.repeat(lambda: router.route(question), number=number, repeat=3)) / number * 1e6
+        target = match.skill.name if match else "llm"
+        print(f"{question:<50} -> {target:<26} {us:6.1f} us")
+
+
+async def turns(turns: int, latency: float):
+    async with StubLLMServer(latency=latency) as server:
+        config = LLMConfig(provider=LLMProvider.OPENAI, api_key="stub", model="stub-model", base_url=server.base_url)
+        async with FoodNutritionAgent(config) as agent:
+            for label, question in (("skill", QUESTIONS[2]), ("llm", QUESTIONS[-1])):
+                await agent.chat(question)
+                requests = server.stats.requests
+                start = time.perf_counter()
+                for _ in range(turns):
+                    agent.clear_history()
+                    await agent.chat(question)
+                elapsed = (time.perf_counter() - start) / turns
+                print(
+                    f"chat() via {label:<5} {elapsed * 1e6:9.1f} us/turn  "
+                    f"llm requests/turn={(server.stats.requests - requests) / turns:.1f}"
+                )
+
+
+def main(args):
+    routing(SkillRouter(), args.number)
+    print()
+    asyncio.run(turns(args.turns, args.latency))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=2000, help="Routing calls per timing")
+    parser.add_argument("--turns", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.0, help="Stub LLM latency in seconds")
+    main(parser.parse_args())
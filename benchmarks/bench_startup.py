@@ -0,0 +1,94 @@
+"""
+Cold-start benchmark: interpreter + imports + agent init + first request body.
+
+Each sample is a fresh Python process, so import caches do not carry
+over. Runs without the precompiled prompt bundle (PROMPT_BUNDLE_PATH
+empty), with it, and with it plus the heavy modules imported eagerly
+(the cost that lazy imports avoid), and reports which heavy modules
+were still not imported at the first prompt.
+
+Usage:
+    python -m benchmarks.bench_startup --runs 10
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from agent_core.bundle import write_bundle
+
+# Runs in the child process; prints timings as JSON
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+{preload}
+import main
+imported = time.perf_counter()
+
+from config import LLMConfig, LLMProvider
+from agent_core import FoodNutritionAgent, Message
+agent = FoodNutritionAgent(LLMConfig(provider=LLMProvider.{provider}, api_key="stub", model="stub-model", base_url="http://127.0.0.1:9/v1"))
+initialized = time.perf_counter()
+
+body = agent._build_request_body([Message(role="user", content="Phở bò có bao nhiêu calo?")])
+json.dumps(body)
+first_prompt = time.perf_counter()
+
+print(json.dumps({{
+    "import_ms": (imported - start) * 1000,
+    "init_ms": (initialized - imported) * 1000,
+    "first_prompt_ms": (first_prompt - initialized) * 1000,
+    "deferred": [name for name in ("rich.markdown", "numpy") if name not in sys.modules],
+}}))
+"""
+
+
+def sample(provider: str, bundle_path: str, eager: bool = False) -> dict:
+    env = {**os.environ, "PROMPT_BUNDLE_PATH": bundle_path}
+    start = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD.format(provider=provider.upper(), preload="import rich.markdown, numpy" if eager else "")],
+        env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    result["process_ms"] = (time.perf_counter() - start) * 1000
+    return result
+
+
+def report(label: str, samples: list[dict]):
+    def median(key: str) -> float:
+        return statistics.median(s[key] for s in samples)
+    
+    print(
+        f"{label:<10} process={median('process_ms'):7.1f}ms  import={median('import_ms'):6.1f}ms  "
+        f"init={median('init_ms'):6.1f}ms  first_prompt={median('first_prompt_ms'):5.2f}ms  "
+        f"deferred={', '.join(samples[0]['deferred']) or '-'}"
+    )
+
+
+def main(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        bundle_path = os.path.join(tmp, "bundle.json")
+        write_bundle(bundle_path)
+        
+        configs = {"sources": ("", False), "bundle": (bundle_path, False), "eager": (bundle_path, True)}
+        samples = {label: [] for label in configs}
+        # Interleave configurations so drift in machine load affects all alike
+        for _ in range(args.runs):
+            for label, (path, eager) in configs.items():
+                samples[label].append(sample(args.provider, path, eager))
+        
+        for label, results in samples.items():
+            report(label, results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10, help="Fresh processes per configuration")
+    parser.add_argument("--provider", choices=["openai", "claude", "deepseek"], default="claude")
+    main(parser.parse_args())
@@ -0,0 +1,290 @@
+"""
+Agent loop benchmark suite against local stand-ins for the LLM and Serper APIs.
+
+Scenarios:
+    single_lookup   question -> nutrition_lookup -> answer (2 LLM calls per turn)
+    meal            question -> meal_nutrition + web_search in parallel -> answer
+    long_session    many questions in one session without tools (history grows)
+
+Every scenario runs for each provider wire format (OpenAI-compatible and
+Claude), with chat() or, with --stream, chat_stream(). Each run reports
+throughput, p50/p95/p99 turn latency, LLM/search requests and bytes on
+the wire per turn, and memory from a separate tracemalloc pass. Results
+are saved as JSON; --compare prints the change against an earlier file.
+
+Usage:
+    python -m benchmarks.bench_suite --output bench.json
+    python -m benchmarks.bench_suite --output new.json --compare bench.json
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import subprocess
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+from config import LLMConfig, LLMProvider
+from agent_core import FoodNutritionAgent, LLMException, WebSearchTool, create_http_client
+from benchmarks.stub_llm import StubLLMServer
+from benchmarks.bench_http_pool import percentile
+
+
+@dataclass
+class Scenario:
+    """Scripted conversation: tool rounds per turn and the questions asked"""
+    name: str
+    questions: list[str]
+    tool_script: list[list[dict]] = field(default_factory=list)
+    session_turns: int = 1  # Turns before the conversation is cleared
+
+
+SCENARIOS = {
+    "single_lookup": Scenario(
+        name="single_lookup",
+        questions=["Một tô phở bò 500g có bao nhiêu calo?"],
+        tool_script=[[{"name": "nutrition_lookup", "arguments": {"food_name": "phở bò", "portion_grams": 500}}]],
+    ),
+    "meal": Scenario(
+        name="meal",
+        questions=["Bữa sáng gồm phở bò 500g và 2 quả trứng gà, thêm cà phê sữa đá thì tổng bao nhiêu calo?"],
+        tool_script=[[
+            {"name": "meal_nutrition", "arguments": {"items": [
+                {"food_name": "phở bò", "portion_grams": 500},
+                {"food_name": "trứng gà", "portion_grams": 100},
+            ]}},
+            {"name": "web_search", "arguments": {"query": "cà phê sữa đá calo"}},
+        ]],
+    ),
+    "long_session": Scenario(
+        name="long_session",
+        questions=[
+            "Phở bò có bao nhiêu calo?",
+            "Còn bún chả thì sao?",
+            "Món nào nhiều đạm hơn?",
+            "Nếu tôi ăn cả hai trong một ngày thì sao?",
+            "Gợi ý bữa tối ít calo hơn",
+        ],
+        session_turns=30,
+    ),
+}
+
+PROVIDERS = {"openai": LLMProvider.OPENAI, "claude": LLMProvider.CLAUDE}
+
+
+class Runner:
+    """Runs scenarios against one stub server with shared client and tools"""
+    
+    def __init__(self, server: StubLLMServer, provider: LLMProvider, concurrency: int):
+        self.server = server
+        self.config = LLMConfig(
+            provider=provider,
+            api_key="stub",
+            model="stub-model",
+            base_url=server.base_url,
+            max_connections=concurrency * 2,
+            max_keepalive_connections=concurrency * 2,
+        )
+        self.http_client = create_http_client(self.config)
+        self.search_tool = WebSearchTool(api_key="stub", url=server.search_url)
+        self.nutrition_tool = FoodNutritionAgent.create_nutrition_tool()
+    
+    async def aclose(self):
+        await self.http_client.aclose()
+    
+    def new_agent(self) -> FoodNutritionAgent:
+        agent = FoodNutritionAgent(
+            self.config,
+            http_client=self.http_client,
+            search_tool=self.search_tool,
+            nutrition_tool=self.nutrition_tool,
+        )
+        # Measure the LLM loop: simple questions would be answered by local skills
+        agent.skill_router = None
+        return agent
+    
+    async def turn(self, agent: FoodNutritionAgent, question: str, stream: bool):
+        if stream:
+            async for _ in agent.chat_stream(question):
+                pass
+        else:
+            await agent.chat(question)
+    
+    async def user(self, scenario: Scenario, turns: int, stream: bool, latencies: list[float]) -> int:
+        """Run turns as one user; returns the number of failed turns"""
+        agent = self.new_agent()
+        errors = 0
+        for i in range(turns):
+            if i % scenario.session_turns == 0:
+                agent.clear_history()
+            question = scenario.questions[i % len(scenario.questions)]
+            start = time.perf_counter()
+            try:
+                await self.turn(agent, question, stream)
+            except LLMException:
+                errors += 1
+                continue
+            latencies.append((time.perf_counter() - start) * 1000)
+        return errors
+    
+    async def measure(self, scenario: Scenario, turns: int, concurrency: int, stream: bool) -> dict:
+        """Timed run split across concurrent users"""
+        self.server.tool_script = scenario.tool_script
+        stats = self.server.stats
+        before = (stats.requests, stats.search_requests, stats.bytes_in, stats.bytes_out)
+        latencies: list[float] = []
+        
+        per_user = [turns // concurrency + (1 if i < turns % concurrency else 0) for i in range(concurrency)]
+        start = time.perf_counter()
+        errors = await asyncio.gather(*(self.user(scenario, n, stream, latencies) for n in per_user if n))
+        elapsed = time.perf_counter() - start
+        
+        requests, searches, bytes_in, bytes_out = (
+            after - prior for after, prior in
+            zip((stats.requests, stats.search_requests, stats.bytes_in, stats.bytes_out), before)
+        )
+        done = max(1, len(latencies))
+        return {
+            "turns": turns,
+            "errors": sum(errors),
+            "elapsed_s": round(elapsed, 4),
+            "throughput_tps": round(len(latencies) / elapsed, 2),
+            "latency_ms": {
+                "mean": round(sum(latencies) / done, 3),
+                "p50": round(percentile(latencies or [0.0], 50), 3),
+                "p95": round(percentile(latencies or [0.0], 95), 3),
+                "p99": round(percentile(latencies or [0.0], 99), 3),
+            },
+            "llm_requests_per_turn": round((requests - searches) / done, 2),
+            "search_requests_per_turn": round(searches / done, 2),
+            "bytes_sent_per_turn": round(bytes_in / done),
+            "bytes_received_per_turn": round(bytes_out / done),
+        }
+    
+    async def measure_memory(self, scenario: Scenario, turns: int, stream: bool) -> dict:
+        """Peak and retained Python memory for one user (tracemalloc slows it down, so run separately)"""
+        self.server.tool_script = scenario.tool_script
+        tracemalloc.start()
+        try:
+            baseline, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            await self.user(scenario, turns, stream, [])
+            current, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return {
+            "alloc_peak_kib": round((peak - baseline) / 1024, 1),
+            "retained_kib_per_turn": round((current - baseline) / 1024 / max(1, turns), 2),
+        }
+
+
+async def run_suite(args) -> list[dict]:
+    results = []
+    async with StubLLMServer(latency=args.latency, chunk_delay=args.chunk_delay, search_latency=args.search_latency) as server:
+        for provider_name in args.providers:
+            runner = Runner(server, PROVIDERS[provider_name], args.concurrency)
+            try:
+                for scenario_name in args.scenarios:
+                    scenario = SCENARIOS[scenario_name]
+                    for stream in ([False, True] if args.stream else [False]):
+                        # Warm-up: connections, imports, prompt-cache prefixes
+                        await runner.measure(scenario, args.concurrency, args.concurrency, stream)
+                        result = {"scenario": scenario.name, "provider": provider_name, "stream": stream}
+                        result.update(await runner.measure(scenario, args.turns, args.concurrency, stream))
+                        result.update(await runner.measure_memory(scenario, args.memory_turns, stream))
+                        results.append(result)
+                        report(result)
+            finally:
+                await runner.aclose()
+    return results
+
+
+def result_key(result: dict) -> tuple:
+    return result["scenario"], result["provider"], result["stream"]
+
+
+def report(result: dict):
+    latency = result["latency_ms"]
+    print(
+        f"{result['scenario']:<14} {result['provider']:<7} {'stream' if result['stream'] else 'json':<6} "
+        f"{result['throughput_tps']:8.1f} turn/s  p50={latency['p50']:7.2f}ms p95={latency['p95']:7.2f}ms "
+        f"p99={latency['p99']:7.2f}ms  llm={result['llm_requests_per_turn']:.1f} "
+        f"sent={result['bytes_sent_per_turn']:>7}B recv={result['bytes_received_per_turn']:>6}B "
+        f"peak={result['alloc_peak_kib']:8.1f}KiB errors={result['errors']}"
+    )
+
+
+def compare(results: list[dict], baseline_path: str):
+    """Print relative change of key metrics against an earlier results file"""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {result_key(r): r for r in json.load(f)["results"]}
+    
+    metrics = [
+        ("throughput_tps", lambda r: r["throughput_tps"]),
+        ("p50", lambda r: r["latency_ms"]["p50"]),
+        ("p99", lambda r: r["latency_ms"]["p99"]),
+        ("bytes_sent", lambda r: r["bytes_sent_per_turn"]),
+        ("alloc_peak", lambda r: r["alloc_peak_kib"]),
+    ]
+    print(f"\nChange vs {baseline_path}:")
+    for result in results:
+        old = baseline.get(result_key(result))
+        if old is None:
+            continue
+        changes = []
+        for name, get in metrics:
+            before, after = get(old), get(result)
+            changes.append(f"{name} {(after - before) / before:+7.1%}" if before else f"{name}     n/a")
+        scenario, provider, stream = result_key(result)
+        print(f"{scenario:<14} {provider:<7} {'stream' if stream else 'json':<6} " + "  ".join(changes))
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def main(args):
+    results = await run_suite(args)
+    
+    if args.output:
+        data = {
+            "meta": {
+                "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "git_revision": git_revision(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "args": vars(args),
+            },
+            "results": results,
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        print(f"\nSaved {len(results)} results to {args.output}")
+    
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--providers", nargs="+", choices=list(PROVIDERS), default=list(PROVIDERS))
+    parser.add_argument("--stream", action="store_true", help="Also run every scenario through chat_stream()")
+    parser.add_argument("--turns", type=int, default=120, help="Timed turns per run")
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent users")
+    parser.add_argument("--memory-turns", type=int, default=30, help="Turns of the tracemalloc pass")
+    parser.add_argument("--latency", type=float, default=0.01, help="Stub LLM latency in seconds")
+    parser.add_argument("--chunk-delay", type=float, default=0.0, help="Delay between stream chunks")
+    parser.add_argument("--search-latency", type=float, default=0.02, help="Stub search latency in seconds")
+    parser.add_argument("--output", help="Write results as JSON")
+    parser.add_argument("--compare", help="Earlier results JSON to compare against")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,79 @@
+"""
+Instrumentation overhead with telemetry disabled vs enabled.
+
+Measures the cost of one span, then of whole chat turns against an
+in-process mock transport (no sockets), so only agent CPU time counts.
+
+Usage:
+    python -m benchmarks.bench_telemetry --turns 2000
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import timeit
+
+import httpx
+
+from config import LLMConfig, LLMProvider
+from agent_core import FoodNutritionAgent
+from agent_core.telemetry import span, telemetry
+from benchmarks.stub_llm import StubLLMServer
+
+
+def span_cost(enabled: bool, number: int = 100_000) -> float:
+    """Microseconds to open, annotate and close one span"""
+    telemetry.enabled = enabled
+    telemetry.reset()
+    
+    def one_span():
+        with span("llm.call", provider="openai") as call_span:
+            call_span.set("prompt_tokens", 100)
+    
+    return min(timeit.repeat(one_span, number=number, repeat=3)) / number * 1e6
+
+
+async def turn_cost(turns: int, enabled: bool) -> float:
+    """Microseconds per chat turn"""
+    telemetry.enabled = enabled
+    telemetry.reset()
+    stub = StubLLMServer()
+    
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json=stub.build_response(request.url.path, json.loads(request.content)))
+    
+    config = LLMConfig(provider=LLMProvider.OPENAI, api_key="stub", model="stub-model", base_url="http://stub/v1")
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    agent = FoodNutritionAgent(config, http_client=client)
+    await agent.chat("Calories trong phở bò", use_tools=False)
+    
+    start = time.perf_counter()
+    for _ in range(turns):
+        agent.clear_history()
+        await agent.chat("Calories trong phở bò", use_tools=False)
+    elapsed = time.perf_counter() - start
+    await client.aclose()
+    return elapsed / turns * 1e6
+
+
+async def main(args):
+    print(f"span      disabled {span_cost(False):7.2f} us   enabled {span_cost(True):7.2f} us")
+    
+    results = {False: [], True: []}
+    for _ in range(args.rounds):
+        for enabled in (False, True):
+            results[enabled].append(await turn_cost(args.turns, enabled))
+    disabled, enabled = min(results[False]), min(results[True])
+    spans = sum(histogram.count for histogram in telemetry.histograms.values())
+    print(
+        f"turn      disabled {disabled:7.1f} us   enabled {enabled:7.1f} us "
+        f"(+{enabled - disabled:.1f} us, {spans / (args.turns + 1):.0f} spans/turn)"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=3, help="Repeat and keep the best run")
+    asyncio.run(main(parser.parse_args()))
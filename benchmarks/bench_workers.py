@@ -0,0 +1,120 @@
+"""
+Worker scaling benchmark: server throughput with 1 to N pre-forked workers.
+
+For each worker count, starts `server.py --workers N` against a local
+stub LLM (its own process, no latency, `--reply-kb` long answers so
+JSON decoding and response handling cost CPU), drives it with
+concurrent sessions from this process, and reports throughput, latency
+percentiles and speedup over one worker. Sessions go through a shared
+session log, as in a real multi-worker deployment.
+
+The stub and the load generator run on the same machine, so scaling
+flattens once they, not the workers, saturate the cores.
+
+Usage:
+    python -m benchmarks.bench_workers --workers 1 2 4 --requests 2000
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.bench_http_pool import percentile
+from benchmarks.load_test import run_load
+from benchmarks.stub_llm import StubLLMServer
+
+REPLY = "Phở bò (100g) có khoảng 215 kcal, 12g protein, 5g chất béo và 28g carbs. "
+
+
+async def stub(conn, reply: str):
+    async with StubLLMServer(reply=reply) as server:
+        conn.send(server.base_url)
+        await asyncio.to_thread(conn.recv)
+
+
+def stub_process(conn, reply: str):
+    asyncio.run(stub(conn, reply))
+
+
+def worker_pid(port: int) -> int:
+    health = httpx.get(f"http://127.0.0.1:{port}/health").json()
+    return health.get("worker", {}).get("pid", 0)
+
+
+def start_server(workers: int, port: int, base_url: str, tmp: str) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "LLM_PROVIDER": "openai",
+        "OPENAI_API_KEY": "stub",
+        "OPENAI_BASE_URL": base_url,
+        "LLM_MAX_CONNECTIONS": "200",
+        "LLM_MAX_KEEPALIVE": "200",
+        "SESSION_LOG_PATH": os.path.join(tmp, f"sessions-{workers}.sqlite3"),
+        "SEARCH_CACHE_PATH": os.path.join(tmp, "search.sqlite3"),
+        "TELEMETRY_ENABLED": "false",
+    }
+    process = subprocess.Popen(
+        [sys.executable, "server.py", "--port", str(port), "--workers", str(workers)],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            # Wait until every worker has answered (each request is a new connection)
+            pids = {worker_pid(port) for _ in range(workers * 4)}
+            if len(pids) >= workers:
+                return process
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    process.kill()
+    raise SystemExit(f"server with {workers} workers did not start")
+
+
+def main(args):
+    conn, child_conn = multiprocessing.Pipe()
+    reply = REPLY * max(1, args.reply_kb * 1024 // len(REPLY))
+    stub_proc = multiprocessing.Process(target=stub_process, args=(child_conn, reply))
+    stub_proc.start()
+    base_url = conn.recv()
+    
+    print(f"cores={os.cpu_count()} requests={args.requests} concurrency={args.concurrency} reply={args.reply_kb}KiB")
+    baseline = None
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            for workers in args.workers or sorted({1, 2, 4, os.cpu_count() or 1}):
+                server = start_server(workers, args.port, base_url, tmp)
+                url = f"http://127.0.0.1:{args.port}"
+                try:
+                    asyncio.run(run_load(url, min(args.concurrency * 2, args.requests), args.concurrency, False))
+                    latencies, errors, elapsed = asyncio.run(run_load(url, args.requests, args.concurrency, False))
+                finally:
+                    server.terminate()
+                    server.wait(30)
+                
+                rps = len(latencies) / elapsed
+                baseline = baseline or rps
+                print(
+                    f"workers={workers:<3} rps={rps:8.1f} speedup={rps / baseline:5.2f}x "
+                    f"p50={percentile(latencies, 50):7.2f}ms p99={percentile(latencies, 99):7.2f}ms errors={errors}"
+                )
+    finally:
+        conn.send("stop")
+        stub_proc.join()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", nargs="+", type=int, help="Worker counts (default: 1 2 4 and the core count)")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--reply-kb", type=int, default=8, help="Size of the stub LLM's answers")
+    parser.add_argument("--port", type=int, default=8765)
+    main(parser.parse_args())
@@ -0,0 +1,146 @@
+"""
+Load test for server mode against a local stub LLM.
+
+Starts the stub LLM and the ASGI server in a child process (or targets
+an already running server with --url), then drives concurrent sessions
+and reports throughput and latency percentiles.
+
+Usage:
+    python -m benchmarks.load_test --requests 2000 --concurrency 100
+    python -m benchmarks.load_test --url http://127.0.0.1:8000 --stream
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import socket
+import time
+
+import httpx
+
+from config import LLMConfig, LLMProvider
+from benchmarks.stub_llm import StubLLMServer
+from benchmarks.bench_http_pool import percentile
+
+
+async def run_load(url: str, total: int, concurrency: int, stream: bool) -> tuple[list[float], int, float]:
+    """Send `total` chat requests over `concurrency` sessions; return latencies (ms), errors, elapsed"""
+    latencies: list[float] = []
+    errors = 0
+    remaining = iter(range(total))
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60.0) as client:
+        async def worker(index: int):
+            nonlocal errors
+            session_id = f"load-{index}"
+            for _ in remaining:
+                body = {"session_id": session_id, "message": "Phở bò có tốt cho người giảm cân không?"}
+                start = time.perf_counter()
+                try:
+                    if stream:
+                        async with client.stream("POST", "/chat/stream", json=body) as response:
+                            async for _ in response.aiter_bytes():
+                                pass
+                    else:
+                        response = await client.post("/chat", json=body)
+                    if response.status_code != 200:
+                        errors += 1
+                        continue
+                except httpx.HTTPError:
+                    errors += 1
+                    continue
+                latencies.append((time.perf_counter() - start) * 1000)
+                # Keep sessions short so the test measures serving, not history growth
+                await client.delete(f"/sessions/{session_id}")
+        
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    
+    return latencies, errors, elapsed
+
+
+async def serve(conn, latency: float, provider: str, pool_size: int):
+    """Run the stub LLM and the agent server until the parent asks to stop"""
+    import uvicorn
+    from server import AgentServer
+    
+    async with StubLLMServer(latency=latency) as stub:
+        config = LLMConfig(
+            provider=LLMProvider(provider),
+            api_key="stub",
+            model="stub-model",
+            base_url=stub.base_url,
+            max_connections=pool_size,
+            max_keepalive_connections=pool_size,
+        )
+        
+        # IPPROTO_TCP lets asyncio enable TCP_NODELAY on accepted connections
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM, socket.IPPROTO_TCP)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind(("127.0.0.1", 0))
+        
+        server = uvicorn.Server(uvicorn.Config(
+            AgentServer(config), log_level="warning", access_log=False, backlog=4096,
+        ))
+        task = asyncio.create_task(server.serve(sockets=[sock]))
+        while not server.started:
+            await asyncio.sleep(0.01)
+        
+        conn.send(sock.getsockname()[1])
+        await asyncio.to_thread(conn.recv)
+        server.should_exit = True
+        await task
+        conn.send((stub.stats.connections, stub.stats.requests))
+
+
+def serve_process(conn, latency: float, provider: str, pool_size: int):
+    asyncio.run(serve(conn, latency, provider, pool_size))
+
+
+async def main(args):
+    process = None
+    url = args.url
+    if url is None:
+        # Serve from a separate process so the load generator does not share its event loop
+        conn, child_conn = multiprocessing.Pipe()
+        process = multiprocessing.Process(
+            target=serve_process,
+            args=(child_conn, args.latency, args.provider, args.pool_size),
+        )
+        process.start()
+        url = f"http://127.0.0.1:{conn.recv()}"
+    
+    try:
+        await run_load(url, min(args.concurrency * 2, args.requests), args.concurrency, args.stream)  # warm up
+        latencies, errors, elapsed = await run_load(url, args.requests, args.concurrency, args.stream)
+    finally:
+        if process is not None:
+            conn.send("stop")
+            upstream = conn.recv()
+            process.join()
+    
+    mode = "stream" if args.stream else "json"
+    print(f"mode={mode} requests={args.requests} concurrency={args.concurrency} errors={errors}")
+    if latencies:
+        print(
+            f"rps={len(latencies) / elapsed:8.1f} "
+            f"p50={percentile(latencies, 50):7.2f}ms "
+            f"p95={percentile(latencies, 95):7.2f}ms "
+            f"p99={percentile(latencies, 99):7.2f}ms"
+        )
+    if process is not None:
+        print(f"upstream connections={upstream[0]} requests={upstream[1]}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=None, help="Target a running server instead of starting one")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.02, help="Stub LLM latency in seconds")
+    parser.add_argument("--provider", choices=["openai", "claude"], default="openai")
+    parser.add_argument("--pool-size", type=int, default=100, help="Upstream LLM connection pool size")
+    parser.add_argument("--stream", action="store_true", help="Use the streaming endpoint")
+    asyncio.run(main(parser.parse_args()))
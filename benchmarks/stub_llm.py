@@ -0,0 +1,401 @@
+"""
+Minimal local stub of the LLM provider and Serper search APIs for benchmarks.
+
+Speaks just enough HTTP/1.1 (with keep-alive) to answer OpenAI/Deepseek
+`/chat/completions` and Claude `/messages` requests with a canned reply,
+either as a single JSON body or as an SSE stream (`"stream": true`).
+A tool script makes the model call tools first: round i of a turn
+(i = assistant messages since the user's question) answers with the
+tool calls in `tool_script[i]`, later rounds with the text reply.
+Usage figures mimic provider prompt caching: a request whose system
+prompt and tools were seen before reports that prefix as cached.
+`/search` answers like Serper with `search_results` organic results.
+No third-party dependencies, so it runs anywhere the agent runs.
+"""
+
+import asyncio
+import hashlib
+import json
+import random
+from dataclasses import dataclass, field
+
+
+@dataclass
+class StubStats:
+    """Counters collected by the stub server"""
+    connections: int = 0
+    requests: int = 0
+    search_requests: int = 0
+    throttled: int = 0
+    failed: int = 0
+    bytes_in: int = 0
+    bytes_out: int = 0
+
+
+@dataclass
+class StubLLMServer:
+    """
+    Local stub LLM provider.
+    
+    Usage:
+        async with StubLLMServer(latency=0.01) as server:
+            config.base_url = server.base_url
+    """
+    host: str = "127.0.0.1"
+    port: int = 0
+    latency: float = 0.0
+    chunk_delay: float = 0.0
+    reply: str = "Phở bò (100g) có khoảng 215 kcal."
+    # Failure injection: 429 above `max_concurrency` in-flight requests,
+    # random 503s with probability `error_rate`
+    max_concurrency: int = 0
+    retry_after: float | None = None
+    error_rate: float = 0.0
+    # Latency tail: with probability `slow_rate`, answer after `slow_latency`
+    slow_rate: float = 0.0
+    slow_latency: float = 0.0
+    # Scripted tool calls: list of rounds, each a list of {"name", "arguments"}
+    tool_script: list[list[dict]] = field(default_factory=list)
+    # Serper stand-in
+    search_latency: float = 0.0
+    search_results: int = 5
+    stats: StubStats = field(default_factory=StubStats)
+    
+    def __post_init__(self):
+        self._server: asyncio.AbstractServer | None = None
+        self._seen_prefixes: set[str] = set()
+        self._in_flight = 0
+    
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/v1"
+    
+    @property
+    def search_url(self) -> str:
+        return f"http://{self.host}:{self.port}/search"
+    
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+    
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+    
+    async def __aenter__(self) -> "StubLLMServer":
+        await self.start()
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.stop()
+    
+    def usage(self, path: str, body: dict) -> dict:
+        """Approximate token usage, treating a repeated system+tools prefix as cached"""
+        if path.endswith("/messages"):
+            prefix = [body.get("tools"), body.get("system")]
+        else:
+            prefix = [body.get("tools"), (body.get("messages") or [{}])[0]]
+        
+        encoded = json.dumps(prefix, sort_keys=True).encode("utf-8")
+        prefix_tokens = len(encoded) // 4
+        total_tokens = len(json.dumps(body).encode("utf-8")) // 4
+        key = hashlib.sha256(encoded).hexdigest()
+        cached = prefix_tokens if key in self._seen_prefixes else 0
+        self._seen_prefixes.add(key)
+        
+        if path.endswith("/messages"):
+            return {
+                "input_tokens": total_tokens - prefix_tokens,
+                "cache_read_input_tokens": cached,
+                "cache_creation_input_tokens": prefix_tokens - cached,
+                "output_tokens": 10,
+            }
+        return {
+            "prompt_tokens": total_tokens,
+            "completion_tokens": 10,
+            "total_tokens": total_tokens + 10,
+            "prompt_tokens_details": {"cached_tokens": cached},
+        }
+    
+    def tool_round(self, body: dict) -> int:
+        """Number of assistant messages since the user's question"""
+        rounds = 0
+        for message in reversed(body.get("messages") or []):
+            content = message.get("content")
+            if message.get("role") == "assistant":
+                rounds += 1
+            elif message.get("role") == "user" and not (
+                isinstance(content, list)
+                and any(isinstance(block, dict) and block.get("type") == "tool_result" for block in content)
+            ):
+                break
+        return rounds
+    
+    def scripted_tool_calls(self, body: dict) -> list[dict]:
+        """Tool calls the stub model makes for this request, if any"""
+        choice = body.get("tool_choice")
+        if not body.get("tools") or choice == "none" or (isinstance(choice, dict) and choice.get("type") == "none"):
+            return []
+        round_index = self.tool_round(body)
+        if round_index >= len(self.tool_script):
+            return []
+        return [
+            {"id": f"call_{round_index}_{i}", "name": call["name"], "arguments": call.get("arguments", {})}
+            for i, call in enumerate(self.tool_script[round_index])
+        ]
+    
+    def build_search_response(self, body: dict) -> dict:
+        """Serper-style search results"""
+        query = body.get("q", "")
+        return {
+            "searchParameters": {"q": query, "num": body.get("num", 10)},
+            "organic": [
+                {
+                    "title": f"{query} - kết quả {i}",
+                    "link": f"https://example.com/{i}",
+                    "snippet": f"{query}: khoảng {200 + i * 10} kcal mỗi 100g, protein {10 + i}g, chất béo {5 + i}g.",
+                    "position": i,
+                }
+                for i in range(1, min(body.get("num", 10), self.search_results) + 1)
+            ],
+        }
+    
+    def build_response(self, path: str, body: dict) -> dict:
+        """Build a canned provider response for the given endpoint"""
+        tool_calls = self.scripted_tool_calls(body)
+        if path.endswith("/messages"):
+            if tool_calls:
+                return {
+                    "id": "msg_stub",
+                    "type": "message",
+                    "role": "assistant",
+                    "content": [
+                        {"type": "tool_use", "id": tc["id"], "name": tc["name"], "input": tc["arguments"]}
+                        for tc in tool_calls
+                    ],
+                    "stop_reason": "tool_use",
+                    "usage": self.usage(path, body),
+                }
+            return {
+                "id": "msg_stub",
+                "type": "message",
+                "role": "assistant",
+                "content": [{"type": "text", "text": self.reply}],
+                "stop_reason": "end_turn",
+                "usage": self.usage(path, body),
+            }
+        message = {"role": "assistant", "content": self.reply}
+        if tool_calls:
+            message = {
+                "role": "assistant",
+                "content": None,
+                "tool_calls": [
+                    {"id": tc["id"], "type": "function",
+                     "function": {"name": tc["name"], "arguments": json.dumps(tc["arguments"], ensure_ascii=False)}}
+                    for tc in tool_calls
+                ],
+            }
+        return {
+            "id": "chatcmpl-stub",
+            "object": "chat.completion",
+            "model": body.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "message": message,
+                "finish_reason": "tool_calls" if tool_calls else "stop",
+            }],
+            "usage": self.usage(path, body),
+        }
+    
+    def build_stream_events(self, path: str, body: dict) -> list[str]:
+        """Build canned SSE events for a streaming request"""
+        tool_calls = self.scripted_tool_calls(body)
+        words = [] if tool_calls else self.reply.split(" ")
+        pieces = [w + " " for w in words[:-1]] + words[-1:]
+        usage = self.usage(path, body)
+        
+        if path.endswith("/messages"):
+            events = [
+                ("message_start", {"type": "message_start", "message": {
+                    "id": "msg_stub", "role": "assistant", "content": [],
+                    "usage": {**usage, "output_tokens": 0},
+                }}),
+            ]
+            if pieces:
+                events.append(("content_block_start", {"type": "content_block_start", "index": 0,
+                                                       "content_block": {"type": "text", "text": ""}}))
+                events += [
+                    ("content_block_delta", {"type": "content_block_delta", "index": 0,
+                                             "delta": {"type": "text_delta", "text": piece}})
+                    for piece in pieces
+                ]
+                events.append(("content_block_stop", {"type": "content_block_stop", "index": 0}))
+            for index, tc in enumerate(tool_calls):
+                arguments = json.dumps(tc["arguments"], ensure_ascii=False)
+                half = len(arguments) // 2
+                events += [
+                    ("content_block_start", {"type": "content_block_start", "index": index, "content_block": {
+                        "type": "tool_use", "id": tc["id"], "name": tc["name"], "input": {}}}),
+                    ("content_block_delta", {"type": "content_block_delta", "index": index,
+                                             "delta": {"type": "input_json_delta", "partial_json": arguments[:half]}}),
+                    ("content_block_delta", {"type": "content_block_delta", "index": index,
+                                             "delta": {"type": "input_json_delta", "partial_json": arguments[half:]}}),
+                    ("content_block_stop", {"type": "content_block_stop", "index": index}),
+                ]
+            events += [
+                ("message_delta", {"type": "message_delta",
+                                   "delta": {"stop_reason": "tool_use" if tool_calls else "end_turn"},
+                                   "usage": {"output_tokens": 10}}),
+                ("message_stop", {"type": "message_stop"}),
+            ]
+            return [f"event: {name}\ndata: {json.dumps(data)}\n\n" for name, data in events]
+        
+        chunks = [
+            {"id": "chatcmpl-stub", "object": "chat.completion.chunk",
+             "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]}
+            for piece in pieces
+        ]
+        for index, tc in enumerate(tool_calls):
+            arguments = json.dumps(tc["arguments"], ensure_ascii=False)
+            half = len(arguments) // 2
+            chunks += [
+                {"id": "chatcmpl-stub", "object": "chat.completion.chunk", "choices": [{"index": 0, "delta": {
+                    "tool_calls": [{"index": index, "id": tc["id"], "type": "function",
+                                    "function": {"name": tc["name"], "arguments": arguments[:half]}}]},
+                    "finish_reason": None}]},
+                {"id": "chatcmpl-stub", "object": "chat.completion.chunk", "choices": [{"index": 0, "delta": {
+                    "tool_calls": [{"index": index, "function": {"arguments": arguments[half:]}}]},
+                    "finish_reason": None}]},
+            ]
+        chunks.append({"id": "chatcmpl-stub", "object": "chat.completion.chunk",
+                       "choices": [{"index": 0, "delta": {}, "finish_reason": "tool_calls" if tool_calls else "stop"}]})
+        if (body.get("stream_options") or {}).get("include_usage"):
+            chunks.append({"id": "chatcmpl-stub", "object": "chat.completion.chunk",
+                           "choices": [], "usage": usage})
+        return [f"data: {json.dumps(chunk)}\n\n" for chunk in chunks] + ["data: [DONE]\n\n"]
+    
+    async def _write_stream(self, writer: asyncio.StreamWriter, events: list[str]):
+        head = (
+            "HTTP/1.1 200 OK\r\n"
+            "Content-Type: text/event-stream\r\n"
+            "Transfer-Encoding: chunked\r\n"
+            "Connection: keep-alive\r\n\r\n"
+        ).encode("latin-1")
+        writer.write(head)
+        self.stats.bytes_out += len(head)
+        
+        for event in events:
+            if self.chunk_delay:
+                await asyncio.sleep(self.chunk_delay)
+            data = event.encode("utf-8")
+            frame = f"{len(data):x}\r\n".encode("latin-1") + data + b"\r\n"
+            writer.write(frame)
+            await writer.drain()
+            self.stats.bytes_out += len(frame)
+        
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+        self.stats.bytes_out += 5
+    
+    async def _write_json(self, writer: asyncio.StreamWriter, data: dict):
+        payload = json.dumps(data).encode("utf-8")
+        head = (
+            "HTTP/1.1 200 OK\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(payload)}\r\n"
+            "Connection: keep-alive\r\n\r\n"
+        ).encode("latin-1")
+        writer.write(head + payload)
+        await writer.drain()
+        self.stats.bytes_out += len(head) + len(payload)
+    
+    def _injected_error(self) -> tuple[int, dict] | None:
+        """Status and extra headers of a simulated failure, if any"""
+        if self.max_concurrency and self._in_flight >= self.max_concurrency:
+            self.stats.throttled += 1
+            headers = {"Retry-After": f"{self.retry_after:g}"} if self.retry_after is not None else {}
+            return 429, headers
+        if self.error_rate and random.random() < self.error_rate:
+            self.stats.failed += 1
+            return 503, {}
+        return None
+    
+    async def _write_error(self, writer: asyncio.StreamWriter, status: int, headers: dict):
+        payload = json.dumps({"error": {"message": f"stub error {status}"}}).encode("utf-8")
+        reason = {429: "Too Many Requests", 503: "Service Unavailable"}.get(status, "Error")
+        extra = "".join(f"{name}: {value}\r\n" for name, value in headers.items())
+        head = (
+            f"HTTP/1.1 {status} {reason}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(payload)}\r\n"
+            f"{extra}"
+            "Connection: keep-alive\r\n\r\n"
+        ).encode("latin-1")
+        writer.write(head + payload)
+        await writer.drain()
+        self.stats.bytes_out += len(head) + len(payload)
+    
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.stats.connections += 1
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                
+                method, path, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                header_bytes = 0
+                while True:
+                    line = await reader.readline()
+                    header_bytes += len(line)
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                
+                length = int(headers.get("content-length", "0"))
+                raw = await reader.readexactly(length) if length else b""
+                self.stats.requests += 1
+                self.stats.bytes_in += len(request_line) + header_bytes + length
+                
+                if path.endswith("/search"):
+                    self.stats.search_requests += 1
+                    if self.search_latency:
+                        await asyncio.sleep(self.search_latency)
+                    await self._write_json(writer, self.build_search_response(json.loads(raw) if raw else {}))
+                    continue
+                
+                error = self._injected_error()
+                if error is not None:
+                    await self._write_error(writer, *error)
+                    continue
+                
+                self._in_flight += 1
+                try:
+                    delay = self.latency
+                    if self.slow_rate and random.random() < self.slow_rate:
+                        delay = self.slow_latency
+                    if delay:
+                        await asyncio.sleep(delay)
+                finally:
+                    self._in_flight -= 1
+                
+                body = json.loads(raw) if raw else {}
+                if body.get("stream"):
+                    await self._write_stream(writer, self.build_stream_events(path, body))
+                    continue
+                
+                await self._write_json(writer, self.build_response(path, body))
+                
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        except asyncio.CancelledError:
+            # Still answering a request the client gave up on (e.g. a lost hedge) at shutdown
+            pass
+        finally:
+            writer.close()
@@ -10,6 +10,12 @@ if errorlevel 1 (
     pip install pyinstaller
 )
 
+:: Precompile prompts and tool specs for fast startup
+echo.
+echo Building prompt bundle...
+python build_bundle.py
+if errorlevel 1 exit /b 1
+
 :: Build executable
 echo.
 echo Building executable...
@@ -22,5 +28,5 @@ echo Executable: dist\FoodAgent.exe
 echo ========================================
 echo.
 echo NOTE: Copy .env file to dist\ folder before running!
-echo Also copy knowledge_base\ folder to dist\ folder.
+echo Also copy knowledge_base\ folder (including bundle.json) to dist\ folder.
 pause
@@ -0,0 +1,33 @@
+"""
+Food Nutrition AI Agent - Prompt Bundle Build Step
+
+Serializes the system prompt, templates and provider tool specs into one
+JSON file loaded once at startup. Run it after editing prompts and before
+packaging (build.bat does this); a stale bundle is ignored at runtime.
+
+Run:
+    python build_bundle.py [--output knowledge_base/bundle.json]
+"""
+
+import argparse
+
+from config import PROMPT_BUNDLE_PATH
+from agent_core.bundle import write_bundle
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the precompiled prompt bundle")
+    parser.add_argument("--output", default=PROMPT_BUNDLE_PATH, help="Bundle path (default: PROMPT_BUNDLE_PATH)")
+    args = parser.parse_args()
+    if not args.output:
+        parser.error("no bundle path: pass --output or set PROMPT_BUNDLE_PATH")
+    
+    bundle = write_bundle(args.output)
+    print(
+        f"Wrote {args.output}: system prompt {len(bundle['system_prompt'])} chars, "
+        f"{len(bundle['templates'])} templates, tool specs for {', '.join(bundle['tools'])}"
+    )
+
+
+if __name__ == "__main__":
+    main()
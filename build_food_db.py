@@ -0,0 +1,39 @@
+"""
+Food Nutrition AI Agent - Food Database Build Step
+
+Compiles the built-in foods plus CSV/SQLite food tables into one
+memory-mapped food file (.fdb). Point NUTRITION_DB_PATH at the output:
+it opens without parsing, and server processes share its pages.
+Later sources override earlier ones for the same food name.
+
+Run:
+    python build_food_db.py data/foods.csv [more.csv ...] --output data/foods.fdb
+"""
+
+import argparse
+import itertools
+
+from agent_core.food_db import load_foods
+from agent_core.food_file import FOOD_FILE_EXTENSION, is_food_file, write_food_file
+from agent_core.tools import NutritionCalculator
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the memory-mapped food database file")
+    parser.add_argument("sources", nargs="*", help="CSV or SQLite food tables")
+    parser.add_argument("--output", required=True, help=f"Food file path (*{FOOD_FILE_EXTENSION})")
+    parser.add_argument("--no-builtin", action="store_true", help="Leave out the built-in foods")
+    args = parser.parse_args()
+    if not is_food_file(args.output):
+        parser.error(f"--output must end in {FOOD_FILE_EXTENSION}")
+    if args.no_builtin and not args.sources:
+        parser.error("no foods: pass source tables or drop --no-builtin")
+    
+    rows = [] if args.no_builtin else [NutritionCalculator.FOOD_DATABASE.items()]
+    rows += [load_foods(source) for source in args.sources]
+    count = write_food_file(args.output, itertools.chain.from_iterable(rows))
+    print(f"Wrote {args.output}: {count} foods")
+
+
+if __name__ == "__main__":
+    main()
@@ -29,6 +29,25 @@ class LLMConfig:
     base_url: Optional[str] = None
     max_tokens: int = 4096
     temperature: float = 0.7
+    # HTTP connection pool settings (shared client per agent)
+    http2: bool = False
+    max_connections: int = 20
+    max_keepalive_connections: int = 10
+    keepalive_expiry: float = 30.0
+    timeout: float = 60.0
+    connect_timeout: float = 10.0
+    # Provider-side prompt caching (Claude cache_control breakpoints)
+    prompt_cache: bool = True
+    # Client-side request rate limit per provider (0 = unlimited, adapts to 429s)
+    rate_limit_rps: float = 0.0
+    # Retries with jittered exponential backoff, honouring Retry-After
+    max_retries: int = 3
+    retry_base_delay: float = 0.5
+    retry_max_delay: float = 20.0
+    retry_max_total: float = 60.0
+    # Circuit breaker per provider
+    circuit_failure_threshold: int = 5
+    circuit_reset_timeout: float = 30.0
 
 
 # Provider-specific configurations
@@ -54,10 +73,26 @@ def get_llm_config(provider: str = None) -> LLMConfig:
     
     Environment variables:
     - MODEL_API_KEY: API key for the selected provider
+    - <PROVIDER>_API_KEY, <PROVIDER>_MODEL, <PROVIDER>_BASE_URL: Per-provider
+      overrides, e.g. CLAUDE_API_KEY (needed when several providers are used)
     - LLM_PROVIDER: Provider name (deepseek, claude, openai). Default: deepseek
     - LLM_MODEL: Model name (optional, uses provider default if not set)
     - LLM_MAX_TOKENS: Max tokens for response (default: 4096)
     - LLM_TEMPERATURE: Temperature for generation (default: 0.7)
+    - LLM_HTTP2: Enable HTTP/2 if the `h2` package is installed (default: false)
+    - LLM_MAX_CONNECTIONS: Max pooled connections (default: 20)
+    - LLM_MAX_KEEPALIVE: Max idle keep-alive connections (default: 10)
+    - LLM_KEEPALIVE_EXPIRY: Idle connection lifetime in seconds (default: 30)
+    - LLM_TIMEOUT: Request timeout in seconds (default: 60)
+    - LLM_CONNECT_TIMEOUT: Connect timeout in seconds (default: 10)
+    - LLM_PROMPT_CACHE: Mark system prompt and tools as cacheable (default: true)
+    - LLM_RATE_LIMIT_RPS: Max requests per second to the provider (default: 0 = unlimited)
+    - LLM_MAX_RETRIES: Retries on 429/5xx/network errors (default: 3)
+    - LLM_RETRY_BASE_DELAY: First backoff in seconds, doubled per retry (default: 0.5)
+    - LLM_RETRY_MAX_DELAY: Max single backoff in seconds (default: 20)
+    - LLM_RETRY_MAX_TOTAL: Max total time for one call incl. retries (default: 60)
+    - LLM_CIRCUIT_THRESHOLD: Consecutive failures that open the circuit (default: 5)
+    - LLM_CIRCUIT_RESET: Seconds before a probe call after opening (default: 30)
     """
     # Get provider from env or parameter
     provider_name = provider or os.getenv("LLM_PROVIDER", "deepseek").lower()
@@ -68,10 +103,11 @@ def get_llm_config(provider: str = None) -> LLMConfig:
         raise ValueError(f"Unsupported provider: {provider_name}. "
                         f"Supported: {[p.value for p in LLMProvider]}")
     
-    # Get API key
-    api_key = os.getenv("MODEL_API_KEY")
+    # Get API key (a provider-specific key wins, e.g. CLAUDE_API_KEY)
+    prefix = llm_provider.value.upper()
+    api_key = os.getenv(f"{prefix}_API_KEY") or os.getenv("MODEL_API_KEY")
     if not api_key:
-        raise ValueError("MODEL_API_KEY environment variable is required")
+        raise ValueError(f"MODEL_API_KEY (or {prefix}_API_KEY) environment variable is required")
     
     # Get provider config
     provider_config = PROVIDER_CONFIGS[llm_provider]
@@ -79,17 +115,143 @@ def get_llm_config(provider: str = None) -> LLMConfig:
     return LLMConfig(
         provider=llm_provider,
         api_key=api_key,
-        model=os.getenv("LLM_MODEL", provider_config["default_model"]),
-        base_url=provider_config["base_url"],
+        model=os.getenv(f"{prefix}_MODEL") or os.getenv("LLM_MODEL", provider_config["default_model"]),
+        base_url=os.getenv(f"{prefix}_BASE_URL", provider_config["base_url"]),
         max_tokens=int(os.getenv("LLM_MAX_TOKENS", "4096")),
         temperature=float(os.getenv("LLM_TEMPERATURE", "0.7")),
+        http2=os.getenv("LLM_HTTP2", "false").lower() in ("1", "true", "yes"),
+        max_connections=int(os.getenv("LLM_MAX_CONNECTIONS", "20")),
+        max_keepalive_connections=int(os.getenv("LLM_MAX_KEEPALIVE", "10")),
+        keepalive_expiry=float(os.getenv("LLM_KEEPALIVE_EXPIRY", "30")),
+        timeout=float(os.getenv("LLM_TIMEOUT", "60")),
+        connect_timeout=float(os.getenv("LLM_CONNECT_TIMEOUT", "10")),
+        prompt_cache=os.getenv("LLM_PROMPT_CACHE", "true").lower() in ("1", "true", "yes"),
+        rate_limit_rps=float(os.getenv("LLM_RATE_LIMIT_RPS", "0")),
+        max_retries=int(os.getenv("LLM_MAX_RETRIES", "3")),
+        retry_base_delay=float(os.getenv("LLM_RETRY_BASE_DELAY", "0.5")),
+        retry_max_delay=float(os.getenv("LLM_RETRY_MAX_DELAY", "20")),
+        retry_max_total=float(os.getenv("LLM_RETRY_MAX_TOTAL", "60")),
+        circuit_failure_threshold=int(os.getenv("LLM_CIRCUIT_THRESHOLD", "5")),
+        circuit_reset_timeout=float(os.getenv("LLM_CIRCUIT_RESET", "30")),
     )
 
 
+def get_fallback_configs(primary: LLMConfig) -> list[LLMConfig]:
+    """
+    Configs of the fallback providers listed in LLM_FALLBACK_PROVIDERS.
+    
+    Each uses its own <PROVIDER>_API_KEY / <PROVIDER>_MODEL when set and
+    the provider's default model otherwise (LLM_MODEL is for the primary).
+    """
+    configs = []
+    for name in ROUTER_CONFIG.get("fallback_providers", []):
+        if name == primary.provider.value:
+            continue
+        config = get_llm_config(name)
+        config.model = os.getenv(
+            f"{config.provider.value.upper()}_MODEL",
+            PROVIDER_CONFIGS[config.provider]["default_model"],
+        )
+        configs.append(config)
+    return configs
+
+
+# Multi-provider routing: failover in list order, optional hedged requests
+ROUTER_CONFIG = {
+    "fallback_providers": [
+        name.strip().lower()
+        for name in os.getenv("LLM_FALLBACK_PROVIDERS", "").split(",")
+        if name.strip()
+    ],  # e.g. "claude,openai"
+    "failover_retries": int(os.getenv("LLM_FAILOVER_RETRIES", "1")),  # Retries before moving on
+    "hedge": os.getenv("LLM_HEDGE", "false").lower() in ("1", "true", "yes"),
+    "hedge_percentile": float(os.getenv("LLM_HEDGE_PERCENTILE", "95")),  # Of first-byte latency
+    "hedge_min_delay": float(os.getenv("LLM_HEDGE_MIN_DELAY", "0.2")),  # Seconds
+    "hedge_max_delay": float(os.getenv("LLM_HEDGE_MAX_DELAY", "5")),  # Seconds, also used until enough samples
+}
+
+
+# Instrumentation: spans and metrics per turn (off by default, near-zero cost)
+TELEMETRY_CONFIG = {
+    "enabled": os.getenv("TELEMETRY_ENABLED", "false").lower() in ("1", "true", "yes"),
+    "export_path": os.getenv("TELEMETRY_EXPORT_PATH") or None,  # OTLP/JSON lines file
+    "max_spans": int(os.getenv("TELEMETRY_MAX_SPANS", "1000")),  # Recent spans kept in memory
+}
+
+
 # Web search configuration
 SEARCH_CONFIG = {
     "serper_api_key": os.getenv("SERPER_API_KEY"),  # For Google Search via Serper
+    "serper_url": os.getenv("SERPER_URL", "https://google.serper.dev/search"),
     "max_results": int(os.getenv("SEARCH_MAX_RESULTS", "5")),
+    # Result cache: in-memory LRU, plus SQLite on disk when a path is set
+    "cache_enabled": os.getenv("SEARCH_CACHE_ENABLED", "true").lower() in ("1", "true", "yes"),
+    "cache_ttl": float(os.getenv("SEARCH_CACHE_TTL", "86400")),  # Seconds
+    "cache_max_entries": int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "1024")),
+    "cache_path": os.getenv("SEARCH_CACHE_PATH"),  # e.g. .cache/search.sqlite3
+    "cache_disk_max_entries": int(os.getenv("SEARCH_CACHE_DISK_MAX_ENTRIES", "100000")),
+}
+
+
+# LLM response cache (deterministic requests only, unless forced)
+RESPONSE_CACHE_CONFIG = {
+    "enabled": os.getenv("LLM_CACHE_ENABLED", "false").lower() in ("1", "true", "yes"),
+    "force": os.getenv("LLM_CACHE_FORCE", "false").lower() in ("1", "true", "yes"),  # Also cache temperature > 0
+    "ttl": float(os.getenv("LLM_CACHE_TTL", "86400")),  # Seconds
+    "max_entries": int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1024")),
+    "path": os.getenv("LLM_CACHE_PATH"),  # e.g. .cache/llm.sqlite3
+    "disk_max_entries": int(os.getenv("LLM_CACHE_DISK_MAX_ENTRIES", "100000")),
+}
+
+
+# Semantic cache: answers to similar first questions ("phở bò có mấy calo" ~ "bao nhiêu calo trong phở bò")
+SEMANTIC_CACHE_CONFIG = {
+    "enabled": os.getenv("SEMANTIC_CACHE_ENABLED", "false").lower() in ("1", "true", "yes"),
+    "threshold": float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92")),  # Cosine similarity (0-1)
+    "max_entries": int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "2048")),
+    "ttl": float(os.getenv("SEMANTIC_CACHE_TTL", "86400")),  # Seconds
+}
+
+
+# Nutrition database configuration
+NUTRITION_CONFIG = {
+    "database_path": os.getenv("NUTRITION_DB_PATH"),  # Optional CSV/SQLite food table or compiled .fdb file
+    "fuzzy_threshold": float(os.getenv("NUTRITION_FUZZY_THRESHOLD", "0.75")),  # Typo tolerance (0-1)
+}
+
+
+# Agent loop configuration
+AGENT_CONFIG = {
+    "max_tool_concurrency": int(os.getenv("TOOL_MAX_CONCURRENCY", "4")),  # Parallel tool calls per turn
+    "tool_timeout": float(os.getenv("TOOL_TIMEOUT", "30")),  # Seconds per tool call
+    # Context window: recent turns sent verbatim, older turns summarized
+    "context_max_tokens": int(os.getenv("CONTEXT_MAX_TOKENS", "6000")),
+    "context_recent_turns": int(os.getenv("CONTEXT_RECENT_TURNS", "10")),
+    "summary_max_tokens": int(os.getenv("CONTEXT_SUMMARY_MAX_TOKENS", "400")),
+    # Answer simple nutrition questions locally with skills (no LLM call)
+    "skill_fast_path": os.getenv("SKILL_FAST_PATH", "true").lower() in ("1", "true", "yes"),
+    "skill_min_score": float(os.getenv("SKILL_MIN_SCORE", "0.5")),  # Keyword score needed to answer locally
+}
+
+
+# Server mode configuration (server.py)
+SERVER_CONFIG = {
+    "host": os.getenv("SERVER_HOST", "127.0.0.1"),
+    "port": int(os.getenv("SERVER_PORT", "8000")),
+    "session_idle_timeout": float(os.getenv("SESSION_IDLE_TIMEOUT", "1800")),  # Seconds
+    "max_sessions": int(os.getenv("SESSION_MAX", "10000")),
+    # Append-only session history; evicted sessions are paged out and resumed from it
+    "session_log_path": os.getenv("SESSION_LOG_PATH"),  # e.g. .cache/sessions.sqlite3
+    "session_log_max_age": float(os.getenv("SESSION_LOG_MAX_AGE", "604800")),  # Seconds
+    # Pre-fork worker processes sharing the port (POSIX); see agent_core/prefork.py
+    "workers": int(os.getenv("SERVER_WORKERS", "1")),
+    "graceful_timeout": float(os.getenv("SERVER_GRACEFUL_TIMEOUT", "30")),  # Seconds to finish requests on shutdown
+}
+
+
+# Batch pipeline configuration (batch.py)
+BATCH_CONFIG = {
+    "workers": int(os.getenv("BATCH_WORKERS", "8")),  # Dishes processed concurrently
 }
 
 
@@ -105,6 +267,9 @@ else:
 PROMPTS_DIR = os.path.join(BASE_DIR, "knowledge_base", "prompts")
 TEMPLATES_DIR = os.path.join(BASE_DIR, "knowledge_base", "templates")
 
+# Precompiled prompts + tool specs (python build_bundle.py); empty to disable
+PROMPT_BUNDLE_PATH = os.getenv("PROMPT_BUNDLE_PATH", os.path.join(BASE_DIR, "knowledge_base", "bundle.json"))
+
 
 def get_system_prompt() -> str:
     """Load system prompt from file"""
@@ -6,47 +6,98 @@ calculating calories, protein, fat, and providing dietary recommendations.
 """
 
 import asyncio
+import importlib
 import sys
+import threading
 from rich.console import Console
-from rich.panel import Panel
-from rich.markdown import Markdown
-from rich.prompt import Prompt
 
 from config import get_llm_config, LLMProvider
 from agent_core import FoodNutritionAgent, LLMException
 
 console = Console()
 
+# Heavy rich modules (Markdown pulls in markdown-it and pygments) are
+# imported on first use, or in the background while the user types
+DEFERRED_MODULES = ("rich.markdown", "rich.spinner")
 
-def print_welcome():
-    """Print welcome message"""
-    welcome_text = """
-# 🍽️ Food Nutrition AI Agent
+# Rich markup rather than Markdown, so startup does not wait for the Markdown renderer
+WELCOME_TEXT = """
+[bold]🍽️ Food Nutrition AI Agent[/bold]
 
 Xin chào! Tôi là trợ lý AI chuyên về phân tích dinh dưỡng thực phẩm.
 
-## Tôi có thể giúp bạn:
-- 📊 Phân tích calories, protein, chất béo của món ăn
-- 🔍 Tìm kiếm thông tin dinh dưỡng trên web
-- 🥗 So sánh giá trị dinh dưỡng giữa các món
-- 💡 Gợi ý món ăn healthy thay thế
-- 🍲 Tính tổng dinh dưỡng cho cả bữa ăn
+[bold]Tôi có thể giúp bạn:[/bold]
+ • 📊 Phân tích calories, protein, chất béo của món ăn
+ • 🔍 Tìm kiếm thông tin dinh dưỡng trên web
+ • 🥗 So sánh giá trị dinh dưỡng giữa các món
+ • 💡 Gợi ý món ăn healthy thay thế
+ • 🍲 Tính tổng dinh dưỡng cho cả bữa ăn
 
-**Gõ câu hỏi và nhấn Enter để bắt đầu!**
-**Gõ 'quit' hoặc 'exit' để thoát.**
-**Gõ 'clear' để xóa lịch sử hội thoại.**
-    """
-    console.print(Panel(Markdown(welcome_text), border_style="green"))
+[bold]Gõ câu hỏi và nhấn Enter để bắt đầu![/bold]
+[bold]Gõ 'quit' hoặc 'exit' để thoát.[/bold]
+[bold]Gõ 'clear' để xóa lịch sử hội thoại.[/bold]
+"""
 
 
-def print_response(response: str):
-    """Print agent response with formatting"""
-    console.print()
-    console.print(Panel(
+def preload_renderers():
+    """Import deferred rich modules in a background thread"""
+    def load():
+        for name in DEFERRED_MODULES:
+            importlib.import_module(name)
+    
+    threading.Thread(target=load, name="preload-renderers", daemon=True).start()
+
+
+def print_welcome():
+    """Print welcome message"""
+    from rich.panel import Panel
+    
+    console.print(Panel(WELCOME_TEXT, border_style="green"))
+
+
+def render_response(response: str):
+    """Render agent response as a panel"""
+    from rich.markdown import Markdown
+    from rich.panel import Panel
+    
+    return Panel(
         Markdown(response),
         title="🤖 AI Agent",
         border_style="blue",
-    ))
+    )
+
+
+class StreamingResponse:
+    """
+    Renderable that accumulates streamed text.
+    
+    Markdown is only parsed when Live refreshes, not on every delta.
+    """
+    
+    def __init__(self):
+        from rich.spinner import Spinner
+        
+        self.text = ""
+        self._spinner = Spinner("dots", text="[bold blue]Đang suy nghĩ...")
+    
+    def __rich__(self):
+        if not self.text:
+            return self._spinner
+        return render_response(self.text)
+
+
+async def stream_response(agent: FoodNutritionAgent, user_input: str):
+    """Print agent response progressively as tokens arrive"""
+    from rich.live import Live
+    
+    console.print()
+    view = StreamingResponse()
+    
+    with Live(view, console=console, refresh_per_second=12, vertical_overflow="visible"):
+        async for delta in agent.chat_stream(user_input):
+            view.text += delta
+    
+    console.print(f"[dim]Tokens: {agent.turn_usage}[/dim]")
     console.print()
 
 
@@ -58,6 +109,7 @@ def print_error(error: str):
 async def main():
     """Main function to run the agent"""
     print_welcome()
+    preload_renderers()
     
     # Initialize agent
     try:
@@ -72,7 +124,16 @@ async def main():
         console.print("3. (Tùy chọn) Thêm SERPER_API_KEY cho tính năng search web")
         return
     
-    # Main conversation loop
+    try:
+        await conversation_loop(agent)
+    finally:
+        await agent.aclose()
+
+
+async def conversation_loop(agent: FoodNutritionAgent):
+    """Read user input and answer until the user quits"""
+    from rich.prompt import Prompt
+    
     while True:
         try:
             # Get user input
@@ -91,11 +152,8 @@ async def main():
             if not user_input.strip():
                 continue
             
-            # Process message
-            with console.status("[bold blue]Đang suy nghĩ...", spinner="dots"):
-                response = await agent.chat(user_input)
-            
-            print_response(response)
+            # Process message, rendering the answer as it streams in
+            await stream_response(agent, user_input)
             
         except LLMException as e:
             print_error(f"LLM Error: {e}")
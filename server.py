@@ -0,0 +1,332 @@
+"""
+Food Nutrition AI Agent - HTTP Server Entry Point
+
+Serves many users at once. Each session keeps its own conversation
+history while all sessions share one pooled LLM client and one set of
+tool instances.
+
+Endpoints:
+    POST   /chat                 {"message": "...", "session_id": "..."} -> JSON answer
+    POST   /chat/stream          same body -> Server-Sent Events with text deltas
+    DELETE /sessions/{id}        drop a session
+    GET    /health               status, session count, cache and routing metrics
+    GET    /metrics              Prometheus metrics (TELEMETRY_ENABLED=true)
+
+Run:
+    python server.py --host 0.0.0.0 --port 8000
+    python server.py --host 0.0.0.0 --port 8000 --workers 4
+
+With several workers, sessions move between processes through the
+session log and the search/LLM caches are shared through their SQLite
+files, so set SESSION_LOG_PATH, SEARCH_CACHE_PATH and LLM_CACHE_PATH.
+"""
+
+import argparse
+import json
+import os
+import sys
+import traceback
+from dataclasses import asdict
+from typing import Optional
+
+from config import get_llm_config, LLMConfig, RESPONSE_CACHE_CONFIG, SEARCH_CONFIG, SERVER_CONFIG
+from agent_core import FoodNutritionAgent, LLMException, create_http_client
+from agent_core.router import ProviderRouter
+from agent_core.sessions import SessionStore
+from agent_core.session_log import SessionLog
+from agent_core.telemetry import telemetry
+
+
+class AgentServer:
+    """
+    ASGI application wrapping FoodNutritionAgent sessions.
+    
+    Works with any ASGI server (uvicorn, hypercorn, ...).
+    """
+    
+    def __init__(self, config: Optional[LLMConfig] = None, workers: Optional[int] = None):
+        self.config = config
+        self.workers = workers or SERVER_CONFIG.get("workers", 1)  # Processes serving this app
+        self.http_client = None
+        self.search_tool = None
+        self.nutrition_tool = None
+        self.response_cache = None
+        self.semantic_cache = None
+        self.skill_router = None
+        self.router: Optional[ProviderRouter] = None
+        self.sessions: Optional[SessionStore] = None
+        self.session_log: Optional[SessionLog] = None
+    
+    async def startup(self):
+        """Create shared resources"""
+        self.config = self.config or get_llm_config()
+        self.http_client = create_http_client(self.config)
+        self.search_tool = FoodNutritionAgent.create_search_tool()
+        self.nutrition_tool = FoodNutritionAgent.create_nutrition_tool()
+        self.response_cache = FoodNutritionAgent.create_response_cache()
+        self.semantic_cache = FoodNutritionAgent.create_semantic_cache()
+        self.skill_router = FoodNutritionAgent.create_skill_router(self.nutrition_tool)
+        self.router = ProviderRouter.from_config(self.config)
+        log_path = SERVER_CONFIG.get("session_log_path")
+        self.session_log = SessionLog(log_path) if log_path else None
+        self.sessions = SessionStore(
+            self.create_agent,
+            idle_timeout=SERVER_CONFIG.get("session_idle_timeout", 1800.0),
+            max_sessions=SERVER_CONFIG.get("max_sessions", 10_000),
+            log=self.session_log,
+            log_max_age=SERVER_CONFIG.get("session_log_max_age"),
+            shared=self.workers > 1,
+        )
+        self.sessions.start()
+    
+    async def shutdown(self):
+        """Release shared resources"""
+        if self.sessions is not None:
+            await self.sessions.close()
+        if self.session_log is not None:
+            self.session_log.close()
+        if self.http_client is not None:
+            await self.http_client.aclose()
+        telemetry.flush()
+    
+    def create_agent(self) -> FoodNutritionAgent:
+        """Create a session agent backed by the shared client and tools"""
+        return FoodNutritionAgent(
+            self.config,
+            http_client=self.http_client,
+            search_tool=self.search_tool,
+            nutrition_tool=self.nutrition_tool,
+            response_cache=self.response_cache,
+            semantic_cache=self.semantic_cache,
+            skill_router=self.skill_router,
+            router=self.router,
+        )
+    
+    def health(self) -> dict:
+        """Status, session count, cache and routing metrics"""
+        data = {"status": "ok", "sessions": len(self.sessions)}
+        if self.workers > 1:
+            data["worker"] = {"pid": os.getpid(), "workers": self.workers}
+        if self.session_log is not None:
+            data["session_log"] = {"sessions": len(self.session_log), "resumed": self.sessions.resumed}
+        if self.response_cache is not None:
+            data["response_cache"] = self.response_cache.as_dict()
+        if self.semantic_cache is not None:
+            data["semantic_cache"] = self.semantic_cache.stats.as_dict()
+        if self.skill_router is not None:
+            data["skills"] = self.skill_router.as_dict()
+        if self.router is not None:
+            data["router"] = self.router.as_dict()
+        return data
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+        
+        method = scope["method"]
+        path = scope["path"].rstrip("/") or "/"
+        
+        try:
+            if method == "POST" and path == "/chat":
+                await self._chat(receive, send)
+            elif method == "POST" and path == "/chat/stream":
+                await self._chat_stream(receive, send)
+            elif method == "DELETE" and path.startswith("/sessions/"):
+                deleted = self.sessions.delete(path[len("/sessions/"):])
+                await send_json(send, {"deleted": deleted}, status=200 if deleted else 404)
+            elif method == "GET" and path == "/health":
+                await send_json(send, self.health())
+            elif method == "GET" and path == "/metrics" and telemetry.enabled:
+                await send_text(send, telemetry.render_prometheus(), "text/plain; version=0.0.4; charset=utf-8")
+            else:
+                await send_json(send, {"error": "Not found"}, status=404)
+        except ValueError as e:
+            await send_json(send, {"error": str(e)}, status=400)
+        except LLMException as e:
+            await send_json(send, {"error": f"LLM Error: {e}"}, status=502)
+    
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    await self.startup()
+                except Exception as e:
+                    await send({"type": "lifespan.startup.failed", "message": str(e)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.shutdown()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+    
+    async def _chat(self, receive, send):
+        session_id, message = await read_chat_request(receive)
+        session = self.sessions.get_or_create(session_id)
+        
+        async with session.lock:
+            response = await session.agent.chat(message)
+            session.touch()
+        
+        await send_json(send, {
+            "session_id": session.id,
+            "response": response,
+            "usage": asdict(session.agent.turn_usage),
+        })
+    
+    async def _chat_stream(self, receive, send):
+        session_id, message = await read_chat_request(receive)
+        session = self.sessions.get_or_create(session_id)
+        
+        async with session.lock:
+            await send({
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", b"text/event-stream; charset=utf-8"),
+                    (b"cache-control", b"no-cache"),
+                    (b"x-session-id", session.id.encode("ascii")),
+                ],
+            })
+            
+            try:
+                async for delta in session.agent.chat_stream(message):
+                    await send_event(send, {"delta": delta})
+                await send_event(send, {
+                    "session_id": session.id,
+                    "usage": asdict(session.agent.turn_usage),
+                }, event="done")
+            except LLMException as e:
+                await send_event(send, {"error": f"LLM Error: {e}"}, event="error")
+            except Exception as e:
+                # Headers are already sent: report in-stream instead of a second response
+                traceback.print_exc()
+                await send_event(send, {"error": f"Internal error: {type(e).__name__}"}, event="error")
+            finally:
+                session.touch()
+            
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+async def read_body(receive) -> bytes:
+    """Read the full request body"""
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body"):
+            return b"".join(chunks)
+
+
+async def read_chat_request(receive) -> tuple[Optional[str], str]:
+    """Parse a chat request body into (session_id, message)"""
+    try:
+        data = json.loads(await read_body(receive) or b"{}")
+    except json.JSONDecodeError:
+        raise ValueError("Request body must be JSON")
+    
+    message = data.get("message")
+    if not isinstance(message, str) or not message.strip():
+        raise ValueError("'message' is required")
+    return data.get("session_id"), message
+
+
+async def send_json(send, data: dict, status: int = 200):
+    body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json; charset=utf-8"),
+            (b"content-length", str(len(body)).encode("ascii")),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def send_text(send, text: str, content_type: str, status: int = 200):
+    body = text.encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", content_type.encode("ascii")),
+            (b"content-length", str(len(body)).encode("ascii")),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def send_event(send, data: dict, event: Optional[str] = None):
+    payload = json.dumps(data, ensure_ascii=False)
+    frame = f"event: {event}\ndata: {payload}\n\n" if event else f"data: {payload}\n\n"
+    await send({"type": "http.response.body", "body": frame.encode("utf-8"), "more_body": True})
+
+
+app = AgentServer()
+
+def unshared_settings() -> list[str]:
+    """Unset paths that worker processes need to share sessions and caches"""
+    missing = []
+    if not SERVER_CONFIG.get("session_log_path"):
+        missing.append("SESSION_LOG_PATH")
+    if SEARCH_CONFIG.get("cache_enabled") and not SEARCH_CONFIG.get("cache_path"):
+        missing.append("SEARCH_CACHE_PATH")
+    if RESPONSE_CACHE_CONFIG.get("enabled") and not RESPONSE_CACHE_CONFIG.get("path"):
+        missing.append("LLM_CACHE_PATH")
+    return missing
+
+
+def run_workers(uvicorn, host: str, port: int, workers: int):
+    """Serve `app` from pre-forked worker processes sharing one socket"""
+    from agent_core.prefork import PreforkSupervisor, bind_socket
+    
+    missing = unshared_settings()
+    if missing:
+        print(f"Warning: {', '.join(missing)} not set; workers will not share those", file=sys.stderr)
+    
+    # Loaded once here and shared copy-on-write by the workers
+    FoodNutritionAgent.create_nutrition_tool().index.build()
+    app.workers = workers
+    graceful_timeout = SERVER_CONFIG.get("graceful_timeout", 30.0)
+    
+    def serve(sock):
+        server = uvicorn.Server(uvicorn.Config(
+            app, log_level="info", timeout_graceful_shutdown=graceful_timeout,
+        ))
+        server.run(sockets=[sock])
+    
+    sock = bind_socket(host, port)
+    print(f"Serving on http://{host}:{port} with {workers} workers (pid {os.getpid()})", file=sys.stderr)
+    PreforkSupervisor(serve, sock, workers, graceful_timeout=graceful_timeout + 5).run()
+
+
+def run():
+    """Entry point for running the server"""
+    parser = argparse.ArgumentParser(description="Food Nutrition AI Agent server")
+    parser.add_argument("--host", default=SERVER_CONFIG.get("host", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=SERVER_CONFIG.get("port", 8000))
+    parser.add_argument("--workers", type=int, default=SERVER_CONFIG.get("workers", 1),
+                        help="Worker processes (default: SERVER_WORKERS)")
+    args = parser.parse_args()
+    
+    try:
+        import uvicorn
+    except ImportError:
+        raise SystemExit("Server mode requires uvicorn: pip install uvicorn")
+    
+    if args.workers <= 1:
+        uvicorn.run(app, host=args.host, port=args.port, log_level="info")
+    elif hasattr(os, "fork"):
+        run_workers(uvicorn, args.host, args.port, args.workers)
+    else:
+        # No fork (Windows): uvicorn spawns the workers, which re-import this module
+        os.environ["SERVER_WORKERS"] = str(args.workers)
+        uvicorn.run("server:app", host=args.host, port=args.port, workers=args.workers, log_level="info")
+
+
+if __name__ == "__main__":
+    run()
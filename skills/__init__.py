@@ -4,9 +4,13 @@ Skills Module
 
 from .registry import registry, SkillRegistry, Skill
 from . import food_analysis  # Import to register skills
+from .router import SkillRouter, SkillMatch, SkillAnswer
 
 __all__ = [
     "registry",
     "SkillRegistry", 
     "Skill",
+    "SkillRouter",
+    "SkillMatch",
+    "SkillAnswer",
 ]
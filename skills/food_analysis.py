@@ -1,56 +1,186 @@
 """
 Food Analysis Skills - Specialized skills for food and nutrition analysis.
+
+Handlers compute their results from the NutritionCalculator database.
+Skills with `parse` and `render` are answered locally by the SkillRouter
+when a message matches them confidently; the others are left to the LLM.
 """
 
+from dataclasses import asdict
+from typing import Optional
+
+from agent_core.food_db import NUTRIENT_FIELDS, fold_accents, normalize_food_name
+from agent_core.tools import NutritionCalculator, MealItem, MealNutrition
+from config import NUTRITION_CONFIG
 from .registry import registry
 
 
+_calculator: NutritionCalculator | None = None
+
+# Goal words (accent-free) -> nutrient to lower
+GOAL_NUTRIENTS = {
+    "carb": "carbs",
+    "carbs": "carbs",
+    "tinh bot": "carbs",
+    "duong": "carbs",
+    "beo": "fat",
+    "fat": "fat",
+    "mo": "fat",
+}
+
+NUTRIENT_LABELS = {
+    "calories": ("🔥 Calories", "kcal"),
+    "protein": ("💪 Protein", "g"),
+    "fat": ("🧈 Fat", "g"),
+    "carbs": ("🍚 Carbs", "g"),
+}
+
+
+def get_calculator() -> NutritionCalculator:
+    """Shared NutritionCalculator for skill handlers"""
+    global _calculator
+    if _calculator is None:
+        _calculator = NutritionCalculator(
+            database_path=NUTRITION_CONFIG.get("database_path"),
+            fuzzy_threshold=NUTRITION_CONFIG.get("fuzzy_threshold"),
+        )
+    return _calculator
+
+
+def _find(calculator: NutritionCalculator, food_name: str) -> tuple[Optional[str], Optional[dict]]:
+    """Best database match (name, nutrients per 100g), or (None, None)"""
+    matches = calculator.search(food_name, limit=1)
+    if not matches:
+        return None, None
+    return matches[0].name, matches[0].data
+
+
+def _scale(data: dict, portion_grams: float) -> dict:
+    factor = portion_grams / 100
+    return {field: round(data[field] * factor, 2) for field in NUTRIENT_FIELDS}
+
+
+def parse_single_food(foods: list[tuple[str, Optional[float]]]) -> Optional[dict]:
+    if len(foods) != 1:
+        return None
+    food_name, grams = foods[0]
+    return {"food_name": food_name, "portion_grams": grams or 100}
+
+
+def render_nutrition(result: dict) -> str:
+    return get_calculator().format_nutrition(result["matched_name"], result["per_100g"], result["portion"]).strip()
+
+
 @registry.register(
     name="analyze_nutrition",
     description="Phân tích chi tiết thông tin dinh dưỡng của món ăn bao gồm calories, protein, chất béo, carbohydrates",
     examples=[
         "Phân tích dinh dưỡng phở bò",
-        "Calories trong 1 bát cơm",
-        "Thông tin dinh dưỡng của trứng chiên",
+        "Calories trong 1 bát cơm trắng",
+        "Thông tin dinh dưỡng của trứng gà",
+        "Phở bò có bao nhiêu calo?",
+        "100g thịt gà bao nhiêu kcal, protein, chất béo, tinh bột",
     ],
-    tags=["nutrition", "food", "analysis"]
+    tags=["nutrition", "food", "analysis"],
+    parse=parse_single_food,
+    render=render_nutrition,
 )
-async def analyze_nutrition(food_name: str, portion_grams: int = 100) -> dict:
+async def analyze_nutrition(
+    food_name: str,
+    portion_grams: float = 100,
+    calculator: Optional[NutritionCalculator] = None,
+) -> dict:
     """
     Analyze nutrition information for a food item.
     
     Returns dict with:
-    - calories: kcal
-    - protein: grams
-    - fat: grams  
-    - carbs: grams
-    - fiber: grams (if available)
-    - sodium: mg (if available)
+    - matched_name: database food used (None if not found)
+    - portion: grams
+    - nutrition: calories (kcal), protein, fat, carbs (grams) for the portion
+    - per_100g: the same per 100g
     """
-    # This is a placeholder - actual implementation is in the agent's tools
+    matched_name, data = _find(calculator or get_calculator(), food_name)
     return {
         "food": food_name,
+        "matched_name": matched_name,
         "portion": portion_grams,
-        "status": "Use agent.chat() for full analysis"
+        "nutrition": _scale(data, portion_grams) if data else None,
+        "per_100g": data,
     }
 
 
+def parse_food_pair(foods: list[tuple[str, Optional[float]]]) -> Optional[dict]:
+    if len(foods) != 2:
+        return None
+    (food_a, grams_a), (food_b, grams_b) = foods
+    if grams_a and grams_b and grams_a != grams_b:
+        # Different portions are a meal question, not a comparison
+        return None
+    return {"food_a": food_a, "food_b": food_b, "portion_grams": grams_a or grams_b or 100}
+
+
+def render_comparison(result: dict) -> str:
+    a, b = result["foods"]
+    lines = [
+        f"⚖️ **So sánh dinh dưỡng** (khẩu phần {result['portion']:g}g)",
+        "",
+        f"| Chỉ số | {a['matched_name']} | {b['matched_name']} | Chênh lệch |",
+        "|--------|------|------|------------|",
+    ]
+    for field in NUTRIENT_FIELDS:
+        label, unit = NUTRIENT_LABELS[field]
+        lines.append(
+            f"| {label} | {a['nutrition'][field]:.1f} {unit} | {b['nutrition'][field]:.1f} {unit} "
+            f"| {result['differences'][field]:+.1f} {unit} |"
+        )
+    
+    difference = result["differences"]["calories"]
+    if difference:
+        more, less = (a, b) if difference > 0 else (b, a)
+        lines += ["", f"{more['matched_name']} nhiều hơn {less['matched_name']} {abs(difference):.1f} kcal."]
+    return "\n".join(lines)
+
+
 @registry.register(
     name="compare_foods",
     description="So sánh thông tin dinh dưỡng giữa các món ăn",
     examples=[
-        "So sánh cơm trắng và bún",
+        "So sánh cơm trắng và bún chả",
         "Thịt gà vs thịt bò",
         "Đồ ăn nào ít calories hơn",
+        "Thịt gà hay thịt bò nhiều protein hơn?",
     ],
-    tags=["nutrition", "food", "comparison"]
+    tags=["nutrition", "food", "comparison"],
+    parse=parse_food_pair,
+    render=render_comparison,
 )
-async def compare_foods(food_a: str, food_b: str) -> dict:
-    """Compare nutrition between two foods"""
+async def compare_foods(
+    food_a: str,
+    food_b: str,
+    portion_grams: float = 100,
+    calculator: Optional[NutritionCalculator] = None,
+) -> dict:
+    """
+    Compare nutrition between two foods at the same portion.
+    
+    `differences` is food_a minus food_b per nutrient; None if either
+    food is not in the database.
+    """
+    calculator = calculator or get_calculator()
+    foods = []
+    for food_name in (food_a, food_b):
+        matched_name, data = _find(calculator, food_name)
+        foods.append({
+            "food": food_name,
+            "matched_name": matched_name,
+            "nutrition": _scale(data, portion_grams) if data else None,
+        })
+    
+    a, b = foods[0]["nutrition"], foods[1]["nutrition"]
     return {
-        "food_a": food_a,
-        "food_b": food_b,
-        "status": "Use agent.chat() for full comparison"
+        "portion": portion_grams,
+        "foods": foods,
+        "differences": {field: round(a[field] - b[field], 2) for field in NUTRIENT_FIELDS} if a and b else None,
     }
 
 
@@ -63,27 +193,90 @@ async def compare_foods(food_a: str, food_b: str) -> dict:
     ],
     tags=["nutrition", "food", "healthy", "suggestion"]
 )
-async def suggest_healthy_alternatives(current_food: str, goal: str = None) -> dict:
-    """Suggest healthier food alternatives"""
+async def suggest_healthy_alternatives(
+    current_food: str,
+    goal: str = None,
+    limit: int = 3,
+    calculator: Optional[NutritionCalculator] = None,
+) -> dict:
+    """
+    Suggest database foods lower in the goal nutrient than `current_food`.
+    
+    The goal ("giảm carbs", "ít béo", ...) selects the nutrient to lower;
+    calories by default. Whether a suggestion suits a meal is left to the
+    LLM, so this skill is not answered locally.
+    """
+    calculator = calculator or get_calculator()
+    nutrient = "calories"
+    if goal:
+        words = f" {fold_accents(normalize_food_name(goal))} "
+        nutrient = next((field for word, field in GOAL_NUTRIENTS.items() if f" {word} " in words), nutrient)
+    
+    matched_name, data = _find(calculator, current_food)
+    alternatives = []
+    if data is not None:
+        index = calculator.index
+        food_ids = index.nutrients.lowest_below(nutrient, data[nutrient], limit + 1)
+        alternatives = [
+            {"name": index.names[food_id], "nutrition": index.nutrients.row(food_id)}
+            for food_id in food_ids
+            if index.names[food_id] != matched_name
+        ][:limit]
+    
     return {
         "current_food": current_food,
-        "goal": goal,
-        "status": "Use agent.chat() for suggestions"
+        "matched_name": matched_name,
+        "goal": nutrient,
+        "alternatives": alternatives,
     }
 
 
+def parse_meal(foods: list[tuple[str, Optional[float]]]) -> Optional[dict]:
+    if len(foods) < 2:
+        return None
+    return {"foods": [food for food, _ in foods], "portions": [grams or 100 for _, grams in foods]}
+
+
+def render_meal(result: dict) -> str:
+    meal = MealNutrition(items=[MealItem(**item) for item in result["items"]], totals=result["totals"])
+    return get_calculator().format_meal(meal)
+
+
 @registry.register(
     name="calculate_meal_nutrition",
     description="Tính tổng dinh dưỡng của một bữa ăn gồm nhiều món",
     examples=[
-        "Tính calories bữa sáng: phở + nước mía",
-        "Dinh dưỡng bữa trưa gồm cơm, thịt kho, canh",
+        "Tính calories bữa sáng: phở bò + bánh mì",
+        "Dinh dưỡng bữa trưa gồm cơm trắng, thịt heo, rau muống",
+        "Tổng calories của phở bò 500g và trứng gà 100g",
+        "Bữa ăn gồm phở bò 500g và bánh mì 80g có bao nhiêu calo?",
     ],
-    tags=["nutrition", "food", "meal", "calculation"]
+    tags=["nutrition", "food", "meal", "calculation"],
+    parse=parse_meal,
+    render=render_meal,
 )
-async def calculate_meal_nutrition(foods: list[str]) -> dict:
-    """Calculate total nutrition for a meal with multiple items"""
+async def calculate_meal_nutrition(
+    foods: list[str],
+    portions: list[int] = None,
+    calculator: Optional[NutritionCalculator] = None,
+) -> dict:
+    """
+    Calculate total nutrition for a meal with multiple items.
+    
+    Portions default to 100g per food. Returns dict with:
+    - items: per-food nutrition (None for foods not in the database)
+    - totals: summed calories/protein/fat/carbs
+    - missing: foods that were not found
+    """
+    portions = portions or []
+    items = [
+        (food, portions[i] if i < len(portions) else 100)
+        for i, food in enumerate(foods)
+    ]
+    
+    meal = (calculator or get_calculator()).compute_meal(items)
     return {
-        "foods": foods,
-        "status": "Use agent.chat() for meal calculation"
+        "items": [asdict(item) for item in meal.items],
+        "totals": meal.totals,
+        "missing": meal.missing,
     }
@@ -2,7 +2,7 @@
 Skills Registry - Register and manage agent skills.
 """
 
-from typing import Callable, Any
+from typing import Callable, Optional
 from dataclasses import dataclass, field
 
 
@@ -14,6 +14,15 @@ class Skill:
     handler: Callable
     examples: list[str] = field(default_factory=list)
     tags: list[str] = field(default_factory=list)
+    # Local answering (see router.py): foods found in a message -> handler
+    # kwargs (None if they do not fit), and handler result -> answer text
+    parse: Optional[Callable[[list[tuple[str, Optional[float]]]], Optional[dict]]] = None
+    render: Optional[Callable[[dict], str]] = None
+    
+    @property
+    def local(self) -> bool:
+        """Whether the skill can answer without the LLM"""
+        return self.parse is not None and self.render is not None
 
 
 class SkillRegistry:
@@ -33,6 +42,8 @@ class SkillRegistry:
         description: str,
         examples: list[str] = None,
         tags: list[str] = None,
+        parse: Optional[Callable] = None,
+        render: Optional[Callable] = None,
     ):
         """
         Decorator to register a skill.
@@ -46,6 +57,9 @@ class SkillRegistry:
             )
             async def analyze_food(query: str) -> str:
                 ...
+        
+        Skills given `parse` and `render` can be answered locally by the
+        SkillRouter, without an LLM round-trip.
         """
         def decorator(func: Callable) -> Callable:
             self._skills[name] = Skill(
@@ -54,6 +68,8 @@ class SkillRegistry:
                 handler=func,
                 examples=examples or [],
                 tags=tags or [],
+                parse=parse,
+                render=render,
             )
             return func
         return decorator
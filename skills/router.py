@@ -0,0 +1,242 @@
+"""
+Skill Router - Answer simple, deterministic questions without the LLM.
+
+Messages are matched against an inverted keyword index built from the
+examples and tags of the registered skills. Words are accent-folded and
+weighted by how few skills use them, so "so sánh" points at
+compare_foods while "calories" counts for little. Food names and gram
+portions are read from the message with the nutrition database index.
+
+A message is answered locally only when:
+- the best-scoring skill that accepts the foods found has a local
+  implementation (`parse` + `render`), scores at least `min_score`, and
+  no other skill scores higher, or as high while also accepting them
+- every word is accounted for: a skill keyword, a food name, a gram
+  portion or a filler word. Anything else ("chiên", "2 quả", "còn ...
+  thì sao") means the question asks more than the skill answers
+
+Everything else goes to the LLM.
+"""
+
+import math
+import re
+from dataclasses import dataclass
+from typing import Iterator, Optional
+
+from agent_core.food_db import fold_accents, normalize_food_name
+from agent_core.tools import NutritionCalculator
+from .food_analysis import get_calculator
+from .registry import Skill, SkillRegistry, registry as default_registry
+
+# Portions without a fixed weight need the LLM's judgement
+PORTION_UNITS = frozenset({
+    "bát", "tô", "chén", "đĩa", "dĩa", "quả", "trái", "cái", "miếng", "lát", "ly",
+    "cốc", "hộp", "gói", "phần", "suất", "lon", "chai", "muỗng", "thìa", "con",
+})
+
+# Weight units -> grams
+GRAM_UNITS = {"g": 1, "gr": 1, "gam": 1, "gram": 1, "grams": 1, "kg": 1000}
+
+# Words that do not change the question (accent-free)
+FILLER_WORDS = frozenset({
+    "cho", "toi", "minh", "giup", "xin", "vui", "long", "nhe", "a", "oi", "voi", "ve", "la", "nhi",
+})
+
+_QUANTITY_RE = re.compile(r"^(\d+)(g|gr|gam|gram|grams|kg)?$")
+
+
+@dataclass
+class SkillMatch:
+    """A skill confidently matched to a message, with its handler arguments"""
+    skill: Skill
+    arguments: dict
+    score: float
+
+
+@dataclass
+class SkillAnswer:
+    """A message answered locally"""
+    skill: str
+    text: str
+    result: dict
+
+
+class SkillRouter:
+    """
+    Routes messages to locally answerable skills.
+    
+    Usage:
+        router = SkillRouter()
+        answer = await router.answer("so sánh thịt gà và thịt bò")
+        if answer is None:
+            ...  # Ask the LLM
+    """
+    
+    # Longer messages are left to the LLM without scanning them
+    MAX_TOKENS = 32
+    
+    def __init__(
+        self,
+        registry: Optional[SkillRegistry] = None,
+        calculator: Optional[NutritionCalculator] = None,
+        min_score: float = 0.5,
+    ):
+        self.registry = registry or default_registry
+        self.calculator = calculator or get_calculator()
+        self.min_score = min_score
+        self._index: Optional[dict[str, list[tuple[str, float]]]] = None
+        
+        # Counters
+        self.answered = 0
+        self.passed = 0
+    
+    def _keywords(self, text: str, leading: set[str]) -> Iterator[str]:
+        """Accent-folded routing words of an example or tag (food names, portions and fillers removed)"""
+        tokens = normalize_food_name(text).split()
+        in_food = set()
+        for start, end, _ in self.calculator.index.find_mentions(tokens):
+            in_food.update(range(start, end))
+        
+        for i, token in enumerate(tokens):
+            if i in in_food or token in PORTION_UNITS or token in GRAM_UNITS or _QUANTITY_RE.match(token):
+                continue
+            folded = fold_accents(token)
+            # First words of food names ("cơm", "thịt") would make partial dish names look known
+            if folded not in leading and folded not in FILLER_WORDS:
+                yield folded
+    
+    def _build(self) -> dict[str, list[tuple[str, float]]]:
+        """Keyword -> [(skill name, weight)], weighted by inverse skill frequency"""
+        skills = self.registry.list_skills()
+        leading = self.calculator.index.leading_tokens()
+        postings: dict[str, set[str]] = {}
+        for skill in skills:
+            for text in skill.examples + skill.tags:
+                for keyword in self._keywords(text, leading):
+                    postings.setdefault(keyword, set()).add(skill.name)
+        
+        return {
+            keyword: [(name, math.log(1 + len(skills) / len(names))) for name in sorted(names)]
+            for keyword, names in postings.items()
+        }
+    
+    def route(self, message: str) -> Optional[SkillMatch]:
+        """The skill that can answer `message` locally, or None"""
+        if self._index is None:
+            self._index = self._build()
+        
+        tokens = normalize_food_name(message).split()
+        if not tokens or len(tokens) > self.MAX_TOKENS:
+            return None
+        
+        index = self.calculator.index
+        food_at: list[Optional[int]] = [None] * len(tokens)
+        names = []
+        for start, end, food_id in index.find_mentions(tokens):
+            food_at[start:end] = [len(names)] * (end - start)
+            names.append(index.names[food_id])
+        if not names:
+            return None
+        
+        # Message as a sequence of foods, gram portions and other words
+        parts: list[tuple[str, Optional[float]]] = []
+        scores: dict[str, float] = {}
+        seen = set()
+        i = 0
+        while i < len(tokens):
+            food = food_at[i]
+            token = tokens[i]
+            i += 1
+            if food is not None:
+                if not parts or parts[-1] != ("food", food):
+                    parts.append(("food", food))
+                continue
+            
+            quantity = _QUANTITY_RE.match(token)
+            if quantity:
+                unit = quantity.group(2)
+                if unit is None and i < len(tokens) and tokens[i] in GRAM_UNITS:
+                    unit = tokens[i]
+                    i += 1
+                if unit is None:
+                    return None  # A count, not a weight
+                parts.append(("grams", int(quantity.group(1)) * GRAM_UNITS[unit]))
+                continue
+            
+            if token in PORTION_UNITS:
+                return None
+            folded = fold_accents(token)
+            postings = self._index.get(folded)
+            if postings is None:
+                if folded not in FILLER_WORDS:
+                    return None
+            elif folded not in seen:
+                seen.add(folded)
+                for name, weight in postings:
+                    scores[name] = scores.get(name, 0.0) + weight
+            parts.append(("word", None))
+        
+        portions = self._assign_portions(parts, len(names))
+        if portions is None:
+            return None
+        return self._select(scores, list(zip(names, portions)))
+    
+    @staticmethod
+    def _assign_portions(parts: list[tuple[str, Optional[float]]], count: int) -> Optional[list[Optional[float]]]:
+        """
+        Grams per food, with every portion written right before its food
+        ("200g cơm trắng") or every one right after it ("phở bò 500g").
+        None when neither reading fits or they disagree.
+        """
+        readings = []
+        for step in (1, -1):
+            portions: list[Optional[float]] = [None] * count
+            for pos, (kind, grams) in enumerate(parts):
+                if kind != "grams":
+                    continue
+                near = pos + step
+                if not (0 <= near < len(parts) and parts[near][0] == "food" and portions[parts[near][1]] is None):
+                    break
+                portions[parts[near][1]] = grams
+            else:
+                readings.append(portions)
+        
+        if not readings or (len(readings) == 2 and readings[0] != readings[1]):
+            return None
+        return readings[0]
+    
+    def _select(self, scores: dict[str, float], foods: list[tuple[str, Optional[float]]]) -> Optional[SkillMatch]:
+        if not scores:
+            return None
+        
+        ranked = sorted(scores.items(), key=lambda item: -item[1])
+        top = ranked[0][1]
+        match = None
+        for name, score in ranked:
+            if match is not None and score < match.score:
+                break
+            skill = self.registry.get(name)
+            arguments = skill.parse(foods) if skill.local else None
+            if arguments is None:
+                continue
+            if match is not None:
+                return None  # Two skills fit equally well
+            if score < top or score < self.min_score:
+                return None  # A stronger intent that cannot be answered locally
+            match = SkillMatch(skill=skill, arguments=arguments, score=score)
+        return match
+    
+    async def answer(self, message: str) -> Optional[SkillAnswer]:
+        """Run the matching skill and render its answer, or None to ask the LLM"""
+        match = self.route(message)
+        if match is None:
+            self.passed += 1
+            return None
+        
+        result = await match.skill.handler(**match.arguments, calculator=self.calculator)
+        self.answered += 1
+        return SkillAnswer(skill=match.skill.name, text=match.skill.render(result), result=result)
+    
+    def as_dict(self) -> dict:
+        """Routing counters"""
+        return {"answered": self.answered, "passed": self.passed}
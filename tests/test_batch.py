@@ -0,0 +1,59 @@
+"""
+Batch pipeline input parsing and per-dish error handling.
+
+Run:
+    python -m unittest discover tests
+"""
+
+import unittest
+
+from agent_core.batch import BatchItem, BatchPipeline, parse_portion
+from skills.router import SkillAnswer
+from tests.test_resilience import new_config
+
+
+class PortionTest(unittest.TestCase):
+    def test_grams(self):
+        self.assertEqual(parse_portion(None), 100.0)
+        self.assertEqual(parse_portion(250), 250.0)
+        self.assertEqual(parse_portion("200g"), 200.0)
+        self.assertEqual(parse_portion("0,5 kg"), 500.0)
+    
+    def test_other_units_are_not_grams(self):
+        self.assertIsNone(parse_portion("1 bát"))
+        self.assertIsNone(parse_portion("nửa tô"))
+
+
+class AnalyzeTest(unittest.IsolatedAsyncioTestCase):
+    async def test_unexpected_error_becomes_error_record(self):
+        pipeline = BatchPipeline(new_config(), workers=1)
+        
+        async def fail(item):
+            raise RuntimeError("boom")
+        pipeline._ask_llm = fail
+        
+        result = await pipeline.analyze(BatchItem(id="1", dish="món lạ xyz", portion_grams=None, portion="1 bát"))
+        self.assertEqual(result.status, "error")
+        self.assertEqual(result.portion, "1 bát")
+        self.assertIn("boom", result.error)
+    
+    
+    async def test_agents_share_skill_router_and_label_skill_answers(self):
+        pipeline = BatchPipeline(new_config(), workers=1)
+        asked = []
+        
+        class StubSkillRouter:
+            async def answer(self, message):
+                asked.append(message)
+                return SkillAnswer(skill="nutrition_lookup", text="Phở bò: 450 kcal", result={})
+        pipeline.skill_router = StubSkillRouter()
+        
+        for dish in ("phở bò", "bún chả"):
+            result = await pipeline.analyze(BatchItem(id=dish, dish=dish, portion_grams=None, portion="1 tô"))
+            self.assertEqual(result.status, "ok")
+            self.assertEqual(result.source, "skill")
+        self.assertEqual(len(asked), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
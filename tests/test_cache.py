@@ -0,0 +1,137 @@
+"""
+Tiered search cache: LRU eviction, TTL expiry, disk tier and search hits.
+
+Run:
+    python -m unittest discover tests
+"""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from agent_core.cache import MemoryCache, SQLiteCache, TieredCache, build_cache
+from agent_core.tools import WebSearchTool
+
+
+class Clock:
+    """Stands in for time.time() in agent_core.cache"""
+    
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+    
+    def __call__(self) -> float:
+        return self.now
+    
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+class CacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.clock = Clock()
+        patcher = mock.patch("agent_core.cache.time.time", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "cache.sqlite3")
+    
+    def sqlite(self, **kwargs) -> SQLiteCache:
+        cache = SQLiteCache(self.path, **kwargs)
+        self.addCleanup(cache.close)
+        return cache
+
+
+class MemoryCacheTest(CacheTestCase):
+    def test_evicts_least_recently_used(self):
+        cache = MemoryCache(max_entries=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        self.assertEqual(cache.get("a"), 1)  # "b" is now least recently used
+        cache.set("c", 3)
+        
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.get("c"), 3)
+        self.assertEqual(cache.stats.evictions, 1)
+    
+    def test_entries_expire(self):
+        cache = MemoryCache(ttl=10)
+        cache.set("a", 1)
+        cache.set("b", 2, ttl=60)
+        cache.set("c", 3, ttl=0)  # Never expires
+        self.clock.advance(10)
+        
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.get("b"), 2)
+        self.assertEqual(cache.get("c"), 3)
+        self.assertEqual(cache.stats.expirations, 1)
+        self.assertEqual(len(cache), 2)
+
+
+class SQLiteCacheTest(CacheTestCase):
+    def test_evicts_least_recently_accessed(self):
+        cache = self.sqlite(max_entries=2)
+        cache.set("a", {"v": 1})
+        self.clock.advance(1)
+        cache.set("b", {"v": 2})
+        self.clock.advance(1)
+        cache.get("a")
+        self.clock.advance(1)
+        cache.set("c", {"v": 3})
+        
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), {"v": 1})
+        self.assertEqual(cache.stats.evictions, 1)
+    
+    def test_expired_rows_go_before_live_ones(self):
+        cache = self.sqlite(max_entries=2, ttl=10)
+        cache.set("old", 1)
+        cache.set("kept", 2, ttl=100)
+        self.clock.advance(20)
+        cache.set("new", 3)
+        
+        self.assertEqual(cache.get("kept"), 2)
+        self.assertEqual(cache.get("new"), 3)
+        self.assertEqual(cache.stats.expirations, 1)
+        self.assertEqual(cache.stats.evictions, 0)
+    
+    def test_entries_expire_and_persist(self):
+        self.sqlite(ttl=10).set("query", {"results": ["phở"]})
+        reopened = self.sqlite(ttl=10)
+        self.assertEqual(reopened.get("query"), {"results": ["phở"]})
+        self.clock.advance(10)
+        self.assertIsNone(reopened.get("query"))
+        self.assertEqual(len(reopened), 0)
+
+
+class TieredCacheTest(CacheTestCase):
+    def test_disk_hits_are_promoted(self):
+        disk = self.sqlite()
+        cache = TieredCache(MemoryCache(max_entries=1), disk)
+        cache.set("a", 1)
+        cache.set("b", 2)  # Evicts "a" from memory only
+        
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.memory.get("a"), 1)
+        self.assertIsNone(cache.get("missing"))
+        self.assertEqual((cache.stats.hits, cache.stats.misses), (1, 1))
+
+
+class SearchCacheTest(unittest.IsolatedAsyncioTestCase):
+    async def test_normalized_query_is_answered_from_cache(self):
+        tool = WebSearchTool(api_key="stub", max_results=3, cache=build_cache())
+        tool.url = "http://search.invalid"  # Any network call would fail
+        tool.cache.set(tool._cache_key("phở bò calo", 3), {
+            "results": [{"title": "Phở bò", "link": "https://example.com", "snippet": "215 kcal", "position": 1}],
+        })
+        
+        response = await tool.search("  Phở   BÒ calo ")
+        self.assertEqual([result.title for result in response.results], ["Phở bò"])
+        self.assertEqual(tool.cache.stats.hits, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+"""
+Healthy alternative suggestions over in-memory and mapped food tables.
+
+Run:
+    python -m unittest discover tests
+"""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from agent_core import food_db
+from agent_core.food_db import FoodIndex
+from agent_core.food_file import MappedFoodIndex, write_food_file
+from agent_core.tools import NutritionCalculator
+from skills.food_analysis import suggest_healthy_alternatives
+from tests.test_food_file import FOODS
+
+
+def calculator_over(index: FoodIndex) -> NutritionCalculator:
+    calculator = NutritionCalculator()
+    calculator.index = index
+    return calculator
+
+
+def expected(current: str, nutrient: str, limit: int) -> list[str]:
+    """Alternatives by a plain scan of FOODS"""
+    below = [name for name, data in FOODS.items() if data[nutrient] < FOODS[current][nutrient]]
+    return sorted(below, key=lambda name: FOODS[name][nutrient])[:limit]
+
+
+class SuggestAlternativesTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        path = os.path.join(tmp.name, "foods.fdb")
+        write_food_file(path, FOODS.items())
+        self.calculators = {
+            "memory": calculator_over(FoodIndex.from_dict(FOODS)),
+            "mapped": calculator_over(MappedFoodIndex(path)),
+        }
+    
+    async def check(self, calculator: NutritionCalculator, current: str, goal: str, nutrient: str, limit: int = 3):
+        result = await suggest_healthy_alternatives(current, goal=goal, limit=limit, calculator=calculator)
+        self.assertEqual(result["goal"], nutrient)
+        self.assertEqual([item["name"] for item in result["alternatives"]], expected(current, nutrient, limit))
+        for item in result["alternatives"]:
+            self.assertEqual(item["nutrition"], calculator.index.nutrients.row(calculator.index.names.index(item["name"])))
+    
+    async def test_lower_in_goal_nutrient(self):
+        for kind, calculator in self.calculators.items():
+            with self.subTest(index=kind):
+                await self.check(calculator, "bún chả", None, "calories")
+                await self.check(calculator, "cơm trắng", "giảm carbs", "carbs", limit=5)
+                await self.check(calculator, "thịt bò", "ít béo", "fat", limit=20)
+                await self.check(calculator, "nước", None, "calories")  # Nothing lower
+    
+    async def test_without_numpy(self):
+        with mock.patch.object(food_db, "load_numpy", return_value=None):
+            await self.check(self.calculators["memory"], "cơm trắng", "giảm carbs", "carbs", limit=5)
+            await self.check(self.calculators["memory"], "bún chả", None, "calories", limit=20)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+"""
+Food name matching: normalization, accents, partial words and typos.
+
+Run:
+    python -m unittest discover tests
+"""
+
+import os
+import tempfile
+import unittest
+
+from agent_core.food_db import BKTree, FoodIndex, edit_distance, fold_accents, normalize_food_name
+from agent_core.food_file import MappedFoodIndex, write_food_file
+from agent_core.tools import NutritionCalculator
+
+FOODS = NutritionCalculator.FOOD_DATABASE
+
+
+class TextTest(unittest.TestCase):
+    def test_normalize_and_fold(self):
+        self.assertEqual(normalize_food_name("  Phở   BÒ, tái! "), "phở bò tái")
+        self.assertEqual(fold_accents("phở bò đặc biệt"), "pho bo dac biet")
+    
+    def test_edit_distance_stops_past_the_bound(self):
+        self.assertEqual(edit_distance("kitten", "sitting", 5), 3)
+        self.assertEqual(edit_distance("kitten", "sitting", 1), 2)
+        self.assertEqual(edit_distance("pho", "phooooo", 2), 3)
+    
+    def test_bk_tree_finds_words_within_distance(self):
+        tree = BKTree(["pho", "bo", "bun", "cha", "com"])
+        self.assertEqual(tree.search("phoo", 1), [(1, "pho")])
+        self.assertEqual(tree.search("xyz", 1), [])
+
+
+class SearchTest(unittest.TestCase):
+    index: FoodIndex
+    
+    def setUp(self):
+        self.index = FoodIndex.from_dict(FOODS)
+    
+    def best(self, query: str, **kwargs):
+        matches = self.index.search(query, limit=1, **kwargs)
+        return (matches[0].name, matches[0].score) if matches else None
+    
+    def test_exact_name_ignores_case_and_spacing(self):
+        self.assertEqual(self.best("  Phở  BÒ "), ("phở bò", 1.0))
+    
+    def test_accents_are_optional(self):
+        for query, name in (("pho bo", "phở bò"), ("THIT GA", "thịt gà"), ("com trang", "cơm trắng")):
+            with self.subTest(query=query):
+                self.assertEqual(self.best(query), (name, FoodIndex.ACCENT_PENALTY))
+    
+    def test_typos_are_corrected(self):
+        for query, name in (("phoo bo", "phở bò"), ("bun chaa", "bún chả"), ("rau muongg", "rau muống")):
+            with self.subTest(query=query):
+                found = self.best(query)
+                self.assertEqual(found[0], name)
+                self.assertLess(found[1], FoodIndex.ACCENT_PENALTY)  # Ranked below clean matches
+    
+    def test_fuzzy_threshold_is_respected(self):
+        self.assertIsNone(self.best("phoo bo", fuzzy_threshold=0.95))
+        self.assertIsNone(self.best("xyzzy qq"))
+    
+    def test_partial_and_contained_names(self):
+        self.assertEqual(self.best("trung")[0], "trứng gà")
+        self.assertEqual(self.best("cá hồi nướng")[0], "cá hồi")
+    
+    def test_calculator_lookup_uses_its_threshold(self):
+        calculator = NutritionCalculator()
+        calculator.index = self.index
+        self.assertEqual(calculator.lookup("bun chaa"), FOODS["bún chả"])
+        calculator.fuzzy_threshold = 0.95
+        self.assertIsNone(calculator.lookup("bun chaa"))
+
+
+class MappedSearchTest(SearchTest):
+    """The same matching over a memory-mapped food file"""
+    
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        path = os.path.join(tmp.name, "foods.fdb")
+        write_food_file(path, FOODS.items())
+        self.index = MappedFoodIndex(path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+"""
+Nutrient computations over a memory-mapped food file.
+
+Run:
+    python -m unittest discover tests
+"""
+
+import os
+import tempfile
+import unittest
+
+from agent_core.food_db import FoodIndex
+from agent_core.food_file import MappedFoodIndex, write_food_file
+from agent_core.tools import NutritionCalculator
+
+FOODS = {
+    **NutritionCalculator.FOOD_DATABASE,
+    "nước": {"calories": 0, "protein": 0, "fat": 0, "carbs": 0},
+    "dầu ăn": {"calories": 884, "protein": 0, "fat": 100, "carbs": 0},
+    "hạt điều": {"calories": 553.33, "protein": 18.22, "fat": 43.85, "carbs": 30.19},
+}
+
+
+class MappedComputeTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        path = os.path.join(tmp.name, "foods.fdb")
+        write_food_file(path, FOODS.items())
+        self.mapped = MappedFoodIndex(path)
+        self.memory = FoodIndex.from_dict(FOODS)
+    
+    def compute(self, index: FoodIndex, names: list[str], grams: list[float]):
+        rows = [index.search(name, limit=1)[0].food_id for name in names]
+        return index.nutrients.compute(rows, grams)
+    
+    def test_matches_source_decimals(self):
+        names = list(FOODS)
+        grams = [100.0] * len(names)
+        items, _ = self.compute(self.mapped, names, grams)
+        for name, item in zip(names, items):
+            for field, value in FOODS[name].items():
+                self.assertEqual(item[field], value, (name, field))
+    
+    def test_matches_in_memory_table(self):
+        names = ["phở bò", "cơm trắng", "hạt điều", "nước", "phở bò"]
+        grams = [350, 200, 30, 500, 120]
+        mapped_items, mapped_totals = self.compute(self.mapped, names, grams)
+        memory_items, memory_totals = self.compute(self.memory, names, grams)
+        for mapped, memory in zip(mapped_items + [mapped_totals], memory_items + [memory_totals]):
+            for field in memory:
+                self.assertAlmostEqual(mapped[field], memory[field], places=9)
+    
+    def test_gather_is_vectorized(self):
+        rows = [self.mapped.search(name, limit=1)[0].food_id for name in ("phở bò", "bún chả")]
+        
+        def row(i):
+            raise AssertionError("row() called per food")
+        self.mapped.nutrients.row = row
+        _, totals = self.mapped.nutrients.compute(rows, [100, 100])
+        self.assertEqual(totals["calories"], 565)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+"""
+Request bodies spliced from pre-encoded JSON (RequestTemplate.encode and
+EncodedHistory) against plain json.dumps of the same bodies.
+
+Run:
+    python -m unittest discover tests
+"""
+
+import json
+import unittest
+
+from config import LLMProvider
+from agent_core import FoodNutritionAgent
+from agent_core.agent import Message, ToolCall, TurnMessages
+from agent_core.request_template import EncodedHistory
+from tests.test_resilience import new_config
+
+PROVIDERS = (LLMProvider.OPENAI, LLMProvider.CLAUDE)
+
+
+def exchange(i: int) -> list[Message]:
+    return [
+        Message("user", f"Món {i}: phở bò \"đặc biệt\" bao nhiêu calo?"),
+        Message("assistant", f"Khoảng {400 + i} kcal.\nNguồn: bảng dinh dưỡng"),
+    ]
+
+
+class EncodeTest(unittest.TestCase):
+    def setUp(self):
+        self.agents = {provider: FoodNutritionAgent(new_config(provider)) for provider in PROVIDERS}
+    
+    def assert_encodes(self, agent: FoodNutritionAgent, messages: list[Message], **kwargs):
+        for stream in (False, True):
+            body = agent._build_request_body(messages, stream=stream, **kwargs)
+            encoded = agent._request_template().encode(body)
+            self.assertEqual(json.loads(encoded), json.loads(json.dumps(body, ensure_ascii=False)))
+    
+    def assert_window(self, agent: FoodNutritionAgent, encoded: EncodedHistory, history: list[Message], start: int, **kwargs):
+        window = encoded.window(history, start)
+        self.assertEqual(window.count, len(history) - start)
+        self.assert_encodes(agent, TurnMessages(history[start:], window), **kwargs)
+    
+    def test_plain_messages(self):
+        for provider, agent in self.agents.items():
+            with self.subTest(provider=provider):
+                self.assert_encodes(agent, [Message("user", "Phở bò?")])
+                self.assert_encodes(agent, [Message("user", "Phở bò?")], summary="Người dùng ăn chay", include_tools=False)
+    
+    def test_appends(self):
+        for provider, agent in self.agents.items():
+            with self.subTest(provider=provider):
+                encoded, history = EncodedHistory(), []
+                self.assert_window(agent, encoded, history, 0)
+                for i in range(5):
+                    history += exchange(i)
+                    self.assert_window(agent, encoded, history, 0)
+                    self.assert_window(agent, encoded, history, 0)  # Reused window
+    
+    def test_rollback(self):
+        for provider, agent in self.agents.items():
+            with self.subTest(provider=provider):
+                encoded, history = EncodedHistory(), []
+                for i in range(3):
+                    history += exchange(i)
+                self.assert_window(agent, encoded, history, 0)
+                
+                del history[-2:]  # Failed turn rolled back
+                self.assert_window(agent, encoded, history, 0)
+                history += exchange(9)
+                self.assert_window(agent, encoded, history, 0)
+                
+                history[1] = Message("assistant", "Đã sửa")  # Replaced in place
+                self.assert_window(agent, encoded, history, 0)
+    
+    def test_window_release_and_reset(self):
+        for provider, agent in self.agents.items():
+            with self.subTest(provider=provider):
+                encoded, history = EncodedHistory(), []
+                for i in range(10):
+                    history += exchange(i)
+                self.assert_window(agent, encoded, history, 0)
+                
+                # Window moves on (older turns summarized): the encoded prefix is released
+                self.assert_window(agent, encoded, history, 12, summary="Tóm tắt 1")
+                self.assertEqual(encoded._base, 12)
+                history += exchange(10)
+                self.assert_window(agent, encoded, history, 14, summary="Tóm tắt 2")
+                
+                # Shorter summary: the window moves back before the released part
+                self.assert_window(agent, encoded, history, 4, summary="Tóm tắt")
+                self.assertEqual(encoded._base, 4)
+                
+                # Window past everything encoded, and an empty window
+                self.assert_window(agent, encoded, history, len(history))
+                self.assert_window(agent, encoded, history, len(history) - 2)
+    
+    def test_tool_rounds(self):
+        for provider, agent in self.agents.items():
+            with self.subTest(provider=provider):
+                encoded, history = EncodedHistory(), []
+                for i in range(3):
+                    history += exchange(i)
+                history.append(Message("user", "So sánh phở và bún chả"))
+                window = encoded.window(history, 2)
+                
+                messages = TurnMessages(history[2:], window)
+                messages.append(Message("assistant", "", tool_calls=[
+                    ToolCall("call_1", "calculate_nutrition", {"food": "phở bò", "grams": 350}),
+                    ToolCall("call_2", "calculate_nutrition", {"food": "bún chả", "grams": 300}),
+                ]))
+                messages.append(Message("tool", '{"calories": 450}', tool_call_id="call_1"))
+                messages.append(Message("tool", "Tool error: timeout", tool_call_id="call_2"))
+                self.assert_encodes(agent, messages)
+                self.assert_encodes(agent, messages, force_answer=True, summary="Tóm tắt")
+                
+                messages.append(Message("assistant", "Đang tra thêm", tool_calls=[
+                    ToolCall("call_3", "search_web", {"query": "bún chả calo"}),
+                ]))
+                messages.append(Message("tool", "Bún chả: 500 kcal", tool_call_id="call_3"))
+                self.assert_encodes(agent, messages, force_answer=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+"""
+Circuit breaker probes through FoodNutritionAgent._send.
+
+Run:
+    python -m unittest discover tests
+"""
+
+import asyncio
+import unittest
+
+import httpx
+
+from config import LLMConfig, LLMProvider
+from agent_core import FoodNutritionAgent, LLMException
+from agent_core.ratelimit import get_rate_limiter, reset_rate_limiters
+from agent_core.resilience import reset_circuit_breakers
+
+RESET_TIMEOUT = 0.05
+OK_BODY = {"choices": [{"message": {"role": "assistant", "content": "ok"}}]}
+
+
+def new_config(provider: LLMProvider = LLMProvider.OPENAI) -> LLMConfig:
+    return LLMConfig(
+        provider=provider,
+        api_key="stub",
+        model="stub-model",
+        base_url="http://stub/v1",
+        max_retries=0,
+        circuit_failure_threshold=2,
+        circuit_reset_timeout=RESET_TIMEOUT,
+    )
+
+
+class ScriptedTransport(httpx.AsyncBaseTransport):
+    """Answers requests with the scripted statuses in order, then 200"""
+    
+    def __init__(self, statuses=(), hang_on: int = -1):
+        self.statuses = list(statuses)
+        self.hang_on = hang_on  # Request number that never gets an answer
+        self.requests = 0
+        self.hanging = asyncio.Event()
+    
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        number = self.requests
+        self.requests += 1
+        if number == self.hang_on:
+            self.hanging.set()
+            await asyncio.Event().wait()
+        status = self.statuses[number] if number < len(self.statuses) else 200
+        return httpx.Response(status, json=OK_BODY if status == 200 else {"error": "scripted"})
+
+
+def new_agent(transport: httpx.AsyncBaseTransport, config: LLMConfig = None) -> FoodNutritionAgent:
+    return FoodNutritionAgent(config or new_config(), http_client=httpx.AsyncClient(transport=transport))
+
+
+class CircuitProbeTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        reset_circuit_breakers()
+        reset_rate_limiters()
+    
+    async def send(self, agent: FoodNutritionAgent) -> httpx.Response:
+        response = await agent._send(agent.config, {"model": "stub-model", "messages": []})
+        await response.aclose()
+        return response
+    
+    async def open_circuit(self, agent: FoodNutritionAgent):
+        for _ in range(2):
+            with self.assertRaises(LLMException):
+                await self.send(agent)
+        self.assertEqual(agent.circuit_breaker.state, "open")
+        await asyncio.sleep(RESET_TIMEOUT * 1.5)
+        self.assertEqual(agent.circuit_breaker.state, "half_open")
+    
+    async def assert_probe_answered(self, status: int):
+        agent = new_agent(ScriptedTransport([503, 503, status]))
+        await self.open_circuit(agent)
+        
+        with self.assertRaises(LLMException) as raised:
+            await self.send(agent)
+        self.assertEqual(raised.exception.status_code, status)
+        # The provider answered, so the circuit closes
+        self.assertEqual(agent.circuit_breaker.state, "closed")
+        self.assertEqual((await self.send(agent)).status_code, 200)
+    
+    async def test_probe_rejected_request_closes_circuit(self):
+        await self.assert_probe_answered(400)
+    
+    async def test_probe_throttled_closes_circuit(self):
+        await self.assert_probe_answered(429)
+    
+    async def test_probe_server_error_reopens_circuit(self):
+        agent = new_agent(ScriptedTransport([503, 503, 503]))
+        await self.open_circuit(agent)
+        with self.assertRaises(LLMException):
+            await self.send(agent)
+        self.assertEqual(agent.circuit_breaker.state, "open")
+    
+    async def test_cancelled_probe_releases_slot(self):
+        transport = ScriptedTransport([503, 503], hang_on=2)
+        agent = new_agent(transport)
+        await self.open_circuit(agent)
+        
+        probe = asyncio.create_task(self.send(agent))
+        await transport.hanging.wait()
+        probe.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await probe
+        
+        # The next call becomes the probe instead of failing fast
+        self.assertEqual(agent.circuit_breaker.state, "half_open")
+        self.assertEqual((await self.send(agent)).status_code, 200)
+        self.assertEqual(agent.circuit_breaker.state, "closed")
+
+
+
+class RateLimiterRegistryTest(unittest.TestCase):
+    def setUp(self):
+        reset_rate_limiters()
+    
+    def test_configs_with_other_rates_do_not_replace_the_shared_limiter(self):
+        slow, fast = new_config(), new_config()
+        slow.rate_limit_rps, fast.rate_limit_rps = 2.0, 50.0
+        
+        limiter = get_rate_limiter(slow)
+        self.assertIsNot(get_rate_limiter(fast), limiter)
+        self.assertIs(get_rate_limiter(slow), limiter)
+        self.assertEqual(limiter.max_rate, 2.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+"""
+Response cache keys of FoodNutritionAgent request bodies.
+
+Run:
+    python -m unittest discover tests
+"""
+
+import unittest
+
+from agent_core import FoodNutritionAgent
+from agent_core.agent import Message
+from agent_core.response_cache import build_response_cache
+from tests.test_resilience import new_config
+
+
+def new_agent() -> FoodNutritionAgent:
+    config = new_config()
+    config.temperature = 0
+    return FoodNutritionAgent(config, response_cache=build_response_cache())
+
+
+class ResponseCacheKeyTest(unittest.TestCase):
+    def key(self, agent: FoodNutritionAgent, messages: list[Message], stream: bool = False) -> str:
+        return agent._response_cache_key(agent._build_request_body(messages, stream=stream))
+    
+    def test_stream_and_non_stream_share_key(self):
+        agent = new_agent()
+        messages = [Message("user", "Phở bò bao nhiêu calo?")]
+        self.assertEqual(self.key(agent, messages), self.key(agent, messages, stream=True))
+    
+    def test_key_is_stable(self):
+        messages = [Message("user", "Phở bò bao nhiêu calo?")]
+        self.assertEqual(self.key(new_agent(), messages), self.key(new_agent(), list(messages)))
+    
+    def test_key_depends_on_messages(self):
+        agent = new_agent()
+        self.assertNotEqual(
+            self.key(agent, [Message("user", "Phở bò bao nhiêu calo?")]),
+            self.key(agent, [Message("user", "Bún chả bao nhiêu calo?")]),
+        )
+    
+    def test_key_matches_the_sent_bytes(self):
+        agent = new_agent()
+        messages = [Message("user", "Phở bò bao nhiêu calo?")]
+        body = agent._build_request_body(messages)
+        encoded = agent._request_template().encode(body)
+        self.assertEqual(agent._response_cache_key(body), agent.response_cache.make_key("openai", encoded))
+
+
+if __name__ == "__main__":
+    unittest.main()
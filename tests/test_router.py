@@ -0,0 +1,75 @@
+"""
+Hedged routing against circuit breaker probes.
+
+Run:
+    python -m unittest discover tests
+"""
+
+import asyncio
+import dataclasses
+import unittest
+
+import httpx
+
+from config import LLMProvider
+from agent_core.ratelimit import reset_rate_limiters
+from agent_core.resilience import get_circuit_breaker, reset_circuit_breakers
+from agent_core.router import ProviderRouter
+from tests.test_resilience import OK_BODY, RESET_TIMEOUT, new_agent, new_config
+
+
+class HostTransport(httpx.AsyncBaseTransport):
+    """200 from every host, except that `hang_host` never answers while `hanging` is set"""
+    
+    def __init__(self, hang_host: str):
+        self.hang_host = hang_host
+        self.hanging = True
+        self.hung = asyncio.Event()
+    
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if self.hanging and request.url.host == self.hang_host:
+            self.hung.set()
+            await asyncio.Event().wait()
+        return httpx.Response(200, json=OK_BODY)
+
+
+class HedgeProbeTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        reset_circuit_breakers()
+        reset_rate_limiters()
+    
+    async def test_cancelled_hedge_loser_releases_probe(self):
+        primary = dataclasses.replace(new_config(LLMProvider.OPENAI), base_url="http://primary/v1")
+        backup = dataclasses.replace(new_config(LLMProvider.DEEPSEEK), base_url="http://backup/v1")
+        router = ProviderRouter([primary, backup], hedge=True, hedge_min_delay=0.01, hedge_max_delay=0.02)
+        transport = HostTransport("primary")
+        agent = new_agent(transport, primary)
+        agent.router = router
+        
+        # Open the primary's circuit, then wait until a probe is allowed
+        breaker = get_circuit_breaker(primary)
+        for _ in range(primary.circuit_failure_threshold):
+            breaker.record_failure()
+        await asyncio.sleep(RESET_TIMEOUT * 1.5)
+        self.assertEqual(breaker.state, "half_open")
+        
+        async def attempt(config, last):
+            response = await agent._send(config, {"model": "stub-model", "messages": []}, last=last)
+            await response.aclose()
+            return config
+        
+        # The primary's request is the probe; it hangs, the hedge to the backup wins
+        winner = await router.call(attempt)
+        self.assertIs(winner, backup)
+        self.assertTrue(transport.hung.is_set())
+        self.assertEqual(router.hedge_wins, 1)
+        
+        # The cancelled probe gave its slot back: the primary can be probed again
+        self.assertEqual(breaker.state, "half_open")
+        transport.hanging = False
+        self.assertIs(await attempt(primary, True), primary)
+        self.assertEqual(breaker.state, "closed")
+
+
+if __name__ == "__main__":
+    unittest.main()
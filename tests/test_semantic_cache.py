@@ -0,0 +1,29 @@
+"""
+Semantic cache guards against answering the opposite question.
+
+Run:
+    python -m unittest discover tests
+"""
+
+import unittest
+
+from agent_core.semantic_cache import SemanticCache, negated_words
+
+
+class NegationTest(unittest.TestCase):
+    def setUp(self):
+        self.cache = SemanticCache(threshold=0.9)
+        self.cache.set("Tôi bị tiểu đường, có nên ăn phở bò không?", "answer")
+    
+    def test_question_particle_is_not_negation(self):
+        self.assertEqual(negated_words("Có nên ăn phở bò không ạ?"), frozenset())
+        self.assertIsNotNone(self.cache.get("tôi bị tiểu đường có nên ăn phở bò không"))
+    
+    def test_negated_question_misses(self):
+        self.assertEqual(negated_words("Không nên ăn phở bò"), {"nên"})
+        self.assertIsNone(self.cache.get("Tôi bị tiểu đường, không nên ăn phở bò"))
+        self.assertIsNone(self.cache.get("Tôi bị tiểu đường, chưa nên ăn phở bò à?"))
+
+
+if __name__ == "__main__":
+    unittest.main()
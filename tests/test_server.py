@@ -0,0 +1,94 @@
+"""
+ASGI chat endpoints: in-stream errors and one turn per session at a time.
+
+Run:
+    python -m unittest discover tests
+"""
+
+import asyncio
+import json
+import unittest
+
+import httpx
+
+from agent_core import FoodNutritionAgent
+from agent_core.sessions import SessionStore
+from server import AgentServer
+from tests.test_resilience import ScriptedTransport, new_config
+
+
+async def request(app: AgentServer, method: str, path: str, body: dict) -> list[dict]:
+    """Run one request through the app; returns the ASGI messages it sent"""
+    sent = []
+    received = False
+    
+    async def receive():
+        nonlocal received
+        if received:
+            await asyncio.Event().wait()
+        received = True
+        return {"type": "http.request", "body": json.dumps(body).encode(), "more_body": False}
+    
+    async def send(message):
+        sent.append(message)
+    
+    await app({"type": "http", "method": method, "path": path}, receive, send)
+    return sent
+
+
+def events(messages: list[dict]) -> list[str]:
+    return [m["body"].decode() for m in messages if m["type"] == "http.response.body" and m["body"]]
+
+
+class ServerTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        client = httpx.AsyncClient(transport=ScriptedTransport())
+        self.addAsyncCleanup(client.aclose)
+        self.app = AgentServer(new_config())
+        self.app.sessions = SessionStore(lambda: FoodNutritionAgent(new_config(), http_client=client))
+        self.addAsyncCleanup(self.app.sessions.close)
+    
+    async def test_stream_error_after_start_ends_the_stream(self):
+        session = self.app.sessions.get_or_create("s")
+        
+        async def broken_stream(message):
+            yield "Phở bò "
+            raise RuntimeError("parser bug")
+        session.agent.chat_stream = broken_stream
+        
+        messages = await request(self.app, "POST", "/chat/stream", {"message": "Phở bò?", "session_id": "s"})
+        self.assertEqual([m["type"] for m in messages].count("http.response.start"), 1)
+        self.assertEqual(messages[0]["status"], 200)
+        self.assertEqual(events(messages), [
+            'data: {"delta": "Phở bò "}\n\n',
+            'event: error\ndata: {"error": "Internal error: RuntimeError"}\n\n',
+        ])
+        self.assertEqual(messages[-1], {"type": "http.response.body", "body": b"", "more_body": False})
+        self.assertFalse(session.lock.locked())
+    
+    async def test_one_turn_per_session_at_a_time(self):
+        session = self.app.sessions.get_or_create("s")
+        running = []
+        overlapped = False
+        
+        async def chat(message):
+            nonlocal overlapped
+            overlapped = overlapped or bool(running)
+            running.append(message)
+            await asyncio.sleep(0.02)
+            running.remove(message)
+            return f"Trả lời: {message}"
+        session.agent.chat = chat
+        
+        results = await asyncio.gather(*(
+            request(self.app, "POST", "/chat", {"message": f"câu {i}", "session_id": "s"}) for i in range(3)
+        ))
+        self.assertFalse(overlapped)
+        self.assertEqual(
+            sorted(json.loads(events(messages)[0])["response"] for messages in results),
+            ["Trả lời: câu 0", "Trả lời: câu 1", "Trả lời: câu 2"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+"""
+Server session store: LRU and idle eviction, turn locks and paging to
+the session log.
+
+Run:
+    python -m unittest discover tests
+"""
+
+import os
+import tempfile
+import unittest
+
+import httpx
+
+from agent_core import FoodNutritionAgent
+from agent_core.agent import Message
+from agent_core.session_log import SessionLog
+from agent_core.sessions import SessionStore
+from tests.test_resilience import ScriptedTransport, new_config
+
+
+class SessionStoreTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.client = httpx.AsyncClient(transport=ScriptedTransport())
+        self.addAsyncCleanup(self.client.aclose)
+    
+    def new_store(self, **kwargs) -> SessionStore:
+        store = SessionStore(lambda: FoodNutritionAgent(new_config(), http_client=self.client), **kwargs)
+        self.addAsyncCleanup(store.close)
+        return store
+    
+    async def test_get_or_create(self):
+        store = self.new_store()
+        session = store.get_or_create("a")
+        self.assertIs(store.get_or_create("a"), session)
+        generated = store.get_or_create()
+        self.assertTrue(generated.id)
+        self.assertIsNot(generated, session)
+        self.assertEqual(len(store), 2)
+        
+        self.assertTrue(store.delete("a"))
+        self.assertFalse(store.delete("a"))
+        self.assertIsNone(store.get("a"))
+    
+    async def test_overflow_evicts_least_recently_used(self):
+        store = self.new_store(max_sessions=2)
+        store.get_or_create("a")
+        store.get_or_create("b")
+        store.get("a")  # "b" is now least recently used
+        store.get_or_create("c")
+        
+        self.assertEqual(sorted(store._sessions), ["a", "c"])
+    
+    async def test_overflow_skips_sessions_mid_turn(self):
+        store = self.new_store(max_sessions=2)
+        busy = store.get_or_create("busy")
+        store.get_or_create("idle")
+        
+        async with busy.lock:
+            store.get_or_create("new")
+            self.assertEqual(sorted(store._sessions), ["busy", "new"])
+            
+            # Every other session busy: the store grows rather than evict a turn
+            async with store.get("new").lock:
+                store.get_or_create("newer")
+                self.assertEqual(sorted(store._sessions), ["busy", "new", "newer"])
+    
+    async def test_idle_eviction_skips_sessions_mid_turn(self):
+        store = self.new_store(idle_timeout=60)
+        busy = store.get_or_create("busy")
+        idle = store.get_or_create("idle")
+        fresh = store.get_or_create("fresh")
+        busy.last_used -= 120
+        idle.last_used -= 120
+        
+        async with busy.lock:
+            self.assertEqual(store.evict_idle(), 1)
+        self.assertEqual(sorted(store._sessions), ["busy", "fresh"])
+        self.assertIs(store.get("fresh"), fresh)
+        self.assertEqual(store.evict_idle(), 1)
+        self.assertEqual(list(store._sessions), ["fresh"])
+    
+    async def test_evicted_session_resumes_from_log(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        log = SessionLog(os.path.join(tmp.name, "sessions.sqlite3"))
+        self.addCleanup(log.close)
+        store = self.new_store(max_sessions=1, log=log)
+        
+        agent = store.get_or_create("a").agent
+        agent.conversation_history += [Message("user", "Phở bò?"), Message("assistant", "215 kcal/100g")]
+        agent.save_history()
+        store.get_or_create("b")  # Pages "a" out
+        self.assertIsNone(store.get("a"))
+        
+        resumed = store.get_or_create("a")
+        self.assertIsNot(resumed.agent, agent)
+        self.assertEqual([m.content for m in resumed.agent.conversation_history], ["Phở bò?", "215 kcal/100g"])
+        self.assertEqual(store.resumed, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+"""
+Background conversation summaries of FoodNutritionAgent.
+
+Run:
+    python -m unittest discover tests
+"""
+
+import unittest
+
+import httpx
+
+from agent_core import FoodNutritionAgent
+from agent_core.agent import Message
+from agent_core.usage import TokenUsage
+from agent_core.ratelimit import reset_rate_limiters
+from agent_core.resilience import reset_circuit_breakers
+from agent_core.response_cache import build_response_cache
+from tests.test_resilience import new_config
+
+SUMMARY_BODY = {
+    "choices": [{"message": {"role": "assistant", "content": "Người dùng ăn phở bò."}}],
+    "usage": {"prompt_tokens": 120, "completion_tokens": 12},
+}
+
+
+class SummaryTransport(httpx.AsyncBaseTransport):
+    def __init__(self):
+        self.requests = 0
+    
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        return httpx.Response(200, json=SUMMARY_BODY)
+
+
+class SummaryUsageTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        reset_circuit_breakers()
+        reset_rate_limiters()
+    
+    async def test_summary_keeps_turn_usage_and_skips_response_cache(self):
+        config = new_config()
+        config.temperature = 0
+        transport = SummaryTransport()
+        agent = FoodNutritionAgent(
+            config,
+            http_client=httpx.AsyncClient(transport=transport),
+            response_cache=build_response_cache(),
+        )
+        turn_usage = TokenUsage(prompt_tokens=50, completion_tokens=5)
+        agent.last_usage = turn_usage
+        agent.total_usage = TokenUsage(prompt_tokens=50, completion_tokens=5)
+        messages = [Message("user", "Tôi vừa ăn phở bò"), Message("assistant", "Khoảng 450 kcal.")]
+        
+        for _ in range(2):
+            summary = await agent._summarize("", messages)
+        
+        self.assertEqual(summary, "Người dùng ăn phở bò.")
+        self.assertEqual(transport.requests, 2)  # Never answered from the response cache
+        self.assertIs(agent.last_usage, turn_usage)
+        self.assertEqual(agent.total_usage.prompt_tokens, 50)
+        self.assertEqual(agent.summary_usage.prompt_tokens, 240)
+        self.assertEqual(agent.summary_usage.completion_tokens, 24)
+        self.assertEqual(agent.response_cache.stats.hits + agent.response_cache.stats.misses, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+"""
+Tool rounds sent with each provider's native tool protocol.
+
+Run:
+    python -m unittest discover tests
+"""
+
+import json
+import unittest
+
+import httpx
+
+from config import LLMProvider
+from agent_core import FoodNutritionAgent
+from agent_core.ratelimit import reset_rate_limiters
+from agent_core.resilience import reset_circuit_breakers
+from tests.test_resilience import new_config
+
+LOOKUPS = [
+    ("call_1", {"food_name": "phở bò", "portion_grams": 200}),
+    ("call_2", {"food_name": "bánh mì", "portion_grams": 80}),
+]
+FOLLOW_UP = ("call_3", {"food_name": "trứng gà", "portion_grams": 50})
+ANSWER = "Bữa sáng khoảng 720 kcal."
+
+
+def openai_reply(text, calls=()) -> dict:
+    message = {"role": "assistant", "content": text}
+    if calls:
+        message["tool_calls"] = [
+            {"id": id, "type": "function", "function": {"name": "nutrition_lookup", "arguments": json.dumps(args)}}
+            for id, args in calls
+        ]
+    return {"choices": [{"message": message}]}
+
+
+def claude_reply(text, calls=()) -> dict:
+    content = [{"type": "text", "text": text}] if text else []
+    content += [{"type": "tool_use", "id": id, "name": "nutrition_lookup", "input": args} for id, args in calls]
+    return {"content": content}
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """Answers with the scripted bodies in order and keeps the request bodies"""
+    
+    def __init__(self, replies: list[dict]):
+        self.replies = list(replies)
+        self.bodies = []
+    
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.bodies.append(json.loads(request.content))
+        return httpx.Response(200, json=self.replies.pop(0))
+
+
+class ToolProtocolTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        reset_circuit_breakers()
+        reset_rate_limiters()
+    
+    async def run_turn(self, provider: LLMProvider, reply) -> tuple[FoodNutritionAgent, list[dict]]:
+        transport = RecordingTransport([
+            reply("", LOOKUPS),
+            reply("Tra thêm trứng", [FOLLOW_UP]),
+            reply(ANSWER),
+        ])
+        agent = FoodNutritionAgent(new_config(provider), http_client=httpx.AsyncClient(transport=transport))
+        agent.skill_router = agent.semantic_cache = agent.response_cache = None
+        self.addAsyncCleanup(agent.aclose)
+        
+        self.assertEqual(await agent.chat("Bữa sáng gồm phở bò và bánh mì"), ANSWER)
+        self.assertEqual(len(transport.bodies), 3)
+        self.assertEqual(agent.last_tool_iterations, 2)
+        # Only the question and the answer are kept
+        self.assertEqual([(m.role, m.content) for m in agent.conversation_history], [
+            ("user", "Bữa sáng gồm phở bò và bánh mì"), ("assistant", ANSWER),
+        ])
+        return agent, transport.bodies
+    
+    async def test_openai_tool_messages(self):
+        _, bodies = await self.run_turn(LLMProvider.OPENAI, openai_reply)
+        messages = bodies[2]["messages"]
+        self.assertEqual([m["role"] for m in messages], ["system", "user", "assistant", "tool", "tool", "assistant", "tool"])
+        
+        assistant = messages[2]
+        self.assertIsNone(assistant["content"])
+        self.assertEqual([tc["id"] for tc in assistant["tool_calls"]], ["call_1", "call_2"])
+        self.assertEqual(json.loads(assistant["tool_calls"][0]["function"]["arguments"]), LOOKUPS[0][1])
+        self.assertEqual([m["tool_call_id"] for m in messages if m["role"] == "tool"], ["call_1", "call_2", "call_3"])
+        self.assertIn("phở bò", messages[3]["content"])
+        
+        # Each round is appended once: the second request is a prefix of the third
+        self.assertEqual(bodies[1]["messages"], messages[:5])
+        self.assertEqual(bodies[2]["tool_choice"], "auto")
+    
+    async def test_claude_tool_blocks(self):
+        _, bodies = await self.run_turn(LLMProvider.CLAUDE, claude_reply)
+        messages = bodies[2]["messages"]
+        self.assertEqual([m["role"] for m in messages], ["user", "assistant", "user", "assistant", "user"])
+        
+        self.assertEqual(
+            [(b["type"], b["id"], b["input"]) for b in messages[1]["content"]],
+            [("tool_use", id, args) for id, args in LOOKUPS],
+        )
+        # Results of one round share a user message
+        self.assertEqual([b["tool_use_id"] for b in messages[2]["content"]], ["call_1", "call_2"])
+        self.assertTrue(all(b["type"] == "tool_result" for b in messages[2]["content"]))
+        self.assertEqual(messages[3]["content"][0], {"type": "text", "text": "Tra thêm trứng"})
+        self.assertEqual(messages[4]["content"][0]["tool_use_id"], "call_3")
+        
+        self.assertEqual(bodies[1]["messages"], messages[:3])
+        self.assertNotIn("tool_choice", bodies[2])
+    
+    
+    async def test_last_round_forces_an_answer(self):
+        transport = RecordingTransport([openai_reply("", [FOLLOW_UP])] * 5 + [openai_reply(ANSWER)])
+        agent = FoodNutritionAgent(new_config(), http_client=httpx.AsyncClient(transport=transport))
+        agent.skill_router = agent.semantic_cache = agent.response_cache = None
+        self.addAsyncCleanup(agent.aclose)
+        
+        self.assertEqual(await agent.chat("Trứng gà bao nhiêu calo?"), ANSWER)
+        self.assertEqual([body["tool_choice"] for body in transport.bodies], ["auto"] * 5 + ["none"])
+        self.assertIn("tools", transport.bodies[-1])  # Still declared for the tool messages
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+"""
+Concurrent tool execution of FoodNutritionAgent.
+
+Run:
+    python -m unittest discover tests
+"""
+
+import asyncio
+import unittest
+
+from agent_core import FoodNutritionAgent
+from agent_core.agent import ToolCall
+from tests.test_resilience import new_config
+
+
+def calls(*names: str) -> list[ToolCall]:
+    return [ToolCall(id=f"call_{i}", name=name, arguments={}) for i, name in enumerate(names)]
+
+
+class ExecuteToolsTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.agent = FoodNutritionAgent(new_config())
+        self.running = 0
+        self.peak = 0
+        self.agent._execute_tool = self.fake_tool
+    
+    async def asyncTearDown(self):
+        await self.agent.aclose()
+    
+    async def fake_tool(self, tool_call: ToolCall) -> str:
+        """Tools named "<action>:<seconds>" sleep, then answer, fail or hang"""
+        action, delay = tool_call.name.split(":")
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            await asyncio.sleep(float(delay))
+            if action == "fail":
+                raise RuntimeError(f"{tool_call.id} failed")
+            if action == "hang":
+                await asyncio.Event().wait()
+            return f"{tool_call.id} ok"
+        finally:
+            self.running -= 1
+    
+    async def test_results_in_request_order(self):
+        results = await self.agent._execute_tools(calls("ok:0.03", "ok:0", "ok:0.01"))
+        self.assertEqual(results, ["call_0 ok", "call_1 ok", "call_2 ok"])
+    
+    async def test_failure_is_isolated(self):
+        results = await self.agent._execute_tools(calls("ok:0.01", "fail:0", "ok:0.02"))
+        self.assertEqual(results[0], "call_0 ok")
+        self.assertEqual(results[1], "Tool error: call_1 failed")
+        self.assertEqual(results[2], "call_2 ok")
+    
+    async def test_timeout_is_isolated(self):
+        self.agent.tool_timeout = 0.05
+        results = await self.agent._execute_tools(calls("hang:0", "ok:0.01"))
+        self.assertTrue(results[0].startswith("Tool error: hang:0 timed out"))
+        self.assertEqual(results[1], "call_1 ok")
+        self.assertEqual(self.running, 0)  # The hung tool was cancelled
+    
+    async def test_runs_concurrently_within_limit(self):
+        self.agent.max_tool_concurrency = 3
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        results = await self.agent._execute_tools(calls(*["ok:0.05"] * 6))
+        elapsed = loop.time() - start
+        
+        self.assertEqual(len(results), 6)
+        self.assertEqual(self.peak, 3)
+        self.assertLess(elapsed, 0.25)  # Two waves of 0.05s, not six
+    
+    async def test_real_tool_errors_become_error_strings(self):
+        del self.agent._execute_tool  # Real tools
+        
+        def broken_lookup(food_name):
+            raise ValueError("database unavailable")
+        self.agent.nutrition_tool.lookup = broken_lookup
+        
+        results = await self.agent._execute_tools([
+            ToolCall(id="call_0", name="nutrition_lookup", arguments={"food_name": "phở bò"}),
+            ToolCall(id="call_1", name="meal_nutrition", arguments={"items": [{"food_name": "phở bò"}]}),
+            ToolCall(id="call_2", name="nonexistent", arguments={}),
+        ])
+        self.assertEqual(results[0], "Tool error: database unavailable")
+        self.assertIn("phở bò", results[1])
+        self.assertEqual(results[2], "Unknown tool: nonexistent")
+
+
+if __name__ == "__main__":
+    unittest.main()